@@ -1,15 +1,29 @@
+import cProfile
+from contextlib import nullcontext
+
 import streamlit as st
-import plotly.graph_objects as go
 from datetime import datetime
 import pandas as pd
 import numpy as np
 
-from data.fetch_data import fetch_xauusd
-from features.indicators import SMA, EMA, RSI, ATR, MACD, BOLLINGER_BANDS, STOCHASTIC_RSI, VWAP
+from data.fetch_data import stored_bars
+from data.refresher import BackgroundRefresher
+from data.resample import bar_duration, next_bar_close
+from data.store import OHLCV_COLUMNS
+from data.stream import StreamIngest, WebSocketSource
+from features.panel import compute_panel
+from features.pipeline import compute_all_indicators
 from models.ml_model import train_model
+from models.predictor import Predictor
+from models.registry import ModelRegistry
+from inference.cache import AnalysisCache
+from inference.confluence import confluence_matrix
 from inference.trade_logic import trade_setup, get_confirmation_score, RiskManager
+from ui.charts import price_figure, candlestick_figure, bollinger_figure, macd_figure, CHART_POINTS
+from ui.downsample import visible_window
 from ui.theme import apply_theme
-from config import TIMEFRAMES, ACCENT_COLOR
+from profiling import Trace, span, start_trace, record_error, profile_report, export_json, history
+from config import TIMEFRAMES, SYMBOL, SYMBOLS, ACCENT_COLOR, MODEL_REGISTRY_DIR, STREAM_TICKS, SESSION_OFFSETS
 
 # ============ PAGE CONFIG ============
 st.set_page_config(
@@ -18,6 +32,14 @@ st.set_page_config(
     layout="wide"
 )
 
+# Stage timings of this rerun; cProfile only when asked for in Diagnostics
+trace = start_trace("rerun")
+# Set at the end of a full rerun; fragment-only reruns run after it
+page_done = False
+profiler = cProfile.Profile() if st.session_state.get("profile_rerun") else None
+if profiler:
+    profiler.enable()
+
 apply_theme()
 
 # ============ CUSTOM CSS ============
@@ -61,43 +83,158 @@ st.markdown(f"""
 """, unsafe_allow_html=True)
 
 # ============ HEADER ============
-col1, col2 = st.columns([3, 2])
-with col1:
-    st.markdown("## 🟡 **Algoldchart**")
-with col2:
+# Sections below are Streamlit fragments: a widget inside one reruns only
+# that section, while symbol and timeframe (inputs to every section)
+# rerun the page
+
+def fragment_trace(name):
+    # During a full rerun spans join the rerun's trace
+    return Trace(name) if page_done else nullcontext()
+
+@st.fragment
+def header_menu():
+    # Not wired to pages yet; a click reruns only this menu
     menu = ["Dashboard", "Strategies", "Backtest", "Settings", "Profile"]
     cols = st.columns(len(menu))
     for c, item in zip(cols, menu):
         with c:
             st.button(item, key=item)
 
+col1, col2 = st.columns([3, 2])
+with col1:
+    st.markdown("## 🟡 **Algoldchart**")
+with col2:
+    header_menu()
+
 # ============ HERO SECTION ============
 hero_left, hero_right = st.columns([3, 2])
 
+@st.fragment
+def export_report():
+    st.button("📄 Export Report", use_container_width=True)
+
 with hero_left:
     st.markdown("## **XAUUSD AI Trading Dashboard**")
     st.write(
         "Professional AI-powered Gold (XAUUSD) analysis with real-time charts, "
         "market bias, confidence scoring, and risk-managed trade setups."
     )
-
-    b1, b2 = st.columns(2)
-    with b1:
-        run_ai = st.button("🚀 Run AI Analysis", use_container_width=True)
-    with b2:
-        st.button("📄 Export Report", use_container_width=True)
+    export_report()
 
 # ============ TIMEFRAME + DATA ============
-timeframe_label = st.selectbox("Timeframe", list(TIMEFRAMES.keys()))
+if len(SYMBOLS) > 1:
+    symbol_col, timeframe_col = st.columns(2)
+    with symbol_col:
+        symbol = st.selectbox("Symbol", SYMBOLS)
+else:
+    symbol, timeframe_col = SYMBOL, st.container()
+with timeframe_col:
+    timeframe_label = st.selectbox("Timeframe", list(TIMEFRAMES.keys()))
 interval = TIMEFRAMES[timeframe_label]
+# Models of other symbols live next to the primary symbol's, per interval
+model_interval = interval if symbol == SYMBOL else f"{symbol.replace('/', '_')}_{interval}"
+
+@st.cache_resource
+def get_refresher():
+    # Fetches every timeframe and symbol on bar close in the background
+    return BackgroundRefresher(TIMEFRAMES.values(), SYMBOLS).start()
+
+def load_data(interval, symbol=SYMBOL):
+    """Latest bars (shared by all sessions, do not modify), error and age in seconds"""
+    return get_refresher().get(interval, symbol)
+
+@st.cache_resource
+def get_stream(symbol):
+    # Bars of every timeframe built from live ticks, warmed up with the fetched bars
+    ingest = StreamIngest(TIMEFRAMES.values(), symbol)
+    for tf_interval in TIMEFRAMES.values():
+        bars = load_data(tf_interval, symbol)[0]
+        if bars is not None:
+            ingest.seed(tf_interval, bars)
+    return ingest.start(WebSocketSource([symbol]))
+
+def current_bars(interval, symbol=SYMBOL):
+    """
+    Bars to analyse: the polled snapshot, plus the tick stream's forming
+    candle once it has one
+
+    Returns:
+        (DataFrame or None, forming bar dict or None, error or None, age
+        in seconds, stream status text or None)
+    """
+    df, error, data_age = load_data(interval, symbol)
+    forming, stream_note = None, None
+    if STREAM_TICKS:
+        try:
+            stream = get_stream(symbol)
+            forming = stream.forming(interval)
+            if forming is not None and df is not None and df.index[-1] > forming["time"]:
+                # The stream is behind the poll
+                forming = None
+            if forming is not None:
+                last_closed = stream.last_committed[interval]
+                if last_closed is not None and (df is None or df.index[-1].value < last_closed):
+                    # The poll has not caught up with a bar the stream just closed
+                    df = stream.frame(interval, include_forming=False)[OHLCV_COLUMNS]
+                stream_note = (
+                    f"⚡ Streaming {stream.stats()['ticks']} ticks, forming {interval} bar "
+                    f"{forming['time']} at {forming['close']:.2f} ({forming['confidence']:.0f}% confidence)"
+                )
+        except ImportError as e:
+            stream_note = f"⚪ Tick streaming unavailable: {e}"
+        except Exception as e:
+            record_error("stream", e)
+            stream_note = f"🟠 Tick stream failed, showing polled bars: {e}"
+    return df, forming, error, data_age, stream_note
+
+def analysed(symbol, interval, df, forming):
+    """Shared analysis cache entry of the bars from current_bars"""
+    if forming is None:
+        return get_analysis_cache().get(symbol, interval, df)
+    # Streamed indicators and confidence for the forming bar, no pipeline rerun per tick
+    return get_analysis_cache().get_live(symbol, interval, df, forming)
+
+@st.cache_resource
+def get_analysis_cache():
+    # Room for a few bars of every symbol and timeframe
+    return AnalysisCache(max_entries=2 * len(TIMEFRAMES) * len(SYMBOLS))
 
 @st.cache_data(ttl=60)
-def load_data(interval):
-    return fetch_xauusd(interval)
-
-df, error = load_data(interval)
-
-if error:
+def load_watchlist(interval):
+    """Last bar, indicators and confidence of every configured symbol"""
+    frames = {s: load_data(interval, s)[0] for s in SYMBOLS}
+    frames = {s: df for s, df in frames.items() if df is not None}
+    panel, _ = compute_panel(frames)
+    return panel.latest()
+
+# Chart history: the fetched bars, or a longer window from the local store
+CHART_HISTORY = {"Latest bars": None, "5,000 bars": 5_000, "50,000 bars": 50_000, "All stored": 0}
+
+@st.cache_resource(ttl=60, max_entries=4)
+def load_chart_history(interval, symbol, bars):
+    """Stored bars with indicators for charting (shared, do not modify)"""
+    stored = stored_bars(interval, symbol, bars or None)
+    if stored is None:
+        return None
+    return compute_all_indicators(stored)[0]
+
+@st.cache_data(max_entries=4 * len(SYMBOLS))
+def load_confluence(symbol, bars_key, _frames):
+    """Confluence matrix and summary, computed once per set of last bars"""
+    return confluence_matrix(_frames)
+
+@st.cache_resource
+def get_model_registry():
+    return ModelRegistry(MODEL_REGISTRY_DIR)
+
+@st.cache_resource(max_entries=len(TIMEFRAMES) * len(SYMBOLS))
+def get_predictor(model_key, _entry):
+    return Predictor.from_entry(_entry)
+
+with span("load_data", interval=interval, symbol=symbol):
+    df, forming, error, data_age, stream_note = current_bars(interval, symbol)
+
+if error and df is None:
     st.error(error)
     st.stop()
 
@@ -105,261 +242,461 @@ if df is None or len(df) == 0:
     st.error("No data available")
     st.stop()
 
+# ============ LIVE PRICE + SIGNAL ============
+# Seconds between checks of the live snapshot; each check is a dictionary
+# read plus a cache lookup, and a new bar reruns the whole page once
+LIVE_REFRESH_SECONDS = 5
+
+@st.fragment(run_every=LIVE_REFRESH_SECONDS)
+def live_status(symbol, interval, shown_bar):
+    """Data age, live price and signal, refreshed on a timer without a page rerun"""
+    with fragment_trace("live"), span("live", interval=interval, symbol=symbol):
+        bars, forming, error, data_age, stream_note = current_bars(interval, symbol)
+        if bars is None or len(bars) == 0:
+            st.warning(f"🟠 {error or 'No data available'}")
+            return
+        live_entry = analysed(symbol, interval, bars, forming)
+        if page_done and live_entry["frame"].index[-1] != shown_bar:
+            # A new bar: refresh every section once
+            st.rerun()
+        live = live_entry["analysis"]
+
+    # Stale-while-revalidate: older data is shown while the refresher catches up
+    bar_seconds = bar_duration(interval).total_seconds()
+    age_text = f"{data_age:.0f}s" if data_age < 120 else f"{data_age / 60:.0f}m"
+    if error:
+        st.warning(f"🟠 Data age {age_text} (last refresh failed: {error})")
+    elif data_age > bar_seconds + 60:
+        st.caption(f"🟠 Data age {age_text}, refreshing in the background")
+    else:
+        st.caption(f"🟢 Data age {age_text}, last bar {bars.index[-1]}")
+    if stream_note:
+        st.caption(stream_note)
+
+    now = pd.Timestamp.now(tz="UTC").tz_localize(None)
+    closes_in = (next_bar_close(interval, now, SESSION_OFFSETS) - now).total_seconds()
+    status = live.get("status", "NEUTRAL")
+    status_icon = "🟢" if status == "BUY" else "🔴" if status == "SELL" else "⏳"
+    live_col1, live_col2, live_col3, live_col4 = st.columns(4)
+    with live_col1:
+        st.metric("Live Price", f"${live['price']:.2f}")
+    with live_col2:
+        st.metric("Live Signal", f"{status_icon} {status}")
+    with live_col3:
+        st.metric("Confidence", f"{live.get('confidence', 0):.1f}%")
+    with live_col4:
+        st.metric("Bar Closes In", f"{closes_in:.0f}s")
+
+live_status(symbol, interval, forming["time"] if forming is not None else df.index[-1])
+
 # ============ CALCULATE ALL INDICATORS ============
 try:
-    # Original indicators
-    df["SMA"] = SMA(df["close"])
-    df["EMA"] = EMA(df["close"])
-    df["RSI"] = RSI(df["close"])
-    df["ATR"] = ATR(df)
-    
-    # NEW INDICATORS (MACD, Bollinger Bands, Stochastic RSI)
-    df["MACD"], df["MACD_Signal"], df["MACD_Hist"] = MACD(df["close"])
-    df["BB_Upper"], df["BB_Middle"], df["BB_Lower"] = BOLLINGER_BANDS(df["close"])
-    df["Stoch_K"], df["Stoch_D"] = STOCHASTIC_RSI(df["close"])
-    
-    # VWAP (if volume available)
-    if "volume" in df.columns:
-        df["VWAP"] = VWAP(df["high"], df["low"], df["close"], df["volume"])
-    
+    # SMA, EMA, RSI, ATR, MACD, Bollinger Bands, Stochastic RSI and VWAP
+    # in one fused pass, plus the trade analysis, computed once per bar
+    # for all sessions
+    with span("analysis"):
+        cached = analysed(symbol, interval, df, forming)
+    df = cached["frame"]
+    indicator_timings = cached["timings"]
+    analysis = cached["analysis"]
+
     st.success("✅ All indicators calculated successfully")
-    
+
 except Exception as e:
+    record_error("analysis", e)
     st.error(f"Error calculating indicators: {e}")
     import traceback
     st.error(traceback.format_exc())
     st.stop()
 
 # ============ HERO CHART ============
+# Long histories are downsampled to about one point per pixel (LTTB) and
+# drawn with WebGL; a box selection zooms in and reloads that window at
+# full detail
+PANEL_KEYS = ["panel_candles", "panel_bollinger", "panel_macd"]
+
+def chart_window(symbol, interval, df):
+    """(charted bars, visible window, zoom range) for the chart history and zoom in session state"""
+    history_label = st.session_state.get("chart_history", next(iter(CHART_HISTORY)))
+    chart_df = df
+    if CHART_HISTORY[history_label] is not None:
+        stored = load_chart_history(interval, symbol, CHART_HISTORY[history_label])
+        if stored is not None and len(stored) > len(df):
+            chart_df = stored
+
+    zoom = st.session_state.get("chart_zoom")
+    x_range = zoom[1] if zoom and zoom[0] == (symbol, interval, history_label) else None
+    visible = visible_window(chart_df, x_range)
+    if len(visible) < 2:
+        visible, x_range = chart_df, None
+    return chart_df, visible, x_range
+
+@st.fragment
+def hero_chart(symbol, interval, df):
+    """Price chart; its history selector and zoom rerun only this section"""
+    with fragment_trace("chart"), span("chart"):
+        try:
+            history_label = st.selectbox("Chart history", list(CHART_HISTORY), key="chart_history")
+            chart_df, visible, x_range = chart_window(symbol, interval, df)
+
+            fig = price_figure(visible, f"{symbol.replace('/', '')} Price Chart")
+            event = st.plotly_chart(
+                fig, use_container_width=True, key="hero_chart",
+                on_select="rerun", selection_mode="box"
+            )
+            boxes = event.selection.get("box", []) if event else []
+            if boxes and tuple(boxes[0]["x"]) != x_range:
+                st.session_state["chart_zoom"] = ((symbol, interval, history_label), tuple(boxes[0]["x"]))
+                st.rerun(scope="fragment")
+
+            detail = f"{len(visible):,} of {len(chart_df):,} bars"
+            if len(visible) > CHART_POINTS:
+                detail += f", downsampled to {CHART_POINTS:,} points"
+            st.caption(f"{detail}. Box-select to zoom in.")
+            if x_range and st.button("Reset zoom"):
+                st.session_state.pop("chart_zoom", None)
+                st.rerun(scope="fragment")
+        except Exception as e:
+            record_error("chart", e)
+            st.warning(f"Could not render chart: {e}")
+            return
+
+    # Open panels follow the chart window, so a new window reruns the page
+    view = (symbol, interval, history_label, x_range)
+    if page_done and any(st.session_state.get(key) for key in PANEL_KEYS) \
+            and st.session_state.get("panels_view") != view:
+        st.rerun()
+
 with hero_right:
-    try:
-        fig = go.Figure()
-        
-        # Add price line
-        fig.add_trace(go.Scatter(
-            x=df.index,
-            y=df["close"],
-            mode='lines',
-            name='Close Price',
-            line=dict(color='#00FFD1', width=2)
-        ))
-        
-        # Add SMA
-        fig.add_trace(go.Scatter(
-            x=df.index,
-            y=df["SMA"],
-            mode='lines',
-            name='SMA (14)',
-            line=dict(color='#FFA500', width=1, dash='dash')
-        ))
-        
-        # Add EMA
-        fig.add_trace(go.Scatter(
-            x=df.index,
-            y=df["EMA"],
-            mode='lines',
-            name='EMA (14)',
-            line=dict(color='#FF6B6B', width=1, dash='dash')
-        ))
-        
-        fig.update_layout(
-            title="XAUUSD Price Chart",
-            hovermode='x unified',
-            template='plotly_dark',
-            height=400,
-            margin=dict(l=0, r=0, t=30, b=0)
-        )
-        
-        st.plotly_chart(fig, use_container_width=True)
-    except Exception as e:
-        st.warning(f"Could not render chart: {e}")
+    hero_chart(symbol, interval, df)
 
 # ============ TRADE SETUP SECTION (THE MAIN FIX) ============
 st.markdown("---")
 st.markdown("## 📈 AI Trade Analysis")
 
-try:
-    # Get current values
-    current_price = df["close"].iloc[-1]
-    current_atr = df["ATR"].iloc[-1] if pd.notna(df["ATR"].iloc[-1]) else 0.01
-    
-    # Determine bias based on recent price action
-    if len(df) > 50:
-        recent_returns = df["close"].pct_change().tail(50).mean()
-        if recent_returns > 0.0001:
-            bias = "Bullish"
-            bias_color = "🟢"
-        elif recent_returns < -0.0001:
-            bias = "Bearish"
-            bias_color = "🔴"
+@st.fragment
+def trade_analysis(df, analysis, model_interval):
+    """Trade setup and the on-demand ML bias; Run AI reruns only this section"""
+    run_ai = st.button("🚀 Run AI Analysis")
+    try:
+        # Current values, bias from recent price action and the trade_setup
+        # result, from the shared cache
+        current_price = analysis["price"]
+        current_atr = analysis["atr"]
+        bias = analysis["bias"]
+        bias_color = {"Bullish": "🟢", "Bearish": "🔴"}.get(bias, "🟡")
+        trade_result = analysis
+
+        # Extract dictionary values (NOT tuple unpacking)
+        entry = trade_result.get("entry")
+        sl = trade_result.get("sl")
+        tp = trade_result.get("tp")
+        confidence = trade_result.get("confidence", 0)
+        status = trade_result.get("status", "NEUTRAL")
+        reason = trade_result.get("reason", "No signal")
+
+        # Display main metrics
+        metric_col1, metric_col2, metric_col3, metric_col4 = st.columns(4)
+
+        with metric_col1:
+            st.metric(
+                "Market Bias",
+                f"{bias_color} {bias}",
+                delta=f"{confidence:.1f}% confidence"
+            )
+
+        with metric_col2:
+            status_icon = "🟢" if status == "BUY" else "🔴" if status == "SELL" else "⏳"
+            st.metric("Signal Status", f"{status_icon} {status}")
+
+        with metric_col3:
+            st.metric("Current Price", f"${current_price:.2f}")
+
+        with metric_col4:
+            st.metric("Volatility (ATR)", f"${current_atr:.4f}")
+
+        # ML bias: refit at most every 20 new bars, new bars are only scored
+        if run_ai:
+            with fragment_trace("ml"), span("ml"):
+                model_entry = get_model_registry().get_or_train(df, model_interval, max_new_bars=20)
+                predictor = get_predictor(model_entry["key"], model_entry)
+                proba_up = predictor.predict_latest(df)
+            stats = predictor.latency_stats()
+
+            ml_col1, ml_col2 = st.columns(2)
+            with ml_col1:
+                if proba_up is not None:
+                    ml_bias = "🟢 Bullish" if proba_up > 0.5 else "🔴 Bearish"
+                    st.metric("ML Bias", ml_bias, delta=f"P(up) {proba_up * 100:.1f}%")
+            with ml_col2:
+                st.metric("ML Latency", f"{stats['last_ms']:.1f} ms", delta=f"fit {model_entry['train_seconds']:.2f}s")
+
+        st.markdown("---")
+
+        # Display trade setup if signal exists
+        if entry and status != "NEUTRAL":
+            st.success(f"✅ **TRADE SIGNAL DETECTED** - {reason}")
+
+            trade_col1, trade_col2, trade_col3 = st.columns(3)
+
+            with trade_col1:
+                st.metric("📍 Entry Price", f"${entry:.2f}", delta=f"Current: ${current_price:.2f}")
+
+            with trade_col2:
+                st.metric("⛔ Stop Loss", f"${sl:.2f}", delta=f"Risk: ${abs(entry-sl):.2f}")
+
+            with trade_col3:
+                st.metric("🎯 Take Profit", f"${tp:.2f}", delta=f"Target: ${abs(tp-entry):.2f}")
+
+            # Calculate Risk/Reward Ratio
+            if sl != entry:
+                risk = abs(entry - sl)
+                reward = abs(tp - entry)
+                rrr = reward / risk if risk > 0 else 0
+
+                rrr_col1, rrr_col2, rrr_col3 = st.columns(3)
+                with rrr_col1:
+                    st.metric("📊 Risk/Reward", f"1:{rrr:.2f}")
+                with rrr_col2:
+                    st.metric("💡 Confidence", f"{confidence:.1f}%", delta="Signal Quality")
+                with rrr_col3:
+                    st.metric("Direction", bias)
         else:
-            bias = "Neutral"
-            bias_color = "🟡"
-    else:
-        bias = "Neutral"
-        bias_color = "🟡"
-    
-    # ✅ FIXED: Call trade_setup and handle DICTIONARY response
-    trade_result = trade_setup(
-        price=current_price,
-        atr=current_atr,
-        bias=bias,
-        df=df,
-        min_confidence=50
-    )
-    
-    # Extract dictionary values (NOT tuple unpacking)
-    entry = trade_result.get("entry")
-    sl = trade_result.get("sl")
-    tp = trade_result.get("tp")
-    confidence = trade_result.get("confidence", 0)
-    status = trade_result.get("status", "NEUTRAL")
-    reason = trade_result.get("reason", "No signal")
-    
-    # Display main metrics
-    metric_col1, metric_col2, metric_col3, metric_col4 = st.columns(4)
-    
-    with metric_col1:
-        st.metric(
-            "Market Bias",
-            f"{bias_color} {bias}",
-            delta=f"{confidence:.1f}% confidence"
-        )
-    
-    with metric_col2:
-        status_icon = "🟢" if status == "BUY" else "🔴" if status == "SELL" else "⏳"
-        st.metric("Signal Status", f"{status_icon} {status}")
-    
-    with metric_col3:
-        st.metric("Current Price", f"${current_price:.2f}")
-    
-    with metric_col4:
-        st.metric("Volatility (ATR)", f"${current_atr:.4f}")
-    
-    st.markdown("---")
-    
-    # Display trade setup if signal exists
-    if entry and status != "NEUTRAL":
-        st.success(f"✅ **TRADE SIGNAL DETECTED** - {reason}")
-        
-        trade_col1, trade_col2, trade_col3 = st.columns(3)
-        
-        with trade_col1:
-            st.metric("📍 Entry Price", f"${entry:.2f}", delta=f"Current: ${current_price:.2f}")
-        
-        with trade_col2:
-            st.metric("⛔ Stop Loss", f"${sl:.2f}", delta=f"Risk: ${abs(entry-sl):.2f}")
-        
-        with trade_col3:
-            st.metric("🎯 Take Profit", f"${tp:.2f}", delta=f"Target: ${abs(tp-entry):.2f}")
-        
-        # Calculate Risk/Reward Ratio
-        if sl != entry:
-            risk = abs(entry - sl)
-            reward = abs(tp - entry)
-            rrr = reward / risk if risk > 0 else 0
-            
-            rrr_col1, rrr_col2, rrr_col3 = st.columns(3)
-            with rrr_col1:
-                st.metric("📊 Risk/Reward", f"1:{rrr:.2f}")
-            with rrr_col2:
-                st.metric("💡 Confidence", f"{confidence:.1f}%", delta="Signal Quality")
-            with rrr_col3:
-                st.metric("Direction", bias)
-    else:
-        st.info(f"⏳ {reason}")
-        st.write(f"**Confidence Score**: {confidence:.1f}% (Need 50%+ for signal)")
+            st.info(f"⏳ {reason}")
+            st.write(f"**Confidence Score**: {confidence:.1f}% (Need 50%+ for signal)")
 
-except Exception as e:
-    st.error(f"Error in trade setup: {str(e)}")
-    import traceback
-    st.error(traceback.format_exc())
+    except Exception as e:
+        record_error("trade_analysis", e)
+        st.error(f"Error in trade setup: {str(e)}")
+        import traceback
+        st.error(traceback.format_exc())
+
+trade_analysis(df, analysis, model_interval)
+
+# ============ MULTI-TIMEFRAME CONFLUENCE ============
+st.markdown("---")
+st.markdown("## 🧭 Multi-Timeframe Confluence")
+
+@st.fragment
+def confluence_section(symbol):
+    """Bias, signal and indicator states of the chosen timeframes; a new choice reruns only this section"""
+    labels = st.multiselect("Timeframes", list(TIMEFRAMES), default=list(TIMEFRAMES), key="confluence_timeframes")
+    try:
+        with fragment_trace("confluence"), span("confluence", symbol=symbol):
+            # The refresher keeps every timeframe warm, so these are dictionary reads
+            frames = {label: load_data(TIMEFRAMES[label], symbol)[0] for label in labels}
+            frames = {label: bars for label, bars in frames.items() if bars is not None and len(bars)}
+            bars_key = tuple((label, bars.index[-1], tuple(bars.iloc[-1])) for label, bars in frames.items())
+            matrix, summary = load_confluence(symbol, bars_key, frames)
+    except Exception as e:
+        record_error("confluence", e)
+        st.warning(f"Could not compute confluence: {e}")
+        return
+    if not len(matrix):
+        st.info("No timeframe has data yet")
+        return
+
+    bias_icon = {"Bullish": "🟢", "Bearish": "🔴"}.get(summary["bias"], "🟡")
+    conf_col1, conf_col2, conf_col3 = st.columns(3)
+    with conf_col1:
+        st.metric("Confluence Score", f"{summary['score']:+.0f}", delta=f"{bias_icon} {summary['bias']}")
+    with conf_col2:
+        st.metric("Agreement", f"{summary['agreement']:.0f}%", delta=f"{len(matrix)} timeframes")
+    with conf_col3:
+        st.metric("Aligned Signal", summary["signal"])
+    numeric = matrix.select_dtypes("number").columns
+    st.dataframe(matrix.round(dict.fromkeys(numeric, 2)), use_container_width=True)
+
+confluence_section(symbol)
+
+# ============ WATCHLIST ============
+if len(SYMBOLS) > 1:
+    st.markdown("---")
+    st.markdown(f"## 🌐 Watchlist ({timeframe_label})")
+    try:
+        with span("watchlist"):
+            watchlist = load_watchlist(interval)
+        st.dataframe(
+            watchlist[["time", "close", "RSI", "ATR", "MACD_Hist", "confidence"]].round(4),
+            use_container_width=True
+        )
+    except Exception as e:
+        record_error("watchlist", e)
+        st.warning(f"Could not load watchlist: {e}")
 
 # ============ INDICATORS DASHBOARD ============
 st.markdown("---")
 st.markdown("## 📊 Technical Indicators Dashboard")
 
-# Row 1: RSI, MACD, Stochastic
-ind_row1_col1, ind_row1_col2, ind_row1_col3 = st.columns(3)
-
-with ind_row1_col1:
-    st.subheader("RSI (14)")
-    if "RSI" in df.columns and pd.notna(df["RSI"].iloc[-1]):
-        rsi_val = df["RSI"].iloc[-1]
-        if rsi_val > 70:
-            st.metric("RSI", f"{rsi_val:.2f}", delta="🔴 Overbought")
-        elif rsi_val < 30:
-            st.metric("RSI", f"{rsi_val:.2f}", delta="🟢 Oversold")
-        else:
-            st.metric("RSI", f"{rsi_val:.2f}", delta="🟡 Neutral")
-
-with ind_row1_col2:
-    st.subheader("MACD")
-    if "MACD" in df.columns and "MACD_Signal" in df.columns:
-        if pd.notna(df["MACD"].iloc[-1]) and pd.notna(df["MACD_Signal"].iloc[-1]):
-            macd_val = df["MACD"].iloc[-1]
-            signal_val = df["MACD_Signal"].iloc[-1]
-            hist_val = df["MACD_Hist"].iloc[-1]
-            
-            macd_trend = "🟢 Bullish" if macd_val > signal_val else "🔴 Bearish"
-            st.metric("MACD", f"{macd_val:.4f}", delta=f"{macd_trend} (Hist: {hist_val:.4f})")
-
-with ind_row1_col3:
-    st.subheader("Stochastic RSI")
-    if "Stoch_K" in df.columns and pd.notna(df["Stoch_K"].iloc[-1]):
-        stoch_k = df["Stoch_K"].iloc[-1]
-        stoch_d = df["Stoch_D"].iloc[-1]
-        st.metric("Stoch K", f"{stoch_k:.2f}", delta=f"D: {stoch_d:.2f}")
-
-# Row 2: Bollinger Bands, ATR, Price vs Moving Averages
-ind_row2_col1, ind_row2_col2, ind_row2_col3 = st.columns(3)
-
-with ind_row2_col1:
-    st.subheader("Bollinger Bands (20)")
-    if "BB_Upper" in df.columns and "BB_Lower" in df.columns:
-        if pd.notna(df["BB_Upper"].iloc[-1]) and pd.notna(df["BB_Lower"].iloc[-1]):
-            upper = df["BB_Upper"].iloc[-1]
-            middle = df["BB_Middle"].iloc[-1]
-            lower = df["BB_Lower"].iloc[-1]
-            current = df["close"].iloc[-1]
-            
-            if current > upper:
-                position = "🔴 Above Upper (Overbought)"
-            elif current < lower:
-                position = "🟢 Below Lower (Oversold)"
-            else:
-                position = "🟡 Within Bands"
-            
-            st.metric("BB Status", position)
-
-with ind_row2_col2:
-    st.subheader("ATR (14)")
-    if "ATR" in df.columns and pd.notna(df["ATR"].iloc[-1]):
-        atr_current = df["ATR"].iloc[-1]
-        atr_avg = df["ATR"].rolling(20).mean().iloc[-1]
-        
-        if pd.notna(atr_avg):
-            atr_trend = "📈 Expanding" if atr_current > atr_avg else "📉 Contracting"
-            st.metric("ATR", f"{atr_current:.4f}", delta=f"{atr_trend} (Avg: {atr_avg:.4f})")
-
-with ind_row2_col3:
-    st.subheader("Price vs MA")
-    if "SMA" in df.columns and "EMA" in df.columns:
-        if pd.notna(df["SMA"].iloc[-1]) and pd.notna(df["EMA"].iloc[-1]):
-            sma_val = df["SMA"].iloc[-1]
-            ema_val = df["EMA"].iloc[-1]
-            price = df["close"].iloc[-1]
-            
-            if price > ema_val > sma_val:
-                trend = "🟢 Strong Uptrend"
-            elif price < ema_val < sma_val:
-                trend = "🔴 Strong Downtrend"
-            elif ema_val > sma_val:
-                trend = "🟢 EMA > SMA (Bullish)"
+@st.fragment
+def indicator_cards(df):
+    """Latest value of every indicator; reruns only with new data"""
+    # Row 1: RSI, MACD, Stochastic
+    ind_row1_col1, ind_row1_col2, ind_row1_col3 = st.columns(3)
+
+    with ind_row1_col1:
+        st.subheader("RSI (14)")
+        if "RSI" in df.columns and pd.notna(df["RSI"].iloc[-1]):
+            rsi_val = df["RSI"].iloc[-1]
+            if rsi_val > 70:
+                st.metric("RSI", f"{rsi_val:.2f}", delta="🔴 Overbought")
+            elif rsi_val < 30:
+                st.metric("RSI", f"{rsi_val:.2f}", delta="🟢 Oversold")
             else:
-                trend = "🔴 SMA > EMA (Bearish)"
-            
-            st.metric("Trend", trend)
+                st.metric("RSI", f"{rsi_val:.2f}", delta="🟡 Neutral")
+
+    with ind_row1_col2:
+        st.subheader("MACD")
+        if "MACD" in df.columns and "MACD_Signal" in df.columns:
+            if pd.notna(df["MACD"].iloc[-1]) and pd.notna(df["MACD_Signal"].iloc[-1]):
+                macd_val = df["MACD"].iloc[-1]
+                signal_val = df["MACD_Signal"].iloc[-1]
+                hist_val = df["MACD_Hist"].iloc[-1]
+
+                macd_trend = "🟢 Bullish" if macd_val > signal_val else "🔴 Bearish"
+                st.metric("MACD", f"{macd_val:.4f}", delta=f"{macd_trend} (Hist: {hist_val:.4f})")
+
+    with ind_row1_col3:
+        st.subheader("Stochastic RSI")
+        if "Stoch_K" in df.columns and pd.notna(df["Stoch_K"].iloc[-1]):
+            stoch_k = df["Stoch_K"].iloc[-1]
+            stoch_d = df["Stoch_D"].iloc[-1]
+            st.metric("Stoch K", f"{stoch_k:.2f}", delta=f"D: {stoch_d:.2f}")
+
+    # Row 2: Bollinger Bands, ATR, Price vs Moving Averages
+    ind_row2_col1, ind_row2_col2, ind_row2_col3 = st.columns(3)
+
+    with ind_row2_col1:
+        st.subheader("Bollinger Bands (20)")
+        if "BB_Upper" in df.columns and "BB_Lower" in df.columns:
+            if pd.notna(df["BB_Upper"].iloc[-1]) and pd.notna(df["BB_Lower"].iloc[-1]):
+                upper = df["BB_Upper"].iloc[-1]
+                middle = df["BB_Middle"].iloc[-1]
+                lower = df["BB_Lower"].iloc[-1]
+                current = df["close"].iloc[-1]
+
+                if current > upper:
+                    position = "🔴 Above Upper (Overbought)"
+                elif current < lower:
+                    position = "🟢 Below Lower (Oversold)"
+                else:
+                    position = "🟡 Within Bands"
+
+                st.metric("BB Status", position)
+
+    with ind_row2_col2:
+        st.subheader("ATR (14)")
+        if "ATR" in df.columns and pd.notna(df["ATR"].iloc[-1]):
+            atr_current = df["ATR"].iloc[-1]
+            atr_avg = df["ATR_Mean"].iloc[-1]
+
+            if pd.notna(atr_avg):
+                atr_trend = "📈 Expanding" if atr_current > atr_avg else "📉 Contracting"
+                st.metric("ATR", f"{atr_current:.4f}", delta=f"{atr_trend} (Avg: {atr_avg:.4f})")
+
+    with ind_row2_col3:
+        st.subheader("Price vs MA")
+        if "SMA" in df.columns and "EMA" in df.columns:
+            if pd.notna(df["SMA"].iloc[-1]) and pd.notna(df["EMA"].iloc[-1]):
+                sma_val = df["SMA"].iloc[-1]
+                ema_val = df["EMA"].iloc[-1]
+                price = df["close"].iloc[-1]
+
+                if price > ema_val > sma_val:
+                    trend = "🟢 Strong Uptrend"
+                elif price < ema_val < sma_val:
+                    trend = "🔴 Strong Downtrend"
+                elif ema_val > sma_val:
+                    trend = "🟢 EMA > SMA (Bullish)"
+                else:
+                    trend = "🔴 SMA > EMA (Bearish)"
+
+                st.metric("Trend", trend)
+
+indicator_cards(df)
+
+# ============ CHART PANELS ============
+# Built only when switched on, for the same (zoomed) window as the hero chart
+st.markdown("---")
+st.markdown("## 🕯️ Chart Panels")
+
+@st.fragment
+def chart_panels(symbol, interval, df):
+    """Candlestick, Bollinger and MACD panels; toggling one reruns only this section"""
+    panel_col1, panel_col2, panel_col3 = st.columns(3)
+    with panel_col1:
+        show_candles = st.checkbox("Candlesticks", key="panel_candles")
+    with panel_col2:
+        show_bollinger = st.checkbox("Bollinger Bands", key="panel_bollinger")
+    with panel_col3:
+        show_macd = st.checkbox("MACD", key="panel_macd")
+
+    if not (show_candles or show_bollinger or show_macd):
+        return
+    with fragment_trace("chart.panels"), span("chart.panels"):
+        try:
+            _, visible, x_range = chart_window(symbol, interval, df)
+            st.session_state["panels_view"] = (symbol, interval, st.session_state.get("chart_history"), x_range)
+            if show_candles:
+                st.plotly_chart(candlestick_figure(visible, "Candlesticks"), use_container_width=True)
+            if show_bollinger:
+                st.plotly_chart(bollinger_figure(visible, "Bollinger Bands (20)"), use_container_width=True)
+            if show_macd:
+                st.plotly_chart(macd_figure(visible, "MACD (12, 26, 9)"), use_container_width=True)
+        except Exception as e:
+            record_error("chart.panels", e)
+            st.warning(f"Could not render chart panels: {e}")
+
+chart_panels(symbol, interval, df)
+
+with st.expander("📡 Data feed"):
+    st.dataframe(get_refresher().metrics(), use_container_width=True)
+
+# ============ DIAGNOSTICS ============
+profile_text = None
+if profiler:
+    profiler.disable()
+    profile_text = profile_report(profiler)
+
+@st.fragment
+def diagnostics(trace, profile_text):
+    """Stage timings of the last full rerun and of this process"""
+    st.caption(f"Last full rerun: {trace.total() * 1000:.1f} ms in timed stages")
+    spans = pd.DataFrame(trace.spans)
+    if len(spans):
+        spans["ms"] = spans.pop("seconds") * 1000
+        spans["name"] = ["  " * d + n for d, n in zip(spans["depth"], spans["name"])]
+        st.dataframe(spans.drop(columns="depth").round(2), use_container_width=True)
+
+    stages = pd.DataFrame(history.summary()).T
+    if len(stages):
+        st.markdown("**Stage latency (this process)**")
+        st.dataframe(stages.round(2), use_container_width=True)
+        stage = st.selectbox("Latency history", list(stages.index))
+        samples = pd.DataFrame(history.series(stage), columns=["time", "seconds"])
+        samples.index = pd.to_datetime(samples.pop("time"), unit="s")
+        st.line_chart(samples["seconds"] * 1000)
+
+    errors = history.recent_errors()
+    if errors:
+        st.markdown("**Recent errors**")
+        for err in reversed(errors[-5:]):
+            st.code(f"[{err['stage']}] {err['traceback']}")
+
+    st.checkbox("Profile the next rerun with cProfile", key="profile_rerun")
+    if profile_text:
+        st.text(profile_text)
+
+    st.download_button(
+        "Export diagnostics (JSON)",
+        export_json(trace),
+        file_name="diagnostics.json",
+        mime="application/json"
+    )
+
+with st.expander("🩺 Diagnostics"):
+    diagnostics(trace, profile_text)
 
 st.markdown("---")
 st.markdown(f"*Last updated: {pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S UTC')}*")
+page_done = True
@@ -0,0 +1,82 @@
+"""
+Benchmark: TwelveData time_series parsing
+
+Compares the original DataFrame-of-dicts parse with data.parse on a
+synthetic response. Run from the repo root:
+
+    python -m benchmarks.bench_parse
+"""
+import json
+import time
+
+import pandas as pd
+import numpy as np
+
+from data.parse import loads, parse_time_series
+
+def make_response(n, with_volume=False, seed=0):
+    """Synthetic time_series JSON body with n bars, newest first like the API"""
+    rng = np.random.default_rng(seed)
+    close = 2000 * np.exp(np.cumsum(rng.normal(0, 0.0005, n)))
+    index = pd.date_range("2024-01-01", periods=n, freq="1min")
+    values = []
+    for t, c in zip(index[::-1], close[::-1]):
+        bar = {
+            "datetime": t.strftime("%Y-%m-%d %H:%M:%S"),
+            "open": f"{c * 0.9999:.5f}",
+            "high": f"{c * 1.0005:.5f}",
+            "low": f"{c * 0.9995:.5f}",
+            "close": f"{c:.5f}",
+        }
+        if with_volume:
+            bar["volume"] = str(int(rng.integers(0, 1000)))
+        values.append(bar)
+    return json.dumps({"meta": {"symbol": "XAU/USD"}, "values": values, "status": "ok"}).encode()
+
+def legacy_parse(values):
+    """The parse fetch_xauusd used before data.parse"""
+    df = pd.DataFrame(values)
+    df["datetime"] = pd.to_datetime(df["datetime"])
+    df.set_index("datetime", inplace=True)
+    for col in ["open", "high", "low", "close"]:
+        df[col] = df[col].astype(float)
+    if "volume" in df.columns:
+        df["volume"] = df["volume"].astype(float)
+    else:
+        df["volume"] = 0.0
+    return df.sort_index()
+
+def _best_of(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def run(sizes=(300, 5000, 50000), repeat=5):
+    rows = []
+    for n in sizes:
+        raw = make_response(n)
+        values = json.loads(raw)["values"]
+
+        # Same numbers either way
+        expected = legacy_parse(values)
+        actual = parse_time_series(values)
+        pd.testing.assert_frame_equal(actual, expected, check_freq=False, check_index_type=False)
+
+        rows.append({
+            "bars": n,
+            "json_ms": _best_of(lambda: json.loads(raw), repeat),
+            "fast_json_ms": _best_of(lambda: loads(raw), repeat),
+            "legacy_parse_ms": _best_of(lambda: legacy_parse(values), repeat),
+            "fast_parse_ms": _best_of(lambda: parse_time_series(values), repeat),
+            "fast_parse_f32_ms": _best_of(lambda: parse_time_series(values, dtype=np.float32), repeat),
+        })
+
+    result = pd.DataFrame(rows).set_index("bars")
+    result["speedup"] = result["legacy_parse_ms"] / result["fast_parse_ms"]
+    return result
+
+if __name__ == "__main__":
+    print(run().round(3).to_string())
@@ -0,0 +1,60 @@
+"""
+Benchmark: training modes of models.ml_model
+
+Fit time and hold-out accuracy of the exact GradientBoosting model
+against the histogram booster and the online partial_fit learner, plus
+the cost of an online update with the newest 1% of bars. The exact
+model takes minutes at 1M rows. Run from the repo root:
+
+    python -m benchmarks.bench_training [--sizes 10000 100000 1000000]
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import make_ohlcv
+from features.pipeline import compute_all_indicators
+from models.ml_model import fit_model, training_data, TRAINING_MODES
+
+def _accuracy(model, scaler, feature_cols, X_test, y_test):
+    X = X_test[feature_cols]
+    if scaler is not None:
+        X = scaler.transform(X)
+    return float((model.predict(X) == y_test).mean())
+
+def run(sizes=(10_000, 100_000, 1_000_000), test_size=0.2, seed=0):
+    rows = []
+    for n in sizes:
+        df, _ = compute_all_indicators(make_ohlcv(n, seed=seed))
+        split = int(n * (1 - test_size))
+        train, test = df.iloc[:split], df.iloc[split:]
+        X_test, y_test, _ = training_data(test)
+
+        for mode in TRAINING_MODES:
+            start = time.perf_counter()
+            model, scaler, feature_cols = fit_model(train, mode)
+            fit_seconds = time.perf_counter() - start
+
+            row = {
+                "rows": n,
+                "mode": mode,
+                "fit_s": fit_seconds,
+                "accuracy": _accuracy(model, scaler, feature_cols, X_test, y_test),
+            }
+            if mode == "online":
+                # Incremental update with the next 1% of bars
+                update = df.iloc[:split + max(1, n // 100)]
+                start = time.perf_counter()
+                model.partial_fit(update)
+                row["update_s"] = time.perf_counter() - start
+            rows.append(row)
+            print(row, flush=True)
+
+    return pd.DataFrame(rows).set_index(["rows", "mode"])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+    print(run(args.sizes).round(4).to_string())
@@ -0,0 +1,361 @@
+"""
+Benchmark suite: time and peak memory of every hot path, with a history
+
+Runs each case on seeded synthetic bars (benchmarks.synthetic) at every
+size it supports, appends the results to a JSON-lines history and
+compares them with the median of the previous runs on this machine. A
+case slower (or hungrier) than that baseline by more than --threshold
+is reported as a regression and the exit status is 1, as is a case
+slower than its entry in BUDGETS. The fetch case
+replays the recorded TwelveData response in benchmarks/fixtures (replace
+it with --record-fixture), so no network or API credits are needed.
+Run from the repo root:
+
+    python -m benchmarks.suite [--sizes 1000 100000 10000000] [--cases indicators backtest]
+        [--threshold 0.2] [--history benchmarks/results/history.jsonl] [--no-record] [--list]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+
+import pandas as pd
+import numpy as np
+
+from benchmarks.bench_parse import make_response
+from benchmarks.synthetic import make_ohlcv
+from data.fetch_data import fetch_xauusd
+from data.parse import loads, parse_time_series
+from data.store import OHLCVStore
+from data.stream import StreamIngest, ReplaySource
+from features import indicators
+from features.analytics import bootstrap_trades
+from features.backtest import backtest_strategy, backtest_strategy_loop
+from features.pipeline import compute_all_indicators
+from inference.confluence import confluence_matrix
+from inference.trade_logic import get_confirmation_score, get_confirmation_scores
+from models.ml_model import train_model, evaluate_model
+from config import TIMEFRAMES
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURE = os.path.join(BENCH_DIR, "fixtures", "time_series_xauusd_1min.json")
+DEFAULT_HISTORY = os.path.join(BENCH_DIR, "results", "history.jsonl")
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000]
+
+# ========== INPUTS ==========
+
+# Inputs are built once per size and shared by every case
+_inputs = {}
+
+def _bars(n):
+    if ("bars", n) not in _inputs:
+        _inputs[("bars", n)] = make_ohlcv(n, seed=0)
+    return _inputs[("bars", n)]
+
+def _indicator_frame(n):
+    if ("indicators", n) not in _inputs:
+        _inputs[("indicators", n)] = compute_all_indicators(_bars(n))[0]
+    return _inputs[("indicators", n)]
+
+def _response(n):
+    if ("response", n) not in _inputs:
+        _inputs[("response", n)] = make_response(n)
+    return _inputs[("response", n)]
+
+def _ticks(n):
+    """n ticks about a second apart, shaped like the 1-minute bars' closes"""
+    if ("ticks", n) not in _inputs:
+        bars = make_ohlcv(n, seed=0, freq="1s", volatility=0.0001, with_volume=False)
+        _inputs[("ticks", n)] = bars.rename(columns={"close": "price"})
+    return _inputs[("ticks", n)]
+
+def _trade_profits(n):
+    """n seeded per-trade profits with a small positive edge"""
+    if ("trades", n) not in _inputs:
+        _inputs[("trades", n)] = np.random.default_rng(0).normal(1.0, 10.0, n)
+    return _inputs[("trades", n)]
+
+def _stream_ticks(ticks):
+    """Every tick through a fresh StreamIngest for all timeframes"""
+    StreamIngest().consume(ReplaySource.from_frame(ticks))
+
+def _fixture():
+    if "fixture" not in _inputs:
+        with open(FIXTURE, "rb") as f:
+            _inputs["fixture"] = f.read()
+    return _inputs["fixture"]
+
+class _ReplayClient:
+    """Stands in for TwelveDataClient: decodes the recorded body on every call"""
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    def get(self, endpoint, params, credits=1):
+        return loads(self.raw)
+
+def record_fixture(path=FIXTURE, interval="1min", outputsize=500):
+    """Save a live TwelveData time_series body as the fetch fixture (costs one credit)"""
+    from data.fetch_data import _client
+    params = {"symbol": "XAU/USD", "interval": interval, "outputsize": outputsize,
+              "format": "JSON", "apikey": _client.api_key}
+    response = _client.session.get(f"{_client.base_url}/time_series", params=params, timeout=_client.timeout)
+    response.raise_for_status()
+    if loads(response.content).get("status") == "error":
+        raise RuntimeError(f"TwelveData error: {response.text}")
+    with open(path, "wb") as f:
+        f.write(response.content)
+
+def _fetch_into_empty_store():
+    """fetch_xauusd end to end (decode, parse, merge, write) into a fresh store"""
+    with tempfile.TemporaryDirectory() as root:
+        return fetch_xauusd("1min", outputsize=5000, store=OHLCVStore(root), client=_ReplayClient(_fixture()))
+
+# ========== CASES ==========
+
+# name -> (setup(n) returning the call's arguments, function, largest n to
+# run it at: None for no limit, 0 for a fixed-size input such as the fixture)
+CASES = {
+    "indicators.SMA": (lambda n: (_bars(n)["close"],), indicators.SMA, None),
+    "indicators.EMA": (lambda n: (_bars(n)["close"],), indicators.EMA, None),
+    "indicators.RSI": (lambda n: (_bars(n)["close"],), indicators.RSI, None),
+    "indicators.ATR": (lambda n: (_bars(n),), indicators.ATR, None),
+    "indicators.MACD": (lambda n: (_bars(n)["close"],), indicators.MACD, None),
+    "indicators.BOLLINGER_BANDS": (lambda n: (_bars(n)["close"],), indicators.BOLLINGER_BANDS, None),
+    "indicators.STOCHASTIC_RSI": (lambda n: (_bars(n)["close"],), indicators.STOCHASTIC_RSI, None),
+    "indicators.VWAP": (
+        lambda n: tuple(_bars(n)[col] for col in ("high", "low", "close", "volume")),
+        indicators.VWAP, None,
+    ),
+    "pipeline.compute_all_indicators": (lambda n: (_bars(n),), compute_all_indicators, None),
+    "trade_logic.get_confirmation_score": (lambda n: (_indicator_frame(n),), get_confirmation_score, None),
+    "trade_logic.get_confirmation_scores": (lambda n: (_indicator_frame(n),), get_confirmation_scores, None),
+    # n bars for every configured timeframe, scored as one panel
+    "confluence.confluence_matrix": (
+        lambda n: ({name: _bars(n) for name in TIMEFRAMES},), confluence_matrix, 100_000,
+    ),
+    "backtest.backtest_strategy": (lambda n: (_indicator_frame(n),), backtest_strategy, None),
+    # Rescoring a growing slice per bar is quadratic
+    "backtest.backtest_strategy_loop": (lambda n: (_indicator_frame(n),), backtest_strategy_loop, 10_000),
+    # The exact GradientBoosting fit takes about a minute at 100k rows
+    "ml_model.train_model": (lambda n: (_indicator_frame(n),), train_model, 100_000),
+    "ml_model.train_model.hist": (lambda n: (_indicator_frame(n), "hist"), train_model, 1_000_000),
+    "ml_model.evaluate_model": (lambda n: (_indicator_frame(n),), evaluate_model, 100_000),
+    "stream.consume": (lambda n: (_ticks(n),), _stream_ticks, 1_000_000),
+    "fetch.loads": (lambda n: (_response(n),), loads, None),
+    "fetch.parse_time_series": (lambda n: (loads(_response(n))["values"],), parse_time_series, None),
+    "fetch.fetch_xauusd.fixture": (lambda n: (), _fetch_into_empty_store, 0),
+    # Monte Carlo over a long backtest: 20k trades x 2000 resampled sequences
+    "analytics.bootstrap_trades": (lambda n: (_trade_profits(20_000), 2000), bootstrap_trades, 0),
+    "analytics.bootstrap_trades.shuffle": (
+        lambda n: (_trade_profits(20_000), 2000, "shuffle"), bootstrap_trades, 0,
+    ),
+}
+
+# name -> most seconds a case may take, flagged as a regression whatever the history says
+BUDGETS = {
+    "analytics.bootstrap_trades": 1.0,
+    "analytics.bootstrap_trades.shuffle": 1.0,
+}
+
+def select_cases(patterns=None):
+    """Case names matching any of the given prefixes (all cases by default)"""
+    if not patterns:
+        return list(CASES)
+    selected = [name for name in CASES if any(name.startswith(p) or p in name.split(".") for p in patterns)]
+    if not selected:
+        raise ValueError(f"No benchmark case matches {patterns}; known cases: {list(CASES)}")
+    return selected
+
+# ========== MEASUREMENT ==========
+
+def _time(func, args, min_time=0.2, max_repeat=5):
+    """Best wall time of up to max_repeat calls, stopping once min_time has been spent"""
+    best = float("inf")
+    spent = 0.0
+    calls = 0
+    while calls < max_repeat and (calls == 0 or spent < min_time):
+        start = time.perf_counter()
+        func(*args)
+        seconds = time.perf_counter() - start
+        best = min(best, seconds)
+        spent += seconds
+        calls += 1
+    return best, calls
+
+def _peak_memory(func, args):
+    """Peak bytes allocated by one call (numpy and pandas buffers included)"""
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+def _environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR,
+            capture_output=True, text=True, timeout=10,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "commit": commit,
+        "host": platform.node(),
+        "machine": platform.machine(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+    }
+
+def run(cases=None, sizes=DEFAULT_SIZES, memory=True, min_time=0.2, max_repeat=5):
+    """
+    Run the selected cases at every size they support
+
+    Args:
+        cases: Case names (default all of CASES)
+        sizes: Bar counts to run the sized cases at
+        memory: Also measure the peak allocation of one extra call
+        min_time: Keep repeating a case until this many seconds are spent
+        max_repeat: Most calls per case and size
+
+    Returns:
+        list of result dicts (case, bars, seconds, calls, peak_mb)
+    """
+    results = []
+    for name in cases or list(CASES):
+        setup, func, max_bars = CASES[name]
+        if max_bars == 0:
+            case_sizes = [None]
+        else:
+            case_sizes = [n for n in sizes if max_bars is None or n <= max_bars]
+
+        for n in case_sizes:
+            args = setup(n)
+            seconds, calls = _time(func, args, min_time, max_repeat)
+            result = {
+                "case": name,
+                "bars": n,
+                "seconds": seconds,
+                "calls": calls,
+                "peak_mb": _peak_memory(func, args) / 1e6 if memory else None,
+            }
+            results.append(result)
+            print(json.dumps(result), file=sys.stderr, flush=True)
+    return results
+
+# ========== HISTORY ==========
+
+def load_history(path=DEFAULT_HISTORY):
+    """Every recorded result as a DataFrame (empty if there is no history yet)"""
+    if not os.path.exists(path):
+        return pd.DataFrame()
+    with open(path) as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    return pd.DataFrame(records)
+
+def record(results, path=DEFAULT_HISTORY, environment=None):
+    """Append one run's results to the history; returns the run id"""
+    run_id = uuid.uuid4().hex[:12]
+    meta = {"run": run_id, "time": time.time(), **(environment or _environment())}
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a") as f:
+        for result in results:
+            f.write(json.dumps({**meta, **result}) + "\n")
+    return run_id
+
+def compare(results, history, threshold=0.2, baseline_runs=5, host=None, min_mb=1.0):
+    """
+    Compare results with the median of the previous runs on the same host,
+    and with the BUDGETS of the cases that have one
+
+    Args:
+        results: Output of run()
+        history: load_history() from before these results were recorded
+        threshold: Relative slowdown (or memory growth) that counts as a regression
+        baseline_runs: Most recent runs per case and size in the baseline
+        host: Host whose history is the baseline (default this machine)
+        min_mb: Ignore memory growth smaller than this many MB
+
+    Returns:
+        DataFrame with the baseline, the ratios, the budget and a
+        "regression" flag per result
+    """
+    host = platform.node() if host is None else host
+    table = pd.DataFrame(results)
+    if table.empty:
+        return table
+
+    table["base_seconds"] = np.nan
+    table["base_peak_mb"] = np.nan
+    if not history.empty:
+        past = history[history["host"] == host]
+        # Fixed-size cases have no bar count
+        past_bars = past["bars"].fillna(-1)
+        for i, row in table.iterrows():
+            bars = -1 if pd.isna(row["bars"]) else row["bars"]
+            same = past[(past["case"] == row["case"]) & (past_bars == bars)]
+            same = same.sort_values("time").tail(baseline_runs)
+            if len(same):
+                table.loc[i, "base_seconds"] = statistics.median(same["seconds"])
+                peaks = same["peak_mb"].dropna()
+                if len(peaks):
+                    table.loc[i, "base_peak_mb"] = statistics.median(peaks)
+
+    table["time_ratio"] = table["seconds"] / table["base_seconds"]
+    table["mem_ratio"] = table["peak_mb"].astype(float) / table["base_peak_mb"]
+    slower = table["time_ratio"] > 1 + threshold
+    hungrier = (table["mem_ratio"] > 1 + threshold) & (table["peak_mb"].astype(float) - table["base_peak_mb"] > min_mb)
+    table["budget"] = table["case"].map(BUDGETS).astype(float)
+    over_budget = table["seconds"] > table["budget"]
+    table["regression"] = slower | hungrier | over_budget
+    return table
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--cases", nargs="+", help="Case names or prefixes, e.g. indicators backtest")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative slowdown")
+    parser.add_argument("--history", default=DEFAULT_HISTORY)
+    parser.add_argument("--no-record", action="store_true", help="Compare without appending to the history")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc pass")
+    parser.add_argument("--list", action="store_true", help="List the cases and exit")
+    parser.add_argument("--record-fixture", action="store_true",
+                        help="Replace the fetch fixture with a live API response and exit")
+    args = parser.parse_args()
+
+    if args.list:
+        print("\n".join(CASES))
+        sys.exit(0)
+    if args.record_fixture:
+        record_fixture()
+        print(f"Saved {FIXTURE}")
+        sys.exit(0)
+
+    history = load_history(args.history)
+    results = run(select_cases(args.cases), args.sizes, memory=not args.no_memory)
+    table = compare(results, history, args.threshold)
+    if not args.no_record:
+        record(results, args.history)
+
+    columns = [
+        "case", "bars", "seconds", "base_seconds", "time_ratio", "budget", "peak_mb", "base_peak_mb", "mem_ratio",
+        "regression",
+    ]
+    print(table[columns].round(4).to_string(index=False))
+    regressions = table[table["regression"]]
+    if len(regressions):
+        print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%} or over budget:")
+        columns = ["case", "bars", "time_ratio", "mem_ratio", "seconds", "budget"]
+        print(regressions[columns].round(3).to_string(index=False))
+        sys.exit(1)
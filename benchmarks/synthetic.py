@@ -0,0 +1,46 @@
+"""Seeded synthetic XAU/USD-like OHLCV bars for benchmarks"""
+import math
+
+import pandas as pd
+import numpy as np
+
+def make_ohlcv(n, seed=0, freq="1min", start_price=2000.0, volatility=0.0005, with_volume=True,
+               weekends=True):
+    """
+    Geometric random-walk OHLCV frame with n bars
+
+    Args:
+        n: Number of bars
+        seed: RNG seed; the same seed always gives the same frame
+        freq: Bar spacing of the datetime index
+        start_price: First open
+        volatility: Per-bar log-return standard deviation
+        with_volume: Random volume, or 0.0 like metals/FX feeds
+        weekends: Keep Saturday/Sunday bars; False leaves weekend gaps in
+            the index like the spot gold feed
+
+    Returns:
+        DataFrame indexed by datetime with open/high/low/close/volume
+    """
+    rng = np.random.default_rng(seed)
+    close = start_price * np.exp(np.cumsum(rng.normal(0, volatility, n)))
+    open_ = np.empty(n)
+    open_[0] = start_price
+    open_[1:] = close[:-1]
+    wick = np.abs(rng.normal(0, volatility / 2, (2, n)))
+    high = np.maximum(open_, close) * (1 + wick[0])
+    low = np.minimum(open_, close) * (1 - wick[1])
+    volume = rng.integers(0, 1000, n).astype(float) if with_volume else np.zeros(n)
+
+    if weekends:
+        index = pd.date_range("2020-01-01", periods=n, freq=freq, name="datetime")
+    else:
+        # 5 of every 7 days trade, so 1.4x the bars plus two days of bars
+        # (for a weekend cut short at either end) leaves n weekday bars
+        padding = pd.Timedelta(days=2) // pd.Timedelta(freq)
+        span = pd.date_range("2020-01-01", periods=math.ceil(n * 1.4) + padding, freq=freq, name="datetime")
+        index = span[span.dayofweek < 5][:n]
+    return pd.DataFrame(
+        {"open": open_, "high": high, "low": low, "close": close, "volume": volume},
+        index=index
+    )
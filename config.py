@@ -9,8 +9,37 @@ if not TD_API_KEY:
         "TD_API_KEY not found. Please set it in Render Environment Variables."
     )
 
+# API credits per minute for the current plan (free plan: 8)
+TD_CREDITS_PER_MINUTE = int(os.getenv("TD_CREDITS_PER_MINUTE", "8"))
+
 SYMBOL = "XAU/USD"
 
+# Instruments fetched together in TwelveData batch requests, SYMBOL first.
+# Only SYMBOL by default: every extra symbol costs credits on each refresh.
+# Add silver, a DXY proxy or gold futures with e.g. TD_SYMBOLS="XAU/USD,XAG/USD,UUP"
+SYMBOLS = list(dict.fromkeys(
+    [SYMBOL] + [s.strip() for s in os.getenv("TD_SYMBOLS", SYMBOL).split(",") if s.strip()]
+))
+
+# Build bars from the TwelveData WebSocket price stream as well (needs the
+# websocket-client package), so the forming candle updates between refreshes
+STREAM_TICKS = os.getenv("TD_STREAM_TICKS", "0").lower() in ("1", "true", "yes")
+
+# Local OHLCV history; point this at a persistent disk to survive redeploys
+OHLCV_STORE_DIR = os.getenv(
+    "OHLCV_STORE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "store")
+)
+
+# Column dtype of the store files: float64, or float32 to halve long histories
+OHLCV_STORE_DTYPE = os.getenv("OHLCV_STORE_DTYPE", "float64")
+
+# Fitted models keyed by data fingerprint, interval, features and params
+MODEL_REGISTRY_DIR = os.getenv(
+    "MODEL_REGISTRY_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "models", "registry")
+)
+
 TIMEFRAMES = {
     "1m": "1min",
     "5m": "5min",
@@ -21,4 +50,8 @@ TIMEFRAMES = {
     "1D": "1day"
 }
 
+# Session alignment for bars resampled from 1-minute data, as offsets
+# from the epoch-aligned bucket start (e.g. {"1day": "-1h"} for a 23:00 open)
+SESSION_OFFSETS = {}
+
 ACCENT_COLOR = "#00FFD1"
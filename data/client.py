@@ -0,0 +1,127 @@
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from data.parse import loads
+
+TWELVEDATA_URL = "https://api.twelvedata.com"
+
+class TokenBucket:
+    """
+    Thread-safe token bucket for TwelveData API credits.
+
+    Holds up to `capacity` credits and refills them evenly over `period`
+    seconds, so bursts are allowed but the per-minute budget is never
+    exceeded. `spent` counts every credit handed out, so callers can
+    measure what a unit of work cost.
+    """
+
+    def __init__(self, capacity, period=60.0):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.spent = 0
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, tokens=1, timeout=None):
+        """Block until `tokens` credits are available; False if timeout expires first"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    self.spent += tokens
+                    return True
+                wait = (tokens - self.tokens) / self.rate
+
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+    def drain(self):
+        """Drop all credits, e.g. after the API reports the limit was hit"""
+        with self.lock:
+            self._refill()
+            self.tokens = 0.0
+
+class TwelveDataClient:
+    """
+    Pooled HTTP client for the TwelveData REST API.
+
+    Reuses keep-alive connections through one requests.Session, applies a
+    timeout to every call, retries transient connection/5xx failures, and
+    rations calls through a TokenBucket. When the API answers with a
+    credit-limit error (code 429) the bucket is drained and the call is
+    retried with exponential backoff.
+    """
+
+    def __init__(self, api_key, credits_per_minute=8, base_url=TWELVEDATA_URL,
+                 timeout=10, max_retries=3, backoff=2.0, pool_size=8):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.bucket = TokenBucket(credits_per_minute)
+
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=0.5,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=("GET",)
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get(self, endpoint, params, credits=1):
+        """
+        Call an endpoint and return the decoded JSON
+
+        Args:
+            endpoint: Path such as "time_series"
+            params: Query parameters (the API key is added here)
+            credits: API credits the call costs
+
+        Returns:
+            dict with the JSON response; transport failures are returned as
+            {"status": "error", "message": ...} like API errors
+        """
+        params = dict(params, apikey=self.api_key)
+        url = f"{self.base_url}/{endpoint}"
+
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire(credits)
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+                payload = loads(response.content)
+            except (requests.RequestException, ValueError) as e:
+                return {"status": "error", "message": f"Request failed: {e}"}
+
+            if not _is_rate_limited(response, payload) or attempt == self.max_retries:
+                return payload
+
+            self.bucket.drain()
+            time.sleep(self.backoff * (2 ** attempt))
+
+    def close(self):
+        self.session.close()
+
+def _is_rate_limited(response, payload):
+    if response.status_code == 429:
+        return True
+    return isinstance(payload, dict) and payload.get("status") == "error" and payload.get("code") == 429
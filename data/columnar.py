@@ -0,0 +1,82 @@
+import pandas as pd
+import numpy as np
+
+class OHLCVColumns:
+    """
+    Bars as plain column arrays: int64 epoch-nanosecond times plus one 1D
+    float32/float64 array per column.
+
+    Arrays are usually read-only np.memmap views of OHLCVStore files, so
+    nothing is read from disk until values are touched. Slicing by
+    position or date range returns views; series() and to_frame() wrap
+    the same buffers for features/indicators.py, the pipeline and the
+    backtester without copying.
+    """
+
+    def __init__(self, times, columns):
+        self.times = times
+        self.columns = dict(columns)
+
+    @classmethod
+    def from_frame(cls, df, columns=None, dtype=np.float64):
+        """Copy a DataFrame indexed by datetime into column arrays of `dtype`"""
+        times = df.index.values.astype("datetime64[ns]").astype(np.int64)
+        names = list(df.columns) if columns is None else columns
+        return cls(times, {name: df[name].to_numpy(dtype=dtype) for name in names})
+
+    def __len__(self):
+        return len(self.times)
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    @property
+    def names(self):
+        return list(self.columns)
+
+    @property
+    def nbytes(self):
+        return self.times.nbytes + sum(values.nbytes for values in self.columns.values())
+
+    @property
+    def index(self):
+        """The times as a DatetimeIndex sharing the int64 buffer"""
+        return pd.DatetimeIndex(self.times.view("datetime64[ns]"), name="datetime")
+
+    def iloc(self, key):
+        """Rows selected by a slice, as views"""
+        return OHLCVColumns(self.times[key], {name: values[key] for name, values in self.columns.items()})
+
+    def between(self, start=None, end=None):
+        """Rows with start <= time <= end (either bound optional), as views"""
+        lo = 0 if start is None else self.times.searchsorted(pd.Timestamp(start).value, side="left")
+        hi = len(self) if end is None else self.times.searchsorted(pd.Timestamp(end).value, side="right")
+        return self.iloc(slice(lo, hi))
+
+    def tail(self, n):
+        return self.iloc(slice(max(len(self) - n, 0), None))
+
+    def select(self, names):
+        """Only the given columns (same buffers)"""
+        return OHLCVColumns(self.times, {name: self.columns[name] for name in names})
+
+    def with_columns(self, **arrays):
+        """Same bars plus extra columns, e.g. indicator outputs"""
+        return OHLCVColumns(self.times, {**self.columns, **arrays})
+
+    def series(self, name):
+        """One column as a Series indexed by datetime, without a copy"""
+        return pd.Series(self.columns[name], index=self.index, name=name, copy=False)
+
+    def to_frame(self, names=None):
+        """
+        DataFrame over the same buffers (no copy)
+
+        Columns backed by a read-only memmap stay read-only; pandas
+        copy-on-write copies them only if a caller modifies the frame.
+        """
+        names = self.names if names is None else names
+        return pd.DataFrame({name: self.columns[name] for name in names}, index=self.index, copy=False)
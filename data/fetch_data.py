@@ -1,41 +1,369 @@
-import requests
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import pandas as pd
-from config import TD_API_KEY, SYMBOL
 
-def fetch_xauusd(interval="5min", outputsize=300):
-    url = "https://api.twelvedata.com/time_series"
+from config import (
+    TD_API_KEY, SYMBOL, SYMBOLS, OHLCV_STORE_DIR, OHLCV_STORE_DTYPE, TD_CREDITS_PER_MINUTE, SESSION_OFFSETS
+)
+from data.client import TwelveDataClient
+from data.parse import parse_time_series
+from data.resample import ResampleCache, BASE_INTERVAL, RESAMPLE_RULES
+from data.store import OHLCVStore
+from profiling import span, record_error
+
+_store = OHLCVStore(OHLCV_STORE_DIR, OHLCV_STORE_DTYPE)
+_client = TwelveDataClient(TD_API_KEY, credits_per_minute=TD_CREDITS_PER_MINUTE)
+_resampled = ResampleCache(SESSION_OFFSETS)
+
+# Largest window TwelveData returns per call; used to backfill the base series
+BASE_OUTPUTSIZE = 5000
+_base_lock = threading.Lock()
+# symbol -> monotonic time of the last successful 1-minute refresh
+_base_fetched_at = {}
+# Most end_date pages requested to close a gap after downtime
+MAX_GAP_PAGES = 20
+
+def _merge_response(store, symbol, interval, response, last_stored, outputsize):
+    """Append one symbol's time_series payload to the store; (DataFrame, error)"""
+    error = None
+    if "status" in response and response["status"] == "error":
+        error = response.get("message", "API error")
+    elif "values" not in response:
+        error = "No data returned (API limit or invalid request)"
+
+    if error:
+        # Stored bars are still usable when the delta request fails
+        if last_stored is None:
+            return None, error
+        return store.read(symbol, interval, last=outputsize), None
+    with span("fetch.store", symbol=symbol, interval=interval):
+        return store.append(symbol, interval, parse_time_series(response["values"]), last=outputsize), None
+
+def _fill_gap(client, params, payload, last_stored, max_pages=MAX_GAP_PAGES):
+    """
+    Page back with end_date until a delta payload reaches last_stored
+
+    TwelveData counts outputsize back from the newest bar, so after a
+    long outage a full delta can start after the last stored bar. Older
+    pages are requested until one overlaps it, and their values are added
+    to the payload so the whole gap is merged in one append. A failed
+    page is returned instead, which leaves the store as it was for the
+    next attempt.
+
+    Args:
+        client: TwelveDataClient
+        params: The single-symbol time_series params of the delta request
+        payload: Its response
+        last_stored: Timestamp of the newest stored bar, or None
+
+    Returns:
+        The payload with the values of every page, or the failed page
+    """
+    if last_stored is None or "values" not in payload:
+        return payload
+    values = list(payload["values"])
+    page, received = values, len(values)
+    for pages in range(max_pages + 1):
+        # A page shorter than outputsize already reaches back to start_date
+        if not page or received < min(params["outputsize"], BASE_OUTPUTSIZE):
+            break
+        oldest = min(value["datetime"] for value in page)
+        if pd.Timestamp(oldest) <= last_stored:
+            break
+        if pages == max_pages:
+            # Keep what was fetched; the bars in between stay missing
+            record_error("fetch.gap", RuntimeError(
+                f"{params['symbol']} {params['interval']}: gap after {last_stored} not closed in {max_pages} pages"
+            ))
+            break
+        with span("fetch.gap", symbol=params["symbol"], interval=params["interval"]):
+            response = client.get("time_series", {**params, "end_date": oldest})
+        if "values" not in response:
+            return response
+        received = len(response["values"])
+        page = [value for value in response["values"] if value["datetime"] < oldest]
+        values.extend(page)
+    return {**payload, "values": values}
+
+def fetch_xauusd(interval="5min", outputsize=300, store=None, client=None, symbol=SYMBOL):
+    """
+    Fetch bars through the local OHLCV store
+
+    Reads the stored history first and only asks TwelveData for bars from
+    the last stored timestamp onwards (that bar is refetched because it
+    may still have been forming). If more bars than outputsize arrived
+    since, older pages are fetched until the gap is closed. New bars are
+    appended to the store, so history beyond the API window builds up
+    over time.
+
+    Args:
+        interval: TwelveData interval, e.g. "5min"
+        outputsize: Number of most recent bars to return
+        store: OHLCVStore to use (defaults to the one in OHLCV_STORE_DIR)
+        client: TwelveDataClient to use (defaults to the shared pooled client)
+        symbol: Instrument to fetch (default config.SYMBOL)
+
+    Returns:
+        (DataFrame, None) on success, (None, error message) on failure
+    """
+    store = store or _store
+    client = client or _client
+    last_stored = store.last_timestamp(symbol, interval)
 
     params = {
-        "symbol": SYMBOL,
+        "symbol": symbol,
         "interval": interval,
-        "apikey": TD_API_KEY,
         "outputsize": outputsize,
         "format": "JSON"
     }
+    if last_stored is not None:
+        params["start_date"] = last_stored.strftime("%Y-%m-%d %H:%M:%S")
 
-    response = requests.get(url, params=params).json()
+    with span("fetch.request", symbol=symbol, interval=interval):
+        response = client.get("time_series", params)
+    response = _fill_gap(client, params, response, last_stored)
+    return _merge_response(store, symbol, interval, response, last_stored, outputsize)
 
-    if "status" in response and response["status"] == "error":
-        return None, response.get("message", "API error")
+def _batch_payload(response, symbol, batched):
+    """One symbol's payload from a (possibly batched) time_series response"""
+    if not batched:
+        return response
+    if symbol in response:
+        return response[symbol]
+    if response.get("status") == "error":
+        return response
+    return {"status": "error", "message": f"No data returned for {symbol}"}
+
+def fetch_symbols(symbols=None, interval="5min", outputsize=300, store=None, client=None):
+    """
+    Fetch several symbols with TwelveData batch requests
+
+    Symbols are sent comma-separated in one time_series call (each still
+    costs a credit), in batches no larger than the client's per-minute
+    budget. Symbols that already have stored history share one delta
+    request from the oldest of their last stored bars (a gap is then
+    paged per symbol); the others get a full window. Every symbol is
+    merged into the store like fetch_xauusd.
+
+    Args:
+        symbols: Instruments to fetch (default config.SYMBOLS)
+        interval: TwelveData interval, e.g. "5min"
+        outputsize: Number of most recent bars to return per symbol
+        store: OHLCVStore to use
+        client: TwelveDataClient to use
+
+    Returns:
+        dict mapping symbol -> (DataFrame, error) as from fetch_xauusd
+    """
+    store = store or _store
+    client = client or _client
+    symbols = list(dict.fromkeys(symbols or SYMBOLS))
+    last_stored = {symbol: store.last_timestamp(symbol, interval) for symbol in symbols}
+
+    groups = [
+        [symbol for symbol in symbols if last_stored[symbol] is not None],
+        [symbol for symbol in symbols if last_stored[symbol] is None],
+    ]
+    batch_size = max(1, int(client.bucket.capacity))
+
+    results = {}
+    for group in groups:
+        for i in range(0, len(group), batch_size):
+            batch = group[i:i + batch_size]
+            params = {
+                "symbol": ",".join(batch),
+                "interval": interval,
+                "outputsize": outputsize,
+                "format": "JSON"
+            }
+            starts = [last_stored[symbol] for symbol in batch if last_stored[symbol] is not None]
+            if starts:
+                params["start_date"] = min(starts).strftime("%Y-%m-%d %H:%M:%S")
+
+            with span("fetch.request", symbol=params["symbol"], interval=interval):
+                response = client.get("time_series", params, credits=len(batch))
+            for symbol in batch:
+                payload = _batch_payload(response, symbol, len(batch) > 1)
+                if last_stored[symbol] is not None:
+                    single = {**params, "symbol": symbol,
+                              "start_date": last_stored[symbol].strftime("%Y-%m-%d %H:%M:%S")}
+                    payload = _fill_gap(client, single, payload, last_stored[symbol])
+                results[symbol] = _merge_response(
+                    store, symbol, interval, payload, last_stored[symbol], outputsize
+                )
 
-    if "values" not in response:
-        return None, "No data returned (API limit or invalid request)"
+    return {symbol: results[symbol] for symbol in symbols}
 
-    df = pd.DataFrame(response["values"])
+def fetch_timeframes(intervals, outputsize=300, max_workers=4, store=None, client=None):
+    """
+    Fetch several intervals concurrently
 
-    df["datetime"] = pd.to_datetime(df["datetime"])
-    df.set_index("datetime", inplace=True)
+    All requests share the pooled client, so they reuse keep-alive
+    connections and draw from the same per-minute credit budget.
 
-    # ✅ Convert price columns
-    for col in ["open", "high", "low", "close"]:
-        df[col] = df[col].astype(float)
+    Args:
+        intervals: Iterable of TwelveData intervals, e.g. config.TIMEFRAMES.values()
+        outputsize: Number of most recent bars to return per interval
+        max_workers: Number of requests in flight at once
 
-    # ✅ SAFE volume handling (CRITICAL FIX)
-    if "volume" in df.columns:
-        df["volume"] = df["volume"].astype(float)
+    Returns:
+        dict mapping interval -> (DataFrame, error) as from fetch_xauusd
+    """
+    intervals = list(dict.fromkeys(intervals))
+    if not intervals:
+        return {}
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(intervals))) as pool:
+        futures = {
+            interval: pool.submit(fetch_xauusd, interval, outputsize, store, client)
+            for interval in intervals
+        }
+        return {interval: future.result() for interval, future in futures.items()}
+
+def _refresh_bases(symbols, max_age):
+    """
+    Bring the 1-minute base of each symbol up to date, at most every
+    max_age seconds, in batched requests
+
+    Returns:
+        dict of symbol -> error for symbols whose refresh failed
+    """
+    errors = {}
+    with _base_lock:
+        now = time.monotonic()
+        stale = [s for s in symbols if now - _base_fetched_at.get(s, -math.inf) >= max_age]
+        if stale:
+            for symbol, (_, error) in fetch_symbols(stale, BASE_INTERVAL, BASE_OUTPUTSIZE).items():
+                if error:
+                    errors[symbol] = error
+                else:
+                    _base_fetched_at[symbol] = time.monotonic()
+    return errors
+
+def _combined_bars(symbol, interval, last=None):
+    """
+    Stored bars of an interval in RESAMPLE_RULES
+
+    Bars are resampled from the 1-minute base (only the base bars the
+    resample cache has not seen are read); bars from before the base
+    starts come from the interval's own stored series, which a direct
+    fetch leaves behind.
+
+    Returns:
+        DataFrame (treat as read-only), or None if nothing is stored
+    """
+    if interval == BASE_INTERVAL:
+        return _store.read(symbol, interval, last=last)
+
+    resampled = None
+    first = _store.first_timestamp(symbol, BASE_INTERVAL)
+    if first is not None:
+        base = _store.read(symbol, BASE_INTERVAL, start=_resampled.since(symbol, interval, first))
+        resampled = _resampled.get(base, interval, symbol, base_start=first)
+        if len(resampled) == 0:
+            resampled = None
+    if resampled is not None and last and len(resampled) >= last:
+        return resampled.tail(last)
+
+    end = resampled.index[0] if resampled is not None else None
+    direct = _store.read(symbol, interval, end=end, last=last)
+    if direct is None or len(direct) == 0:
+        return resampled
+    if resampled is None:
+        return direct
+    # The direct bar at the boundary is complete; the resampled one may not be
+    df = pd.concat([direct, resampled[resampled.index > direct.index[-1]]])
+    return df.tail(last) if last else df
+
+def _resampled_bars(symbol, interval, outputsize):
+    """Last outputsize stored bars of interval, or None while fewer are stored"""
+    df = _combined_bars(symbol, interval, outputsize)
+    return df if df is not None and len(df) >= outputsize else None
+
+def stored_bars(interval="5min", symbol=SYMBOL, bars=None):
+    """
+    Bars already in the local store, without an API call
+
+    Intervals built from the 1-minute base are resampled from it (through
+    the shared resample cache), preceded by the interval's own stored
+    bars from before the base starts.
+
+    Args:
+        interval: TwelveData interval
+        symbol: Instrument (default config.SYMBOL)
+        bars: Keep only the most recent `bars` bars (default all)
+
+    Returns:
+        DataFrame (treat as read-only), or None if nothing is stored
+    """
+    if interval in RESAMPLE_RULES:
+        df = _combined_bars(symbol, interval, bars)
     else:
-        df["volume"] = 0.0   # metals/FX often have no volume
+        df = _store.read(symbol, interval, last=bars)
+    return df if df is not None and len(df) else None
+
+def fetch_timeframe(interval="5min", outputsize=300, max_age=30, symbol=SYMBOL):
+    """
+    Bars for any supported interval, derived from the 1-minute base series
+
+    One delta request keeps the 1-minute store current (paging back over
+    any gap after downtime); higher intervals are resampled from it and
+    cached, so switching timeframe costs no API call. While the 1-minute
+    history and the interval's own stored bars together are still too
+    short to cover `outputsize` bars of `interval`, the interval is
+    fetched directly; that series then fills in the older bars.
+
+    Args:
+        interval: TwelveData interval, e.g. "15min"
+        outputsize: Number of most recent bars to return
+        max_age: Seconds before the 1-minute base is refreshed again
+        symbol: Instrument (default config.SYMBOL)
+
+    Returns:
+        (DataFrame, None) on success, (None, error message) on failure
+    """
+    if interval not in RESAMPLE_RULES:
+        return fetch_xauusd(interval, outputsize, symbol=symbol)
 
-    df = df.sort_index()
+    error = _refresh_bases([symbol], max_age).get(symbol)
+    if error:
+        return None, error
 
+    df = _resampled_bars(symbol, interval, outputsize)
+    if df is None:
+        return fetch_xauusd(interval, outputsize, symbol=symbol)
     return df, None
+
+def fetch_panel(interval="5min", symbols=None, outputsize=300, max_age=30):
+    """
+    fetch_timeframe for several symbols, with batched API requests
+
+    The 1-minute bases of all stale symbols are refreshed in one batch
+    request, and symbols whose stored bars are still too short are
+    fetched at `interval` in another.
+
+    Returns:
+        dict mapping symbol -> (DataFrame, error)
+    """
+    symbols = list(dict.fromkeys(symbols or SYMBOLS))
+    if interval not in RESAMPLE_RULES:
+        return fetch_symbols(symbols, interval, outputsize)
+
+    errors = _refresh_bases(symbols, max_age)
+    results = {symbol: (None, error) for symbol, error in errors.items()}
+    direct = []
+    for symbol in symbols:
+        if symbol in results:
+            continue
+        df = _resampled_bars(symbol, interval, outputsize)
+        if df is None:
+            direct.append(symbol)
+        else:
+            results[symbol] = (df, None)
+    if direct:
+        results.update(fetch_symbols(direct, interval, outputsize))
+
+    return {symbol: results[symbol] for symbol in symbols}
@@ -0,0 +1,72 @@
+import json
+from operator import itemgetter
+
+import pandas as pd
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # optional faster decoder
+    orjson = None
+
+from data.store import OHLCV_COLUMNS
+
+def loads(raw):
+    """Decode a JSON body, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+def parse_time_series_arrays(values, dtype=np.float64, newest_first=True):
+    """
+    Parse TwelveData time_series values straight into numpy arrays
+
+    Each column is read once from the list of dicts and written into a
+    preallocated array, oldest bar first. With newest_first (the API
+    default order) the rows are written back to front, so no sort is
+    needed; the order is still verified and only sorted if it is wrong.
+
+    Args:
+        values: The "values" list from a time_series response
+        dtype: Price dtype, np.float64 or np.float32
+        newest_first: Whether values are ordered newest to oldest
+
+    Returns:
+        (times, prices): int64 epoch-ns array and an (n, 5) array in
+        OHLCV_COLUMNS order; volume is 0.0 when the instrument has none
+    """
+    n = len(values)
+    columns = OHLCV_COLUMNS if n and "volume" in values[0] else OHLCV_COLUMNS[:4]
+
+    times = np.empty(n, dtype=np.int64)
+    prices = np.zeros((n, len(OHLCV_COLUMNS)), dtype=dtype)
+    step = -1 if newest_first else 1
+
+    times[::step] = (
+        np.array(list(map(itemgetter("datetime"), values)), dtype="datetime64[s]")
+        .astype("datetime64[ns]")
+        .view(np.int64)
+    )
+    for j, col in enumerate(columns):
+        prices[::step, j] = list(map(itemgetter(col), values))
+
+    if n > 1 and not (np.diff(times) > 0).all():
+        order = np.argsort(times, kind="stable")
+        times, prices = times[order], prices[order]
+
+    return times, prices
+
+def parse_time_series(values, dtype=np.float64, newest_first=True):
+    """
+    Parse TwelveData time_series values into an OHLCV DataFrame
+
+    Same result as building a DataFrame from the dicts and casting each
+    column, without the intermediate object columns. The frame wraps the
+    parsed price block without copying it.
+
+    Returns:
+        DataFrame indexed by datetime with open/high/low/close/volume
+    """
+    times, prices = parse_time_series_arrays(values, dtype, newest_first)
+    index = pd.DatetimeIndex(times.view("datetime64[ns]"), name="datetime")
+    return pd.DataFrame(prices, index=index, columns=OHLCV_COLUMNS, copy=False)
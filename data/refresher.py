@@ -0,0 +1,217 @@
+import threading
+import time
+from collections import deque
+
+import pandas as pd
+import numpy as np
+
+from config import TIMEFRAMES, SYMBOL, TD_CREDITS_PER_MINUTE, SESSION_OFFSETS
+from data.fetch_data import fetch_panel, _client
+from data.resample import bar_duration, next_bar_close
+
+class _FeedStats:
+    """Fetch latency and error counts of one interval"""
+
+    def __init__(self, history=100):
+        self.latencies = deque(maxlen=history)
+        self.fetches = 0
+        self.errors = 0
+        self.last_error = None
+        self.last_success = None
+
+    def record(self, seconds, error):
+        self.fetches += 1
+        self.latencies.append(seconds)
+        if error:
+            self.errors += 1
+            self.last_error = error
+        else:
+            self.last_success = time.time()
+
+    def summary(self):
+        ms = np.array(self.latencies) * 1000
+        return {
+            "fetches": self.fetches,
+            "errors": self.errors,
+            "last_ms": float(ms[-1]) if len(ms) else None,
+            "mean_ms": float(ms.mean()) if len(ms) else None,
+            "p95_ms": float(np.percentile(ms, 95)) if len(ms) else None,
+            "last_error": self.last_error,
+            "last_success": self.last_success,
+        }
+
+class BackgroundRefresher:
+    """
+    Keeps every configured timeframe warm from a background thread.
+
+    Each interval is refreshed shortly after its bar closes; one batched
+    1-minute request per cycle covers all symbols and the intervals
+    resampled from it, plus a direct request per symbol for intervals
+    whose 1-minute history is still too short. The credits a cycle
+    actually drew from the client's token bucket set the pause before
+    the next one, so refreshes average at most `budget_share` of the
+    per-minute API credits, leaving the rest for direct requests (credits
+    other callers draw during a cycle are counted too, erring on the
+    safe side). Readers get the last snapshot at once (stale while
+    revalidate) together with its age, and a snapshot older than its bar
+    plus `grace` asks the thread to refresh early.
+    """
+
+    def __init__(self, intervals=None, symbols=None, outputsize=300, grace=5.0,
+                 credits_per_minute=TD_CREDITS_PER_MINUTE, budget_share=0.5,
+                 fetch=fetch_panel, offsets=None, bucket=None):
+        self.intervals = list(intervals or TIMEFRAMES.values())
+        self.symbols = list(symbols or [SYMBOL])
+        self.outputsize = outputsize
+        self.grace = grace
+        self.fetch = fetch
+        self.offsets = SESSION_OFFSETS if offsets is None else offsets
+        self.credits_per_minute = credits_per_minute
+        self.budget_share = budget_share
+        # Token bucket fetch draws from (the shared client's by default)
+        self.bucket = _client.bucket if bucket is None else bucket
+        # Credits the last refresh drew, and when the budget allows the next
+        self.last_credits = 0
+        self.budget_ready = -np.inf
+
+        # (symbol, interval) -> {"df", "error", "fetched_at"}
+        self.snapshots = {}
+        self.stats = {interval: _FeedStats() for interval in self.intervals}
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.requested = set()
+        self.stopped = threading.Event()
+        self.ready = threading.Event()
+        self.thread = None
+
+    @property
+    def seconds_per_credit(self):
+        """Pause a spent credit buys so refreshes stay within the budget"""
+        return 60.0 / max(self.credits_per_minute * self.budget_share, 1e-9)
+
+    def budget_wait(self):
+        """Seconds until the credits of earlier refreshes are paid off"""
+        return self.budget_ready - time.monotonic()
+
+    def _now(self):
+        return pd.Timestamp.now(tz="UTC").tz_localize(None)
+
+    def start(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.stopped.clear()
+            self.thread = threading.Thread(target=self._run, name="ohlcv-refresher", daemon=True)
+            self.thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self.stopped.set()
+        self.wake.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def refresh(self, intervals=None):
+        """Fetch the given intervals (default all) for every symbol now"""
+        cycle_start = time.monotonic()
+        spent = self.bucket.spent
+        # get() may track new intervals and symbols from other threads
+        with self.lock:
+            symbols = list(self.symbols)
+            intervals = list(intervals or self.intervals)
+        for interval in intervals:
+            start = time.perf_counter()
+            # A 1-minute base refreshed earlier in this cycle counts as fresh
+            max_age = time.monotonic() - cycle_start + self.grace
+            try:
+                results = self.fetch(interval, symbols, self.outputsize, max_age=max_age)
+            except Exception as e:
+                results = {symbol: (None, str(e)) for symbol in symbols}
+            seconds = time.perf_counter() - start
+
+            errors = [error for _, error in results.values() if error]
+            with self.lock:
+                self.stats[interval].record(seconds, "; ".join(errors) if errors else None)
+                for symbol, (df, error) in results.items():
+                    previous = self.snapshots.get((symbol, interval))
+                    if error and previous is not None and previous["df"] is not None:
+                        # Keep serving the last good bars, but report the failure
+                        self.snapshots[(symbol, interval)] = dict(previous, error=error)
+                    else:
+                        self.snapshots[(symbol, interval)] = {
+                            "df": df, "error": error, "fetched_at": time.time(),
+                        }
+        self.last_credits = self.bucket.spent - spent
+        self.budget_ready = max(self.budget_ready, cycle_start) + self.last_credits * self.seconds_per_credit
+
+    def _next_cycle(self):
+        """(seconds to wait, intervals due then)"""
+        now = self._now()
+        with self.lock:
+            intervals = list(self.intervals)
+        closes = {interval: next_bar_close(interval, now, self.offsets) for interval in intervals}
+        first = min(closes.values())
+        due = [interval for interval, close in closes.items() if close == first]
+        wait = (first - now).total_seconds() + self.grace
+        # Stay within the credit budget
+        wait = max(wait, self.budget_wait())
+        return wait, due
+
+    def _run(self):
+        try:
+            self.refresh()
+        finally:
+            self.ready.set()
+        while not self.stopped.is_set():
+            wait, due = self._next_cycle()
+            if self.wake.wait(max(wait, 0)):
+                self.wake.clear()
+                with self.lock:
+                    requested, self.requested = self.requested, set()
+                if self.stopped.is_set():
+                    break
+                # Early refresh requests still respect the credit budget
+                gap = self.budget_wait()
+                if gap > 0 and self.stopped.wait(gap):
+                    break
+                due = sorted(requested) or due
+            self.refresh(due)
+
+    def get(self, interval, symbol=SYMBOL):
+        """
+        Latest snapshot of an interval without waiting on the network
+
+        Waits for the initial warm-up if it is still running; only an
+        interval or symbol the refresher does not track yet is fetched
+        synchronously (and tracked from then on).
+
+        Returns:
+            (DataFrame or None, error or None, age in seconds)
+        """
+        if self.thread is not None and (symbol, interval) not in self.snapshots:
+            self.ready.wait(timeout=60)
+        with self.lock:
+            snapshot = self.snapshots.get((symbol, interval))
+        if snapshot is None:
+            with self.lock:
+                if interval not in self.stats:
+                    self.intervals.append(interval)
+                    self.stats[interval] = _FeedStats()
+                if symbol not in self.symbols:
+                    self.symbols.append(symbol)
+            self.refresh([interval])
+            with self.lock:
+                snapshot = self.snapshots[(symbol, interval)]
+
+        age = time.time() - snapshot["fetched_at"]
+        if age > bar_duration(interval).total_seconds() + self.grace:
+            with self.lock:
+                self.requested.add(interval)
+            self.wake.set()
+        return snapshot["df"], snapshot["error"], age
+
+    def metrics(self):
+        """Per-interval fetch latency and error counts as a DataFrame"""
+        with self.lock:
+            summaries = {interval: stats.summary() for interval, stats in self.stats.items()}
+        table = pd.DataFrame(summaries).T
+        table.index.name = "interval"
+        return table
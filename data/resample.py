@@ -0,0 +1,147 @@
+import threading
+
+import pandas as pd
+
+# TwelveData interval -> pandas resample rule (fixed "24h" rather than
+# calendar "1D" so the epoch origin and session offset apply to daily bars)
+RESAMPLE_RULES = {
+    "1min": "1min",
+    "5min": "5min",
+    "15min": "15min",
+    "30min": "30min",
+    "1h": "1h",
+    "4h": "4h",
+    "1day": "24h",
+}
+
+BASE_INTERVAL = "1min"
+
+OHLCV_AGG = {
+    "open": "first",
+    "high": "max",
+    "low": "min",
+    "close": "last",
+    "volume": "sum",
+}
+
+def bucket_start(timestamp, interval, offset=None):
+    """Start of the bucket of `interval` that contains `timestamp`"""
+    rule = RESAMPLE_RULES[interval]
+    offset = pd.Timedelta(offset or 0)
+    return (pd.Timestamp(timestamp) - offset).floor(rule) + offset
+
+def bar_duration(interval):
+    """Length of one bar of a TwelveData interval"""
+    return pd.Timedelta(RESAMPLE_RULES.get(interval, interval))
+
+def next_bar_close(interval, now, offsets=None):
+    """Time the bar of `interval` that is forming at `now` closes"""
+    offset = (offsets or {}).get(interval)
+    return bucket_start(now, interval, offset) + bar_duration(interval)
+
+def resample_ohlcv(df, interval, offset=None):
+    """
+    Aggregate OHLCV bars into a coarser interval
+
+    Buckets are left-closed and labelled by their start, aligned to the
+    epoch plus `offset` (use the offset to match a session that does not
+    start on the hour or at midnight). Empty buckets (weekends, gaps) are
+    dropped.
+
+    Args:
+        df: DataFrame with a datetime index and OHLCV columns
+        interval: Target TwelveData interval, e.g. "15min" or "4h"
+        offset: Session offset, e.g. "30min"
+
+    Returns:
+        Resampled DataFrame with the same columns
+    """
+    if interval == BASE_INTERVAL or len(df) == 0:
+        return df.copy()
+
+    out = df.resample(
+        RESAMPLE_RULES[interval],
+        label="left",
+        closed="left",
+        origin="epoch",
+        offset=pd.Timedelta(offset or 0),
+    ).agg(OHLCV_AGG)
+    return out.dropna(subset=["open"])
+
+class ResampleCache:
+    """
+    Per-symbol, per-interval cache of bars built from 1-minute base series.
+
+    When new base bars arrive only the buckets from the one holding the
+    previous last base bar onwards are rebuilt; everything before it is
+    reused as-is. Callers reading the base from disk can ask since() for
+    the first base bar that rebuild needs and pass only the bars from
+    there on.
+    """
+
+    def __init__(self, offsets=None):
+        self.offsets = offsets or {}
+        self.frames = {}
+        self.lock = threading.Lock()
+
+    def since(self, symbol, interval, base_start):
+        """
+        First base bar get() needs for an update, or None if it needs all of them
+
+        Args:
+            symbol: Instrument
+            interval: Target interval
+            base_start: Timestamp of the first bar of the full base series
+        """
+        with self.lock:
+            cached = self.frames.get((symbol, interval))
+        if interval == BASE_INTERVAL or cached is None or cached["base_start"] != base_start:
+            return None
+        return bucket_start(cached["base_end"], interval, self.offsets.get(interval))
+
+    def get(self, base, interval, symbol=None, base_start=None):
+        """
+        Bars for `interval` built from `base` (1-minute bars of `symbol`, sorted)
+
+        Args:
+            base: The base series, or its bars from since() on
+            interval: Target interval
+            symbol: Instrument
+            base_start: First timestamp of the full base when `base` is
+                only its tail (default base.index[0])
+        """
+        if interval == BASE_INTERVAL or len(base) == 0:
+            return base
+
+        offset = self.offsets.get(interval)
+        base_start = base.index[0] if base_start is None else base_start
+        base_tail = tuple(base.iloc[-1])
+        with self.lock:
+            cached = self.frames.get((symbol, interval))
+
+        if cached is None or cached["base_start"] != base_start:
+            frame = self._full(base, interval, offset)
+        elif cached["base_end"] == base.index[-1] and cached["base_tail"] == base_tail:
+            return cached["frame"]
+        else:
+            # The previous last bar may have been revised, so rebuild from its bucket
+            refresh_from = bucket_start(cached["base_end"], interval, offset)
+            kept = cached["frame"][cached["frame"].index < refresh_from]
+            pos = base.index.searchsorted(refresh_from)
+            frame = pd.concat([kept, resample_ohlcv(base.iloc[pos:], interval, offset)])
+
+        with self.lock:
+            self.frames[(symbol, interval)] = {
+                "frame": frame,
+                "base_start": base_start,
+                "base_end": base.index[-1],
+                "base_tail": base_tail,
+            }
+        return frame
+
+    def _full(self, base, interval, offset):
+        frame = resample_ohlcv(base, interval, offset)
+        # Drop a leading bucket the base series only covers partially
+        if len(frame) and bucket_start(base.index[0], interval, offset) != base.index[0]:
+            frame = frame.iloc[1:]
+        return frame
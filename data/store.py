@@ -0,0 +1,334 @@
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+
+import pandas as pd
+import numpy as np
+
+from data.columnar import OHLCVColumns
+
+OHLCV_COLUMNS = ["open", "high", "low", "close", "volume"]
+
+# Segment directories: "sN", or "vN" from the earlier one-directory-per-version format
+_SEGMENT_NAME = re.compile(r"[sv]\d+$")
+
+class OHLCVStore:
+    """
+    On-disk columnar OHLCV store, one directory per symbol and interval.
+
+    A series is a list of segments in time order. Each segment is a
+    directory of .npy files: an int64 epoch-nanosecond "time" array plus
+    one array per OHLCV column in the store's dtype (float64 by default;
+    float32 halves the size). Files are memory-mapped on read, so only
+    the columns, segments and date range a caller touches are paged in.
+
+    Segments are never modified. An append rewrites only the segment the
+    new bars overlap (at most segment_rows rows) plus the new rows, then
+    swaps the MANIFEST that lists the segments atomically, so readers
+    never see a half-written series. Replaced segments are deleted
+    keep_seconds after they were retired, which leaves readers that
+    resolved the previous MANIFEST time to open them. Series in the
+    earlier one-directory-per-version and single-file .npz formats are
+    still read and are converted on their next append.
+    """
+
+    def __init__(self, root, dtype=np.float64, segment_rows=65_536, keep_seconds=60.0):
+        self.root = root
+        self.dtype = np.dtype(dtype)
+        self.segment_rows = segment_rows
+        self.keep_seconds = keep_seconds
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def path(self, symbol, interval):
+        safe_symbol = symbol.replace("/", "_").replace(":", "_")
+        return os.path.join(self.root, safe_symbol, interval)
+
+    def _legacy_path(self, symbol, interval):
+        return self.path(symbol, interval) + ".npz"
+
+    def _lock(self, symbol, interval):
+        key = (symbol, interval)
+        with self._locks_guard:
+            if key not in self._locks:
+                self._locks[key] = threading.Lock()
+            return self._locks[key]
+
+    def _manifest(self, symbol, interval):
+        """
+        Segment list of a series, or None if it has none yet
+
+        Returns:
+            dict with segments (list of dicts with name, rows, first and
+            last epoch-nanosecond time), next (number of the next segment)
+            and retired (dict of replaced segment name -> time retired)
+        """
+        directory = self.path(symbol, interval)
+        try:
+            with open(os.path.join(directory, "MANIFEST")) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            pass
+
+        # Earlier format: a CURRENT pointer to one full version directory
+        try:
+            with open(os.path.join(directory, "CURRENT")) as f:
+                version = int(f.read().strip())
+        except FileNotFoundError:
+            return None
+        times = np.load(os.path.join(directory, f"v{version}", "time.npy"), mmap_mode="r")
+        return {"segments": [_describe(f"v{version}", times)], "next": version + 1, "retired": {}}
+
+    def _load(self, directory, name, columns):
+        segment = os.path.join(directory, name)
+        times = np.load(os.path.join(segment, "time.npy"), mmap_mode="r")
+        arrays = {col: np.load(os.path.join(segment, f"{col}.npy"), mmap_mode="r") for col in columns}
+        return OHLCVColumns(times, arrays)
+
+    def open(self, symbol, interval, columns=None, start=None, end=None, last=None):
+        """
+        Stored bars as memory-mapped column arrays, loaded lazily
+
+        Only the segments that hold the requested rows are opened. Rows
+        from a single segment are views of its files; rows spanning
+        several segments are copied into one array per column.
+
+        Args:
+            symbol: Instrument, e.g. "XAU/USD"
+            interval: TwelveData interval, e.g. "1min"
+            columns: Columns to map (default all OHLCV columns)
+            start: First timestamp to include
+            end: Last timestamp to include
+            last: Keep only the most recent `last` bars of that range
+
+        Returns:
+            OHLCVColumns of read-only arrays, or None if nothing is stored
+        """
+        columns = OHLCV_COLUMNS if columns is None else list(columns)
+        # Retired segments outlive their MANIFEST by keep_seconds; a reader
+        # slower than that retries with the new one
+        for _ in range(3):
+            manifest = self._manifest(symbol, interval)
+            if manifest is None:
+                bars = self._open_legacy(symbol, interval, columns, start, end)
+                return bars.tail(last) if bars is not None and last is not None else bars
+            try:
+                return self._open_segments(symbol, interval, manifest["segments"], columns, start, end, last)
+            except FileNotFoundError:
+                continue
+        raise FileNotFoundError(f"{symbol} {interval} kept changing while being opened")
+
+    def _open_segments(self, symbol, interval, segments, columns, start, end, last):
+        directory = self.path(symbol, interval)
+        lo = None if start is None else pd.Timestamp(start).value
+        hi = None if end is None else pd.Timestamp(end).value
+
+        parts, rows = [], 0
+        for segment in reversed(segments):
+            if hi is not None and segment["first"] > hi:
+                continue
+            if lo is not None and segment["last"] < lo:
+                break
+            part = self._load(directory, segment["name"], columns).between(start, end)
+            parts.append(part)
+            rows += len(part)
+            if last is not None and rows >= last:
+                break
+        parts.reverse()
+
+        if last is not None and rows > last:
+            parts[0] = parts[0].iloc(slice(rows - last, None))
+        return _join(parts, columns, self.dtype)
+
+    def _open_legacy(self, symbol, interval, columns, start, end):
+        path = self._legacy_path(symbol, interval)
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            bars = OHLCVColumns(data["time"], {col: data[col] for col in columns})
+        return bars.between(start, end)
+
+    def read(self, symbol, interval, columns=None, start=None, end=None, last=None):
+        """
+        Stored bars as a DataFrame indexed by datetime, or None if nothing is stored
+
+        Rows from a single segment wrap the memory-mapped arrays without
+        copying; treat the frame as read-only. See open() for the
+        arguments.
+        """
+        bars = self.open(symbol, interval, columns, start, end, last)
+        return bars.to_frame() if bars is not None else None
+
+    def last_timestamp(self, symbol, interval):
+        """Timestamp of the newest stored bar, or None"""
+        manifest = self._manifest(symbol, interval)
+        if manifest is not None:
+            segments = manifest["segments"]
+            return pd.Timestamp(segments[-1]["last"]) if segments else None
+        bars = self._open_legacy(symbol, interval, [], None, None)
+        if bars is None or len(bars) == 0:
+            return None
+        return pd.Timestamp(int(bars.times[-1]))
+
+    def first_timestamp(self, symbol, interval):
+        """Timestamp of the oldest stored bar, or None"""
+        manifest = self._manifest(symbol, interval)
+        if manifest is not None:
+            segments = manifest["segments"]
+            return pd.Timestamp(segments[0]["first"]) if segments else None
+        bars = self._open_legacy(symbol, interval, [], None, None)
+        if bars is None or len(bars) == 0:
+            return None
+        return pd.Timestamp(int(bars.times[0]))
+
+    def append(self, symbol, interval, df, last=None):
+        """
+        Merge new bars into the store
+
+        Bars with a timestamp already on disk replace the stored row, so
+        the still-forming last candle is refreshed on the next fetch.
+        Only the segments the new bars overlap (or the last segment,
+        while it has fewer than segment_rows rows) are rewritten; all
+        other segments stay as they are. Nothing is written when df is
+        empty or matches the stored bars it overlaps.
+
+        Args:
+            symbol: Instrument, e.g. "XAU/USD"
+            interval: TwelveData interval, e.g. "5min"
+            df: DataFrame with a datetime index and OHLCV columns
+            last: Return only the most recent `last` bars (default all)
+
+        Returns:
+            The merged DataFrame (read-only), as from read()
+        """
+        with self._lock(symbol, interval):
+            new = df[OHLCV_COLUMNS].astype(float)
+            new = new[~new.index.duplicated(keep="last")].sort_index()
+            if len(new) == 0:
+                return self.read(symbol, interval, last=last)
+
+            directory = self.path(symbol, interval)
+            os.makedirs(directory, exist_ok=True)
+            manifest = self._manifest(symbol, interval) or self._convert_legacy(symbol, interval)
+            segments = manifest["segments"]
+
+            # Segments [k, j) overlap the new bars; past the end, the last
+            # segment is extended while it has room
+            first_new, last_new = new.index[0].value, new.index[-1].value
+            k = next((i for i, segment in enumerate(segments) if segment["last"] >= first_new), len(segments))
+            j = sum(segment["first"] <= last_new for segment in segments)
+            if k == len(segments) and segments and segments[-1]["rows"] < self.segment_rows:
+                k -= 1
+
+            stored = _join(
+                [self._load(directory, segment["name"], OHLCV_COLUMNS) for segment in segments[k:j]],
+                OHLCV_COLUMNS, self.dtype,
+            )
+            cut = int(stored.times.searchsorted(first_new))
+            replaced = stored.iloc(slice(cut, None))
+            overlap = pd.concat([replaced.to_frame(), new])
+            overlap = overlap[~overlap.index.duplicated(keep="last")].sort_index()
+            tail = OHLCVColumns.from_frame(overlap, OHLCV_COLUMNS, self.dtype)
+            if _same(tail, replaced, self.dtype):
+                return self.read(symbol, interval, last=last)
+
+            head = stored.iloc(slice(None, cut))
+            merged = _join([head, tail], OHLCV_COLUMNS, self.dtype)
+            written = []
+            for offset in range(0, len(merged), self.segment_rows):
+                name = f"s{manifest['next']}"
+                manifest["next"] += 1
+                rows = merged.iloc(slice(offset, offset + self.segment_rows))
+                written.append(self._write_segment(directory, name, rows))
+
+            now = time.time()
+            manifest["segments"] = segments[:k] + written + segments[j:]
+            for segment in segments[k:j]:
+                manifest["retired"][segment["name"]] = now
+            self._commit(symbol, interval, manifest, now)
+            return self.read(symbol, interval, last=last)
+
+    def _convert_legacy(self, symbol, interval):
+        """Write a .npz series as segments; returns the manifest that lists them"""
+        manifest = {"segments": [], "next": 1, "retired": {}}
+        bars = self._open_legacy(symbol, interval, OHLCV_COLUMNS, None, None)
+        if bars is None:
+            return manifest
+
+        directory = self.path(symbol, interval)
+        for offset in range(0, len(bars), self.segment_rows):
+            name = f"s{manifest['next']}"
+            manifest["next"] += 1
+            manifest["segments"].append(
+                self._write_segment(directory, name, bars.iloc(slice(offset, offset + self.segment_rows)))
+            )
+        return manifest
+
+    def _write_segment(self, directory, name, bars):
+        """Write one segment directory; returns its manifest entry"""
+        staging = tempfile.mkdtemp(dir=directory, suffix=".tmp")
+        try:
+            times = np.ascontiguousarray(bars.times, dtype=np.int64)
+            np.save(os.path.join(staging, "time.npy"), times)
+            for col in OHLCV_COLUMNS:
+                np.save(os.path.join(staging, f"{col}.npy"), np.ascontiguousarray(bars[col], dtype=self.dtype))
+            target = os.path.join(directory, name)
+            shutil.rmtree(target, ignore_errors=True)
+            os.replace(staging, target)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        return _describe(name, times)
+
+    def _commit(self, symbol, interval, manifest, now):
+        """Swap in the manifest, then delete segments retired more than keep_seconds ago"""
+        directory = self.path(symbol, interval)
+        live = {segment["name"] for segment in manifest["segments"]}
+        retired = manifest["retired"]
+        # Directories left by an earlier format or an interrupted append
+        for name in os.listdir(directory):
+            if _SEGMENT_NAME.match(name) and name not in live and name not in retired:
+                retired[name] = now
+        expired = [name for name, since in retired.items() if now - since >= self.keep_seconds]
+        for name in expired:
+            del retired[name]
+
+        fd, pointer = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(manifest, f)
+        os.replace(pointer, os.path.join(directory, "MANIFEST"))
+
+        for name in expired:
+            shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+        for stale in (os.path.join(directory, "CURRENT"), self._legacy_path(symbol, interval)):
+            if os.path.exists(stale):
+                os.remove(stale)
+
+def _describe(name, times):
+    """Manifest entry of a segment with these times"""
+    return {"name": name, "rows": len(times), "first": int(times[0]), "last": int(times[-1])}
+
+def _join(parts, columns, dtype):
+    """Concatenate OHLCVColumns in time order; a single part is returned as is"""
+    parts = [part for part in parts if len(part)]
+    if len(parts) == 1:
+        return parts[0]
+    if not parts:
+        return OHLCVColumns(np.empty(0, dtype=np.int64), {col: np.empty(0, dtype=dtype) for col in columns})
+    return OHLCVColumns(
+        np.concatenate([part.times for part in parts]),
+        {col: np.concatenate([part[col] for part in parts]) for col in columns},
+    )
+
+def _same(tail, stored, dtype):
+    """Whether merged rows are what is already stored, at the store's precision"""
+    if len(tail) != len(stored) or not np.array_equal(tail.times, stored.times):
+        return False
+    return all(
+        np.array_equal(tail[col], np.asarray(stored[col]).astype(dtype, copy=False), equal_nan=True)
+        for col in OHLCV_COLUMNS
+    )
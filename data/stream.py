@@ -0,0 +1,398 @@
+"""
+Streaming tick ingest
+
+Builds bars of every configured interval from price ticks as they
+arrive, so the still-forming candle is visible before it closes. Ticks
+come from a pluggable source: any iterable of (symbol, epoch ns, price,
+volume) tuples, such as WebSocketSource (TwelveData price stream) or
+ReplaySource (recorded or synthetic ticks, for tests and benchmarks).
+
+Per tick only the forming candles are updated (a few microseconds per
+interval). Indicators are updated incrementally once per closed bar,
+and the forming bar's indicators and confirmation score are computed
+on request, from a copy of the incremental state.
+"""
+import json
+import threading
+import time
+from collections import deque
+
+import pandas as pd
+import numpy as np
+
+try:
+    import websocket
+except ImportError:  # optional, only needed for WebSocketSource
+    websocket = None
+
+from config import TD_API_KEY, TIMEFRAMES, SYMBOL, SESSION_OFFSETS
+from data.resample import bar_duration
+from data.store import OHLCV_COLUMNS
+from features.incremental import IncrementalIndicators, INDICATOR_COLUMNS
+from inference.trade_logic import confirmation_scores
+
+TWELVEDATA_WS_URL = "wss://ws.twelvedata.com/v1/quotes/price"
+
+BAR_COLUMNS = OHLCV_COLUMNS + INDICATOR_COLUMNS
+
+# Bars of history the confirmation score looks at (20-bar averages plus the previous close)
+SCORE_WINDOW = 21
+
+# ========== TICK SOURCES ==========
+
+class ReplaySource:
+    """
+    Ticks from arrays, optionally paced like the original stream
+
+    Args:
+        times: Tick times (datetime-like or epoch nanoseconds)
+        prices: Tick prices
+        volumes: Tick volumes (default 0.0, like metals/FX feeds)
+        symbol: Symbol the ticks are reported under
+        speed: None replays as fast as possible; 1.0 in real time, 60.0
+            a minute of ticks per second
+    """
+
+    def __init__(self, times, prices, volumes=None, symbol=SYMBOL, speed=None):
+        times = np.asarray(times)
+        if np.issubdtype(times.dtype, np.integer):
+            self.times = times.astype(np.int64)
+        else:
+            self.times = pd.DatetimeIndex(times).as_unit("ns").asi8
+        self.prices = np.asarray(prices, dtype=float)
+        self.volumes = np.zeros(len(self.prices)) if volumes is None else np.asarray(volumes, dtype=float)
+        self.symbol = symbol
+        self.speed = speed
+        self.stopped = threading.Event()
+
+    @classmethod
+    def from_frame(cls, df, price="price", volume="volume", symbol=SYMBOL, speed=None):
+        """Ticks from a DataFrame indexed by time with price (and optional volume) columns"""
+        volumes = df[volume] if volume in df.columns else None
+        return cls(df.index, df[price], volumes, symbol, speed)
+
+    def __iter__(self):
+        start_wall = time.monotonic()
+        start_tick = self.times[0] if len(self.times) else 0
+        for t, price, volume in zip(self.times.tolist(), self.prices.tolist(), self.volumes.tolist()):
+            if self.stopped.is_set():
+                return
+            if self.speed:
+                delay = (t - start_tick) / 1e9 / self.speed - (time.monotonic() - start_wall)
+                if delay > 0 and self.stopped.wait(delay):
+                    return
+            yield self.symbol, t, price, volume
+
+    def close(self):
+        self.stopped.set()
+
+class WebSocketSource:
+    """
+    TwelveData real-time price stream (needs the websocket-client package)
+
+    Subscribes to the symbols, sends the heartbeat the API expects and
+    reconnects after a dropped connection. Each price event is yielded
+    as a tick; the API reports no per-tick volume for metals/FX, so the
+    volume is 0.0.
+    """
+
+    def __init__(self, symbols=None, api_key=TD_API_KEY, url=TWELVEDATA_WS_URL,
+                 heartbeat=10.0, reconnect_delay=5.0):
+        if websocket is None:
+            raise ImportError("WebSocketSource needs the websocket-client package (pip install websocket-client)")
+        self.symbols = list(symbols or [SYMBOL])
+        self.url = f"{url}?apikey={api_key}"
+        self.heartbeat = heartbeat
+        self.reconnect_delay = reconnect_delay
+        self.stopped = threading.Event()
+        self.connection = None
+        self.last_error = None
+
+    def _connect(self):
+        connection = websocket.create_connection(self.url, timeout=self.heartbeat)
+        connection.send(json.dumps({"action": "subscribe", "params": {"symbols": ",".join(self.symbols)}}))
+        return connection
+
+    def __iter__(self):
+        while not self.stopped.is_set():
+            try:
+                self.connection = self._connect()
+                last_heartbeat = time.monotonic()
+                while not self.stopped.is_set():
+                    if time.monotonic() - last_heartbeat >= self.heartbeat:
+                        self.connection.send(json.dumps({"action": "heartbeat"}))
+                        last_heartbeat = time.monotonic()
+                    try:
+                        message = self.connection.recv()
+                    except websocket.WebSocketTimeoutException:
+                        continue
+                    event = json.loads(message)
+                    if event.get("event") == "price":
+                        yield (
+                            event["symbol"],
+                            int(event["timestamp"] * 1_000_000_000),
+                            float(event["price"]),
+                            float(event.get("volume") or 0.0),
+                        )
+            except (websocket.WebSocketException, OSError, ValueError) as e:
+                self.last_error = str(e)
+            finally:
+                if self.connection is not None:
+                    self.connection.close()
+                    self.connection = None
+            self.stopped.wait(self.reconnect_delay)
+
+    def close(self):
+        self.stopped.set()
+        if self.connection is not None:
+            self.connection.close()
+
+# ========== BAR BUILDING ==========
+
+class CandleBuilder:
+    """
+    Forming candle of one interval, updated tick by tick
+
+    Buckets are aligned like data.resample (epoch plus the session
+    offset). Ticks older than the forming bar are counted and dropped.
+    """
+
+    def __init__(self, interval, offset=None):
+        self.interval = interval
+        self.duration = bar_duration(interval).value
+        self.offset = pd.Timedelta(offset or 0).value
+        self.start = None
+        self.open = self.high = self.low = self.close = np.nan
+        self.volume = 0.0
+        self.ticks = 0
+        self.late = 0
+
+    def update(self, t, price, volume=0.0):
+        """
+        Add one tick
+
+        Returns:
+            the bar it closed as (start ns, open, high, low, close, volume),
+            or None while the same bar is still forming
+        """
+        start = (t - self.offset) // self.duration * self.duration + self.offset
+        if start == self.start:
+            if price > self.high:
+                self.high = price
+            elif price < self.low:
+                self.low = price
+            self.close = price
+            self.volume += volume
+            self.ticks += 1
+            return None
+
+        if self.start is not None and start < self.start:
+            self.late += 1
+            return None
+
+        closed = self.bar()
+        self.start = start
+        self.open = self.high = self.low = self.close = price
+        self.volume = volume
+        self.ticks = 1
+        return closed
+
+    def bar(self):
+        """The forming bar as (start ns, open, high, low, close, volume), or None before the first tick"""
+        if self.start is None:
+            return None
+        return self.start, self.open, self.high, self.low, self.close, self.volume
+
+class StreamIngest:
+    """
+    Bars, indicators and confirmation scores of one symbol, fed tick by tick.
+
+    Closed bars are committed to an IncrementalIndicators engine per
+    interval and kept (with their indicator values) up to max_bars. Seed
+    each interval with closed REST bars first so indicators are warm; the
+    first streamed bar only holds the ticks seen since the stream started.
+    """
+
+    def __init__(self, intervals=None, symbol=SYMBOL, offsets=None, max_bars=5000, on_bar=None):
+        self.intervals = list(intervals or TIMEFRAMES.values())
+        self.symbol = symbol
+        offsets = SESSION_OFFSETS if offsets is None else offsets
+        self.max_bars = max_bars
+        self.on_bar = on_bar
+
+        self.builders = [CandleBuilder(interval, offsets.get(interval)) for interval in self.intervals]
+        self.engines = {interval: IncrementalIndicators() for interval in self.intervals}
+        # interval -> deque of (start ns, *OHLCV, *indicators) rows of closed bars
+        self.bars = {interval: deque(maxlen=max_bars) for interval in self.intervals}
+        self.last_committed = {interval: None for interval in self.intervals}
+        self._forming = {}
+        self.ticks = 0
+        self.last_tick = None
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = None
+        self.source = None
+        self.error = None
+
+    def seed(self, interval, df, now=None):
+        """
+        Warm an interval up with REST bars
+
+        Bars that had not closed at `now` (default: the current UTC time)
+        are dropped; the stream rebuilds them from ticks.
+        """
+        now = pd.Timestamp.now(tz="UTC").tz_localize(None) if now is None else pd.Timestamp(now)
+        df = df[df.index + bar_duration(interval) <= now]
+        if "volume" not in df.columns:
+            df = df.assign(volume=0.0)
+
+        engine, indicators = IncrementalIndicators.from_history(df)
+        times = df.index.values.astype("datetime64[ns]").astype(np.int64)
+        columns = [times] + [df[col].to_numpy(dtype=float) for col in OHLCV_COLUMNS]
+        columns += [indicators[col].to_numpy(dtype=float) for col in INDICATOR_COLUMNS]
+        with self.lock:
+            self.engines[interval] = engine
+            self.bars[interval].clear()
+            self.bars[interval].extend(zip(*(c.tolist() for c in columns)))
+            self.last_committed[interval] = int(times[-1]) if len(times) else None
+            self._forming.pop(interval, None)
+
+    def process(self, t, price, volume=0.0):
+        """Add one tick (epoch ns, price, volume) to every interval"""
+        with self.lock:
+            self.ticks += 1
+            self.last_tick = (t, price)
+            for builder in self.builders:
+                closed = builder.update(t, price, volume)
+                if closed is not None:
+                    self._commit(builder.interval, closed)
+            self._forming.clear()
+
+    def _commit(self, interval, bar):
+        last = self.last_committed[interval]
+        if last is not None and bar[0] <= last:
+            # Already seeded from REST bars
+            return
+        start, open_, high, low, close, volume = bar
+        values = self.engines[interval].update(high, low, close, volume)
+        row = bar + tuple(values[col] for col in INDICATOR_COLUMNS)
+        self.bars[interval].append(row)
+        self.last_committed[interval] = start
+        if self.on_bar is not None:
+            self.on_bar(self.symbol, interval, row)
+
+    def _builder(self, interval):
+        return self.builders[self.intervals.index(interval)]
+
+    def forming(self, interval):
+        """
+        The forming bar of an interval with indicators and confidence
+
+        Computed from a copy of the incremental state once per change, so
+        repeated reads between ticks cost nothing.
+
+        Returns:
+            dict with time, OHLCV, indicator columns and confidence, or
+            None before the first tick of the bar
+        """
+        with self.lock:
+            if interval in self._forming:
+                return self._forming[interval]
+            bar = self._builder(interval).bar()
+            if bar is None or (self.last_committed[interval] is not None and bar[0] <= self.last_committed[interval]):
+                return None
+
+            start, open_, high, low, close, volume = bar
+            values = self.engines[interval].preview(high, low, close, volume)
+            row = bar + tuple(values[col] for col in INDICATOR_COLUMNS)
+            bars = self.bars[interval]
+            recent = [bars[i] for i in range(-min(len(bars), SCORE_WINDOW - 1), 0)] + [row]
+
+            result = dict(zip(["time"] + BAR_COLUMNS, row))
+            result["time"] = pd.Timestamp(start)
+            result["confidence"] = float(_score_last(recent))
+            self._forming[interval] = result
+            return result
+
+    def frame(self, interval, include_forming=True):
+        """
+        Closed bars (and the forming one) with indicator columns
+
+        Returns:
+            DataFrame indexed by datetime like the fetched frames
+        """
+        forming = self.forming(interval) if include_forming else None
+        with self.lock:
+            rows = list(self.bars[interval])
+        df = pd.DataFrame.from_records(rows, columns=["datetime"] + BAR_COLUMNS)
+        if forming is not None:
+            df.loc[len(df)] = [forming["time"].value] + [forming[col] for col in BAR_COLUMNS]
+        df["datetime"] = pd.to_datetime(df["datetime"].astype(np.int64), unit="ns")
+        return df.set_index("datetime")
+
+    # ========== THREAD ==========
+
+    def consume(self, source):
+        """Feed every tick of this symbol from a source until it ends or stop() is called"""
+        for symbol, t, price, volume in source:
+            if self.stopped.is_set():
+                break
+            if symbol == self.symbol:
+                self.process(t, price, volume)
+
+    def start(self, source):
+        """Consume a source on a daemon thread"""
+        self.source = source
+        self.stopped.clear()
+
+        def run():
+            try:
+                self.consume(source)
+            except Exception as e:
+                self.error = f"{type(e).__name__}: {e}"
+
+        self.thread = threading.Thread(target=run, name=f"tick-ingest-{self.symbol}", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self.stopped.set()
+        if self.source is not None and hasattr(self.source, "close"):
+            self.source.close()
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "ticks": self.ticks,
+                "last_tick": pd.Timestamp(self.last_tick[0]) if self.last_tick else None,
+                "last_price": self.last_tick[1] if self.last_tick else None,
+                "late_ticks": sum(builder.late for builder in self.builders),
+                "error": self.error,
+            }
+
+def _window_mean(values):
+    """Mean of a full 20-bar window, NaN like rolling(20).mean() when short or gapped"""
+    if len(values) < SCORE_WINDOW - 1:
+        return np.nan
+    return values[-(SCORE_WINDOW - 1):].mean()
+
+def _score_last(rows):
+    """
+    Confirmation score of the last of up to SCORE_WINDOW (start, *OHLCV,
+    *indicators) rows, without the rolling passes over every row
+    """
+    if len(rows) < 2:
+        return 0.0
+    values = np.array(rows, dtype=float).T
+    column = dict(zip(["time"] + BAR_COLUMNS, values))
+    # The score's 20-bar averages only matter for the last row
+    atr_mean = np.full(2, _window_mean(column["ATR"]))
+    avg_range = np.full(2, _window_mean(column["high"] - column["low"]))
+    last = slice(-2, None)
+    return confirmation_scores(
+        column["close"][last], column["high"][last], column["low"][last],
+        rsi=column["RSI"][last], ema=column["EMA"][last], sma=column["SMA"][last],
+        atr=column["ATR"][last], atr_mean=atr_mean, avg_range=avg_range,
+    )[-1]
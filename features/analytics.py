@@ -0,0 +1,357 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import numpy as np
+
+# Bars per year by interval: 24h x 5d x 52w, gold trades around the clock on weekdays
+PERIODS_PER_YEAR = {
+    "1min": 374400,
+    "5min": 74880,
+    "15min": 24960,
+    "30min": 12480,
+    "1h": 6240,
+    "4h": 1560,
+    "1day": 260,
+}
+
+# Units held per trade; backtest profits are (exit - entry) * 100
+TRADE_UNITS = 100
+
+# Cap on resampled trades held in memory at once by bootstrap_trades
+_BOOTSTRAP_CHUNK = 250_000
+
+# Steps per block when bootstrap_trades bounds drawdowns block by block
+_DRAWDOWN_BLOCK = 64
+
+def _trade_arrays(trades):
+    """Entry bar, exit bar and profit arrays of a list of trade dicts"""
+    n = len(trades)
+    entry = np.fromiter((t["entry_index"] for t in trades), dtype=np.int64, count=n)
+    exit_ = np.fromiter((t["exit_index"] for t in trades), dtype=np.int64, count=n)
+    profit = np.fromiter((t["profit"] for t in trades), dtype=float, count=n)
+    return entry, exit_, profit
+
+def _profits(trades):
+    """Profit array from trade dicts, or the array-like itself"""
+    if len(trades) and isinstance(trades[0], dict):
+        return _trade_arrays(trades)[2]
+    return np.asarray(trades, dtype=float)
+
+def _drawdown(equity):
+    """Fractional drawdown from the running peak (<= 0)"""
+    peak = np.maximum.accumulate(equity, axis=-1)
+    return equity / peak - 1
+
+def _longest_underwater(drawdown):
+    """Most bars spent below a previous equity peak"""
+    if len(drawdown) == 0:
+        return 0
+    bars = np.arange(len(drawdown))
+    last_peak = np.maximum.accumulate(np.where(drawdown >= 0, bars, -1))
+    return int((bars - last_peak).max())
+
+def _annualized(mean, dev, periods_per_year):
+    if not dev > 0:
+        return np.nan
+    return float(mean / dev * np.sqrt(periods_per_year))
+
+# ========== EQUITY CURVE ==========
+
+def equity_curve(close, trades, initial_balance=1000, units=TRADE_UNITS):
+    """
+    Bar-level mark-to-market equity of a trade list
+
+    A trade is held from the bar after its entry through its exit bar, so
+    equity on each exit bar equals the running balance of the backtest.
+
+    Args:
+        close: Close prices (Series or array) the trades were simulated on
+        trades: Trade dicts with entry_index and exit_index, as returned by
+            simulate_trades / backtest_strategy
+        initial_balance: Starting capital
+        units: Units held per trade
+
+    Returns:
+        DataFrame with equity, returns, drawdown and in_position per bar
+    """
+    index = close.index if isinstance(close, pd.Series) else None
+    close = np.asarray(close, dtype=float)
+    n = len(close)
+    entry, exit_, _ = _trade_arrays(trades)
+
+    # +1 on the first held bar, -1 after the exit bar, summed into a mask
+    markers = np.zeros(n + 1)
+    np.add.at(markers, entry + 1, 1)
+    np.add.at(markers, exit_ + 1, -1)
+    in_position = np.cumsum(markers[:n]) > 0
+
+    pnl = np.zeros(n)
+    pnl[1:] = np.diff(close) * units
+    pnl[~in_position] = 0
+    equity = initial_balance + np.cumsum(pnl)
+
+    returns = np.zeros(n)
+    returns[1:] = np.diff(equity) / equity[:-1]
+
+    return pd.DataFrame({
+        "equity": equity,
+        "returns": returns,
+        "drawdown": _drawdown(equity),
+        "in_position": in_position,
+    }, index=index)
+
+# ========== METRICS ==========
+
+def performance_metrics(curve, trades=None, periods_per_year=PERIODS_PER_YEAR["5min"]):
+    """
+    Risk and return statistics of an equity curve
+
+    Args:
+        curve: DataFrame from equity_curve
+        trades: Trade dicts (or profits) for the per-trade statistics
+        periods_per_year: Bars per year, see PERIODS_PER_YEAR
+
+    Returns:
+        dict of metrics; percentages are in percent
+    """
+    equity = curve["equity"].to_numpy()
+    returns = curve["returns"].to_numpy()[1:]
+    drawdown = curve["drawdown"].to_numpy()
+
+    downside = np.sqrt(np.mean(np.minimum(returns, 0) ** 2)) if len(returns) else 0
+    metrics = {
+        "total_return_pct": float((equity[-1] / equity[0] - 1) * 100) if len(equity) else 0.0,
+        "sharpe": _annualized(returns.mean(), returns.std(), periods_per_year) if len(returns) else np.nan,
+        "sortino": _annualized(returns.mean(), downside, periods_per_year) if len(returns) else np.nan,
+        "max_drawdown_pct": float(drawdown.min() * 100) if len(drawdown) else 0.0,
+        "max_drawdown_bars": _longest_underwater(drawdown),
+        "exposure_pct": float(curve["in_position"].mean() * 100) if len(curve) else 0.0,
+    }
+
+    if trades is not None:
+        profits = _profits(trades)
+        wins, losses = profits[profits > 0], profits[profits < 0]
+        metrics.update({
+            "trades": len(profits),
+            "win_rate": float(len(wins) / len(profits) * 100) if len(profits) else 0.0,
+            "profit_factor": float(wins.sum() / -losses.sum()) if len(losses) else np.inf if len(wins) else np.nan,
+            "expectancy": float(profits.mean()) if len(profits) else 0.0,
+            "avg_win": float(wins.mean()) if len(wins) else 0.0,
+            "avg_loss": float(losses.mean()) if len(losses) else 0.0,
+        })
+    return metrics
+
+def rolling_metrics(curve, window, periods_per_year=PERIODS_PER_YEAR["5min"]):
+    """
+    Rolling-window versions of the curve statistics
+
+    Args:
+        curve: DataFrame from equity_curve
+        window: Window length in bars
+        periods_per_year: Bars per year, see PERIODS_PER_YEAR
+
+    Returns:
+        DataFrame with return_pct, volatility, sharpe, sortino, drawdown_pct
+        (from the window's peak) and exposure_pct
+    """
+    equity = curve["equity"]
+    returns = curve["returns"]
+    scale = np.sqrt(periods_per_year)
+
+    mean = returns.rolling(window).mean()
+    std = returns.rolling(window).std(ddof=0)
+    downside = np.sqrt((returns.clip(upper=0) ** 2).rolling(window).mean())
+
+    return pd.DataFrame({
+        "return_pct": (equity / equity.shift(window) - 1) * 100,
+        "volatility": std * scale,
+        "sharpe": (mean / std.where(std > 0)) * scale,
+        "sortino": (mean / downside.where(downside > 0)) * scale,
+        "drawdown_pct": (equity / equity.rolling(window).max() - 1) * 100,
+        "exposure_pct": curve["in_position"].astype(float).rolling(window).mean() * 100,
+    }, index=curve.index)
+
+# ========== MONTE CARLO ==========
+
+def _block_drawdowns(steps, initial_balance):
+    """
+    Final P&L and largest drawdown of each sequence of a block-major step array
+
+    steps[j, r, b] is the P&L of step j of block b of sequence r, so the
+    running sum within every block is one contiguous vector add per step;
+    steps is overwritten with that running sum. A block's min against
+    the peak before it bounds the drawdown inside it from both sides, so
+    only blocks that could still beat the sequence's best get a running
+    max.
+
+    Args:
+        steps: (block, rows, blocks) array of per-step P&L
+        initial_balance: Starting capital; the peak never drops below it
+
+    Returns:
+        (pnl, max_drawdown, max_drawdown_pct) arrays; drawdowns are <= 0
+    """
+    block, rows, blocks = steps.shape
+    for j in range(1, block):
+        np.add(steps[j - 1], steps[j], out=steps[j])
+    sums = steps[-1]
+    start = np.zeros((rows, blocks))
+    np.cumsum(sums[:, :-1], axis=1, out=start[:, 1:])
+    hi = steps.max(axis=0) + start
+    lo = steps.min(axis=0) + start
+
+    # Peak before each block (from the initial balance) and within it
+    prev = np.zeros_like(hi)
+    np.maximum.accumulate(hi[:, :-1], axis=1, out=prev[:, 1:])
+    np.maximum(prev, 0, out=prev)
+    top = np.maximum(hi, prev)
+
+    # The low's peak lies in [prev, top]; a ratio with a negative balance
+    # (ruin) is lowest against the smaller peak
+    low = initial_balance + lo
+    best_abs = (lo - prev).min(axis=1)
+    best_ratio = (low / (initial_balance + np.where(low >= 0, prev, top))).min(axis=1)
+    bound_ratio = np.minimum(low / (initial_balance + prev), low / (initial_balance + top))
+    scan = ((lo - top) < best_abs[:, None]) | (bound_ratio < best_ratio[:, None])
+
+    r, b = np.nonzero(scan)
+    if len(r):
+        path = steps[:, r, b].T + start[r, b][:, None]
+        peak = np.maximum.accumulate(path, axis=1)
+        np.maximum(peak, prev[r, b][:, None], out=peak)
+        np.minimum.at(best_abs, r, (path - peak).min(axis=1))
+        np.minimum.at(best_ratio, r, ((initial_balance + path) / (initial_balance + peak)).min(axis=1))
+    return start[:, -1] + sums[:, -1], best_abs, (best_ratio - 1) * 100
+
+def _resample(values, n, n_wins, sizes, generators, method, initial_balance):
+    """
+    final, max_drawdown, max_drawdown_pct and win_rate of resampled sequences
+
+    Processes one chunk of sizes[i] sequences per generators[i] in the
+    same (cache-sized) buffers. Any fixed arrangement of a resampled
+    sequence is itself a resample, so the steps are gathered block-major
+    for _block_drawdowns directly; each sequence is padded to whole
+    blocks with zero steps, which add no drawdown.
+
+    Args:
+        values: "bootstrap": the n profits, winners first, and a zero;
+            "shuffle": the profits and zero padding in random order
+        n: Number of trades
+        n_wins: Number of winning trades
+    """
+    block = _DRAWDOWN_BLOCK
+    blocks = -(-n // block)
+    width = block * blocks
+    total = sum(sizes)
+    final = np.empty(total)
+    max_dd = np.empty(total)
+    max_dd_pct = np.empty(total)
+    win_rate = np.full(total, n_wins / n * 100)
+    steps = np.empty((block, max(sizes), blocks))
+
+    # A shuffle orders the values by sorting random 64-bit keys (far faster
+    # than a per-element Fisher-Yates), each carrying its value's index in
+    # the low bits; values come in random order, so rare tied keys do too
+    rank_mask = np.uint64((1 << (width - 1).bit_length()) - 1)
+    ranks = np.arange(width, dtype=np.uint64)
+    full, partial = divmod(n, blocks)
+
+    start = 0
+    for rows, rng in zip(sizes, generators):
+        part = slice(start, start + rows)
+        start += rows
+        if method == "bootstrap":
+            draws = rng.integers(0, n, size=(block, rows, blocks), dtype=np.int32 if n < 2 ** 31 else np.int64)
+            # Padding slots draw the zero after the profits
+            draws[full:full + 1, :, partial:] = n
+            draws[full + 1:] = n
+            win_rate[part] = np.count_nonzero(draws < n_wins, axis=(0, 2)) / n * 100
+        else:
+            keys = rng.integers(0, 2 ** 64, size=(rows, width), dtype=np.uint64)
+            keys &= ~rank_mask
+            keys |= ranks
+            keys.sort(axis=1)
+            keys &= rank_mask
+            draws = keys.reshape(rows, block, blocks).transpose(1, 0, 2)
+
+        chunk = steps[:, :rows]
+        np.take(values, draws, out=chunk, mode="clip")
+        pnl, max_dd[part], max_dd_pct[part] = _block_drawdowns(chunk, initial_balance)
+        final[part] = pnl + initial_balance
+    return final, max_dd, max_dd_pct, win_rate
+
+def bootstrap_trades(trades, n_resamples=2000, method="bootstrap", confidence=0.95,
+                     initial_balance=1000, seed=42, max_workers=None):
+    """
+    Confidence intervals of backtest outcomes over resampled trade sequences
+
+    "bootstrap" draws trades with replacement, so final P&L and win rate
+    vary; "shuffle" permutes the order of the same trades, so only the
+    path (drawdown) does. Resamples are processed in cache-sized chunks,
+    and drawdowns come from per-block min/max (_block_drawdowns) instead
+    of a running max over every step. Chunks run on a thread pool (numpy
+    releases the GIL), each with a generator spawned from seed, so the
+    results do not depend on max_workers.
+
+    Args:
+        trades: Trade dicts or an array of per-trade profits
+        n_resamples: Number of simulated sequences
+        method: "bootstrap" or "shuffle"
+        confidence: Width of the interval
+        initial_balance: Starting capital
+        seed: RNG seed
+        max_workers: Threads (1 runs in the calling thread)
+
+    Returns:
+        DataFrame indexed by metric with low, median and high columns
+    """
+    if method not in ("bootstrap", "shuffle"):
+        raise ValueError(f"Unknown method: {method} (expected 'bootstrap' or 'shuffle')")
+    profits = _profits(trades)
+    n = len(profits)
+    if n == 0:
+        return None
+
+    # Winners first, so a bootstrap draw is a win when its index < n_wins
+    profits = np.sort(profits)[::-1].copy()
+    n_wins = int((profits > 0).sum())
+
+    chunk = max(1, _BOOTSTRAP_CHUNK // n)
+    sizes = [min(chunk, n_resamples - start) for start in range(0, n_resamples, chunk)]
+    rng = np.random.default_rng(seed)
+    generators = rng.spawn(len(sizes))
+    if method == "bootstrap":
+        values = np.append(profits, 0.0)
+    else:
+        values = rng.permutation(np.append(profits, np.zeros(-n % _DRAWDOWN_BLOCK)))
+
+    # Each worker takes a contiguous run of chunks
+    max_workers = min(max_workers or os.cpu_count() or 1, len(sizes))
+    bounds = np.linspace(0, len(sizes), max_workers + 1).astype(int)
+    tasks = [(sizes[a:b], generators[a:b]) for a, b in zip(bounds[:-1], bounds[1:])]
+
+    def resample(task):
+        return _resample(values, n, n_wins, *task, method, initial_balance)
+
+    if max_workers <= 1:
+        results = [resample(task) for task in tasks]
+    else:
+        with ThreadPoolExecutor(max_workers) as pool:
+            results = list(pool.map(resample, tasks))
+    final, max_dd, max_dd_pct, win_rate = (np.concatenate(parts) for parts in zip(*results))
+
+    tail = (1 - confidence) / 2 * 100
+    stats = {
+        "final_balance": final,
+        "return_pct": (final - initial_balance) / initial_balance * 100,
+        "max_drawdown": max_dd,
+        "max_drawdown_pct": max_dd_pct,
+        "win_rate": win_rate,
+    }
+    table = pd.DataFrame(
+        {name: np.percentile(values, [tail, 50, 100 - tail]) for name, values in stats.items()},
+        index=["low", "median", "high"],
+    ).T
+    table.index.name = "metric"
+    return table
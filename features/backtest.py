@@ -1,10 +1,148 @@
 import pandas as pd
 import numpy as np
-from inference.trade_logic import get_confirmation_score
+from inference.trade_logic import get_confirmation_score, get_confirmation_scores
 
-def backtest_strategy(df, initial_balance=1000, risk_per_trade=0.02, min_confidence=50):
+# First look-ahead window when scanning for a TP/SL exit; doubles each miss
+_EXIT_SCAN_CHUNK = 64
+
+def _find_exit(close, entry_idx, take_profit, stop_loss):
+    """First bar after entry_idx whose close hits TP or SL, or None"""
+    entry_price = close[entry_idx]
+    if not entry_price > 0:
+        return None
+
+    start = entry_idx + 1
+    chunk = _EXIT_SCAN_CHUNK
+    while start < len(close):
+        window = close[start:start + chunk]
+        profit_pct = (window - entry_price) / entry_price
+        hits = np.flatnonzero((profit_pct > take_profit) | (profit_pct < -stop_loss))
+        if hits.size:
+            return start + hits[0]
+        start += chunk
+        chunk *= 2
+    return None
+
+def simulate_trades(close, scores, atr=None, min_confidence=50, take_profit=0.02, stop_loss=0.01,
+                    tp_atr=None, sl_atr=None):
+    """
+    Long-only trades from precomputed close, confidence and ATR arrays
+
+    Enters on the close of a bar scoring above min_confidence (from bar
+    50, while flat) and exits on the first later close beyond TP or SL.
+    With tp_atr/sl_atr the levels are that many ATRs of the entry bar away
+    (like trade_setup); otherwise take_profit/stop_loss are fractions of
+    the entry price.
+
+    Returns:
+        list of trade dicts
+    """
+    signal_idx = np.flatnonzero(scores > min_confidence)
+    signal_idx = signal_idx[signal_idx >= 50]
+    use_atr = atr is not None and (tp_atr is not None or sl_atr is not None)
+
+    trades = []
+    next_bar = 50
+    while True:
+        pos = np.searchsorted(signal_idx, next_bar)
+        if pos == len(signal_idx):
+            break
+        entry_idx = signal_idx[pos]
+        entry_price = close[entry_idx]
+
+        tp, sl = take_profit, stop_loss
+        if use_atr and atr[entry_idx] > 0 and entry_price > 0:
+            if tp_atr is not None:
+                tp = tp_atr * atr[entry_idx] / entry_price
+            if sl_atr is not None:
+                sl = sl_atr * atr[entry_idx] / entry_price
+
+        exit_idx = _find_exit(close, entry_idx, tp, sl)
+        if exit_idx is None:
+            break
+
+        exit_price = close[exit_idx]
+        profit_pct = (exit_price - entry_price) / entry_price
+        trades.append({
+            "entry": entry_price,
+            "exit": exit_price,
+            "profit": (exit_price - entry_price) * 100,
+            "return_pct": profit_pct * 100,
+            "bars_held": int(exit_idx - entry_idx),
+            "entry_index": int(entry_idx),
+            "exit_index": int(exit_idx),
+            "status": "TP_HIT" if profit_pct > tp else "SL_HIT"
+        })
+        next_bar = exit_idx + 1
+
+    return trades
+
+def backtest_strategy(df, initial_balance=1000, risk_per_trade=0.02, min_confidence=50,
+                      take_profit=0.02, stop_loss=0.01, tp_atr=None, sl_atr=None):
+    """
+    Vectorized backtest of trading strategy
+
+    Scores every bar in one pass, then jumps from entry signal to TP/SL exit
+    instead of rescoring a growing slice on each bar. With the default
+    exits it returns the same result as backtest_strategy_loop.
+
+    Args:
+        df: DataFrame with OHLC data
+        initial_balance: Starting capital
+        risk_per_trade: Risk percentage per trade
+        min_confidence: Minimum confidence threshold
+        take_profit: Take profit as a fraction of the entry price
+        stop_loss: Stop loss as a fraction of the entry price
+        tp_atr: Take profit in ATRs instead (needs an ATR column)
+        sl_atr: Stop loss in ATRs instead (needs an ATR column)
+
+    Returns:
+        dict with performance metrics
+    """
+    close = df['close'].to_numpy(dtype=float)
+    scores = get_confirmation_scores(df).to_numpy()
+    atr = df['ATR'].to_numpy(dtype=float) if 'ATR' in df.columns else None
+
+    trades = simulate_trades(
+        close, scores, atr,
+        min_confidence=min_confidence,
+        take_profit=take_profit,
+        stop_loss=stop_loss,
+        tp_atr=tp_atr,
+        sl_atr=sl_atr
+    )
+    return summarize_trades(trades, initial_balance)
+
+def summarize_trades(trades, initial_balance=1000):
+    """Build the result dict from a list of closed trades"""
+    profits = np.array([t['profit'] for t in trades], dtype=float)
+    # cumsum adds left to right, matching the running balance of the loop
+    balance = np.cumsum(np.concatenate(([initial_balance], profits)))[-1]
+    balance = float(balance) if trades else initial_balance
+
+    total_trades = len(trades)
+    winning_trades = int((profits > 0).sum())
+    losing_trades = int((profits < 0).sum())
+    win_rate = (winning_trades / total_trades * 100) if total_trades > 0 else 0
+
+    avg_profit = float(np.cumsum(profits)[-1]) / total_trades if total_trades > 0 else 0
+
+    return {
+        "final_balance": round(balance, 2),
+        "initial_balance": initial_balance,
+        "total_profit": round(balance - initial_balance, 2),
+        "return_pct": round(((balance - initial_balance) / initial_balance * 100), 2),
+        "total_trades": total_trades,
+        "winning_trades": winning_trades,
+        "losing_trades": losing_trades,
+        "win_rate": round(win_rate, 2),
+        "avg_profit_per_trade": round(avg_profit, 2),
+        "trades": trades
+    }
+
+def backtest_strategy_loop(df, initial_balance=1000, risk_per_trade=0.02, min_confidence=50):
     """
-    Simple backtest of trading strategy
+    Bar-by-bar reference backtest (quadratic, kept for parity checks)
     
     Args:
         df: DataFrame with OHLC data
@@ -55,6 +193,8 @@ def backtest_strategy(df, initial_balance=1000, risk_per_trade=0.02, min_confide
                     "profit": profit,
                     "return_pct": profit_pct * 100,
                     "bars_held": i - entry_idx,
+                    "entry_index": entry_idx,
+                    "exit_index": i,
                     "status": "TP_HIT"
                 })
                 position = False
@@ -67,6 +207,8 @@ def backtest_strategy(df, initial_balance=1000, risk_per_trade=0.02, min_confide
                     "profit": -loss,
                     "return_pct": profit_pct * 100,
                     "bars_held": i - entry_idx,
+                    "entry_index": entry_idx,
+                    "exit_index": i,
                     "status": "SL_HIT"
                 })
                 position = False
@@ -0,0 +1,410 @@
+import math
+from collections import deque
+
+import pandas as pd
+import numpy as np
+
+NAN = float("nan")
+
+def _clone(obj):
+    """Copy of a rolling-state object; deques are copied, floats shared"""
+    copy = object.__new__(type(obj))
+    state = {}
+    for name, value in obj.__dict__.items():
+        if isinstance(value, deque):
+            value = value.copy()
+        elif type(value).__module__ == __name__:
+            value = _clone(value)
+        state[name] = value
+    copy.__dict__ = state
+    return copy
+
+def _div(a, b):
+    """a / b with numpy semantics (inf or NaN instead of ZeroDivisionError)"""
+    if b == 0:
+        if a == 0 or a != a:
+            return NAN
+        return math.inf if a > 0 else -math.inf
+    return a / b
+
+# ========== ROLLING STATE ==========
+
+class _RollingSum:
+    """Fixed-window sum/mean with Kahan compensation (rolling(n).sum()/mean())"""
+
+    def __init__(self, period):
+        self.period = period
+        self.window = deque()
+        self.nan_count = 0
+        self.neg_count = 0
+        self.total = 0.0
+        self.compensation = 0.0
+        # A run of identical values is returned exactly, as pandas does
+        self.prev_value = NAN
+        self.same_run = 0
+
+    def _add(self, value):
+        y = value - self.compensation
+        t = self.total + y
+        self.compensation = (t - self.total) - y
+        self.total = t
+
+    def update(self, value):
+        self.window.append(value)
+        if value != value:
+            self.nan_count += 1
+            self.same_run = 0
+        else:
+            self._add(value)
+            self.neg_count += math.copysign(1, value) < 0
+            self.same_run = self.same_run + 1 if value == self.prev_value else 1
+            self.prev_value = value
+
+        if len(self.window) > self.period:
+            old = self.window.popleft()
+            if old != old:
+                self.nan_count -= 1
+            else:
+                self._add(-old)
+                self.neg_count -= math.copysign(1, old) < 0
+
+        # Re-anchor once the window is all NaN so stale error cannot linger
+        if self.nan_count == len(self.window):
+            self.total = self.compensation = 0.0
+
+    @property
+    def ready(self):
+        return len(self.window) == self.period and self.nan_count == 0
+
+    def sum(self):
+        if not self.ready:
+            return NAN
+        if self.same_run >= self.period:
+            return self.prev_value * self.period
+        return self.total
+
+    def mean(self):
+        if not self.ready:
+            return NAN
+        if self.same_run >= self.period:
+            return self.prev_value
+        result = self.total / self.period
+        if self.neg_count == 0 and result < 0:
+            return 0.0
+        if self.neg_count == self.period and result > 0:
+            return 0.0
+        return result
+
+class _RollingVar:
+    """Fixed-window sample variance using Welford add/remove (rolling(n).std()**2)"""
+
+    def __init__(self, period):
+        self.period = period
+        self.window = deque()
+        self.nan_count = 0
+        self.nobs = 0
+        self.mean = 0.0
+        self.ssqdm = 0.0
+
+    def update(self, value):
+        self.window.append(value)
+        if len(self.window) > self.period:
+            old = self.window.popleft()
+            if old != old:
+                self.nan_count -= 1
+            else:
+                self.nobs -= 1
+                if self.nobs:
+                    prev_mean = self.mean
+                    self.mean -= (old - self.mean) / self.nobs
+                    self.ssqdm -= (old - prev_mean) * (old - self.mean)
+                else:
+                    self.mean = self.ssqdm = 0.0
+
+        if value != value:
+            self.nan_count += 1
+        else:
+            self.nobs += 1
+            prev_mean = self.mean
+            self.mean += (value - self.mean) / self.nobs
+            self.ssqdm += (value - prev_mean) * (value - self.mean)
+
+    def std(self):
+        if len(self.window) < self.period or self.nan_count or self.nobs < 2:
+            return NAN
+        return math.sqrt(max(self.ssqdm / (self.nobs - 1), 0.0))
+
+class _RollingExtreme:
+    """Fixed-window min or max with a monotonic deque (amortised O(1))"""
+
+    def __init__(self, period, mode="min"):
+        self.period = period
+        self.is_min = mode == "min"
+        self.candidates = deque()  # (position, value), monotonic in value
+        self.nan_positions = deque()
+        self.count = 0
+
+    def update(self, value):
+        pos = self.count
+        self.count += 1
+
+        if value != value:
+            self.nan_positions.append(pos)
+        else:
+            while self.candidates and (
+                self.candidates[-1][1] >= value if self.is_min else self.candidates[-1][1] <= value
+            ):
+                self.candidates.pop()
+            self.candidates.append((pos, value))
+
+        oldest = self.count - self.period
+        while self.candidates and self.candidates[0][0] < oldest:
+            self.candidates.popleft()
+        while self.nan_positions and self.nan_positions[0] < oldest:
+            self.nan_positions.popleft()
+
+    def value(self):
+        if self.count < self.period or self.nan_positions or not self.candidates:
+            return NAN
+        return self.candidates[0][1]
+
+class _EWMean:
+    """Adjusted exponential mean, same recurrence as series.ewm(span=n).mean()"""
+
+    def __init__(self, span):
+        self.decay = 1 - 2 / (span + 1)
+        self.weighted = NAN
+        self.old_weight = 1.0
+
+    def update(self, value):
+        is_observation = value == value
+        if self.weighted == self.weighted:
+            self.old_weight *= self.decay
+            if is_observation:
+                if self.weighted != value:
+                    self.weighted = (self.old_weight * self.weighted + value) / (self.old_weight + 1)
+                self.old_weight += 1
+        elif is_observation:
+            self.weighted = value
+        return self.weighted
+
+# ========== INCREMENTAL INDICATORS ==========
+
+class IncrementalSMA:
+    """Streaming SMA - matches indicators.SMA"""
+
+    def __init__(self, period=14):
+        self.state = _RollingSum(period)
+
+    def update(self, close):
+        self.state.update(close)
+        return self.state.mean()
+
+class IncrementalEMA:
+    """Streaming EMA - matches indicators.EMA"""
+
+    def __init__(self, period=14):
+        self.state = _EWMean(period)
+
+    def update(self, close):
+        return self.state.update(close)
+
+class IncrementalRSI:
+    """Streaming RSI - matches indicators.RSI"""
+
+    def __init__(self, period=14):
+        self.prev_close = NAN
+        self.gains = _RollingSum(period)
+        self.losses = _RollingSum(period)
+
+    def update(self, close):
+        delta = close - self.prev_close
+        self.prev_close = close
+        if delta != delta:
+            gain = loss = NAN
+        else:
+            gain = max(delta, 0.0)
+            loss = -min(delta, 0.0)
+        self.gains.update(gain)
+        self.losses.update(loss)
+
+        rs = _div(self.gains.mean(), self.losses.mean())
+        return 100 - _div(100, 1 + rs)
+
+class IncrementalATR:
+    """Streaming ATR - matches indicators.ATR"""
+
+    def __init__(self, period=14):
+        self.prev_close = NAN
+        self.ranges = _RollingSum(period)
+
+    def update(self, high, low, close):
+        # Skip the NaN gaps like ranges.max(axis=1) does on the first bar
+        candidates = [high - low, abs(high - self.prev_close), abs(low - self.prev_close)]
+        candidates = [v for v in candidates if v == v]
+        self.prev_close = close
+        self.ranges.update(max(candidates) if candidates else NAN)
+        return self.ranges.mean()
+
+class IncrementalMACD:
+    """Streaming MACD - matches indicators.MACD"""
+
+    def __init__(self, fast=12, slow=26, signal=9):
+        self.fast = _EWMean(fast)
+        self.slow = _EWMean(slow)
+        self.signal = _EWMean(signal)
+
+    def update(self, close):
+        macd_line = self.fast.update(close) - self.slow.update(close)
+        signal_line = self.signal.update(macd_line)
+        return macd_line, signal_line, macd_line - signal_line
+
+class IncrementalBollinger:
+    """Streaming Bollinger Bands - matches indicators.BOLLINGER_BANDS"""
+
+    def __init__(self, period=20, std_dev=2):
+        self.std_dev = std_dev
+        self.mean = _RollingSum(period)
+        self.var = _RollingVar(period)
+
+    def update(self, close):
+        self.mean.update(close)
+        self.var.update(close)
+        sma = self.mean.mean()
+        std = self.var.std()
+        return sma + std * self.std_dev, sma, sma - std * self.std_dev
+
+class IncrementalStochRSI:
+    """Streaming Stochastic RSI - matches indicators.STOCHASTIC_RSI"""
+
+    def __init__(self, period=14, smooth_k=3, smooth_d=3):
+        self.rsi = IncrementalRSI(period)
+        self.min_rsi = _RollingExtreme(period, "min")
+        self.max_rsi = _RollingExtreme(period, "max")
+        self.k = _RollingSum(smooth_k)
+        self.d = _RollingSum(smooth_d)
+
+    def update(self, close):
+        rsi = self.rsi.update(close)
+        self.min_rsi.update(rsi)
+        self.max_rsi.update(rsi)
+        low, high = self.min_rsi.value(), self.max_rsi.value()
+
+        self.k.update(_div(rsi - low, high - low))
+        k_line = self.k.mean()
+        self.d.update(k_line)
+        return k_line, self.d.mean()
+
+class IncrementalVWAP:
+    """Streaming rolling VWAP - matches indicators.VWAP"""
+
+    def __init__(self, period=20):
+        self.price_volume = _RollingSum(period)
+        self.volume = _RollingSum(period)
+
+    def update(self, high, low, close, volume):
+        hlc3 = (high + low + close) / 3
+        self.price_volume.update(hlc3 * volume)
+        self.volume.update(volume)
+        return _div(self.price_volume.sum(), self.volume.sum())
+
+# ========== ENGINE ==========
+
+INDICATOR_COLUMNS = [
+    "SMA", "EMA", "RSI", "ATR",
+    "MACD", "MACD_Signal", "MACD_Hist",
+    "BB_Upper", "BB_Middle", "BB_Lower",
+    "Stoch_K", "Stoch_D",
+    "VWAP",
+]
+
+class IncrementalIndicators:
+    """
+    Keeps rolling state for every dashboard indicator and updates it in
+    O(1) per new bar. Output columns match the batch functions in
+    features/indicators.py as used by app.py.
+    """
+
+    def __init__(self):
+        self.sma = IncrementalSMA()
+        self.ema = IncrementalEMA()
+        self.rsi = IncrementalRSI()
+        self.atr = IncrementalATR()
+        self.macd = IncrementalMACD()
+        self.bollinger = IncrementalBollinger()
+        self.stoch_rsi = IncrementalStochRSI()
+        self.vwap = IncrementalVWAP()
+        self.last_timestamp = None
+
+    def update(self, high, low, close, volume=0.0, timestamp=None):
+        """Feed one closed bar and return the indicator values for it"""
+        macd, macd_signal, macd_hist = self.macd.update(close)
+        bb_upper, bb_middle, bb_lower = self.bollinger.update(close)
+        stoch_k, stoch_d = self.stoch_rsi.update(close)
+        if timestamp is not None:
+            self.last_timestamp = timestamp
+
+        return {
+            "SMA": self.sma.update(close),
+            "EMA": self.ema.update(close),
+            "RSI": self.rsi.update(close),
+            "ATR": self.atr.update(high, low, close),
+            "MACD": macd,
+            "MACD_Signal": macd_signal,
+            "MACD_Hist": macd_hist,
+            "BB_Upper": bb_upper,
+            "BB_Middle": bb_middle,
+            "BB_Lower": bb_lower,
+            "Stoch_K": stoch_k,
+            "Stoch_D": stoch_d,
+            "VWAP": self.vwap.update(high, low, close, volume),
+        }
+
+    def preview(self, high, low, close, volume=0.0):
+        """
+        Indicator values for a still-forming bar, without committing it
+
+        Runs update on a copy of the state (tens of microseconds), so the
+        same bar can be previewed again as it changes and fed to update
+        once it closes.
+        """
+        return _clone(self).update(high, low, close, volume)
+
+    def append(self, df):
+        """
+        Feed new bars and return their indicator rows
+
+        Bars at or before the last seen timestamp are skipped, so the full
+        frame can be passed again after a refetch.
+
+        Args:
+            df: DataFrame with high/low/close (and optional volume) columns
+
+        Returns:
+            DataFrame of indicator columns for the bars that were new
+        """
+        if self.last_timestamp is not None and len(df):
+            df = df[df.index > self.last_timestamp]
+
+        high = df["high"].to_numpy(dtype=float)
+        low = df["low"].to_numpy(dtype=float)
+        close = df["close"].to_numpy(dtype=float)
+        if "volume" in df.columns:
+            volume = df["volume"].to_numpy(dtype=float)
+        else:
+            volume = np.zeros(len(df))
+
+        rows = [
+            self.update(float(h), float(l), float(c), float(v))
+            for h, l, c, v in zip(high, low, close, volume)
+        ]
+        if len(df):
+            self.last_timestamp = df.index[-1]
+
+        return pd.DataFrame(rows, index=df.index, columns=INDICATOR_COLUMNS)
+
+    @classmethod
+    def from_history(cls, df):
+        """Bootstrap state from historical bars; returns (engine, indicator frame)"""
+        engine = cls()
+        return engine, engine.append(df)
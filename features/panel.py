@@ -0,0 +1,107 @@
+import time
+
+import pandas as pd
+import numpy as np
+
+from features.pipeline import compute_panel_indicators
+from inference.trade_logic import confirmation_scores
+
+class SymbolPanel:
+    """
+    Several symbols' bars side by side as (bars, symbols) arrays.
+
+    Columns are aligned on each symbol's own last bar rather than on
+    clock time, so instruments with different sessions (spot metals, ETF
+    proxies, futures) need no gap filling; shorter histories are padded
+    with NaN in front. `times` holds each cell's bar timestamp.
+    """
+
+    def __init__(self, symbols, times, arrays):
+        self.symbols = list(symbols)
+        self.times = times
+        self.arrays = arrays
+
+    @classmethod
+    def from_frames(cls, frames, length=None):
+        """
+        Build from a dict of symbol -> OHLC(V) DataFrame
+
+        Args:
+            frames: dict of symbol -> DataFrame indexed by datetime
+            length: Keep only the last `length` bars of each symbol
+
+        Returns:
+            SymbolPanel
+        """
+        symbols = [symbol for symbol, df in frames.items() if df is not None and len(df)]
+        n = max((len(frames[s]) for s in symbols), default=0)
+        n = min(n, length) if length else n
+        columns = ["open", "high", "low", "close"]
+        if symbols and all("volume" in frames[s].columns for s in symbols):
+            columns.append("volume")
+
+        times = np.full((n, len(symbols)), np.datetime64("NaT"), dtype="datetime64[ns]")
+        arrays = {col: np.full((n, len(symbols)), np.nan) for col in columns}
+        for j, symbol in enumerate(symbols):
+            df = frames[symbol].iloc[-n:] if n else frames[symbol].iloc[:0]
+            rows = slice(n - len(df), n)
+            times[rows, j] = df.index.values.astype("datetime64[ns]")
+            for col in columns:
+                arrays[col][rows, j] = df[col].to_numpy(dtype=float)
+        return cls(symbols, times, arrays)
+
+    def __len__(self):
+        return len(self.times)
+
+    def frame(self, symbol):
+        """One symbol's bars and computed columns as a DataFrame, without padding"""
+        j = self.symbols.index(symbol)
+        valid = ~np.isnat(self.times[:, j])
+        return pd.DataFrame(
+            {name: values[valid, j] for name, values in self.arrays.items()},
+            index=pd.DatetimeIndex(self.times[valid, j], name="datetime"),
+        )
+
+    def latest(self):
+        """Last bar of every symbol: DataFrame indexed by symbol (empty without bars)"""
+        if len(self):
+            last = {name: values[-1] for name, values in self.arrays.items()}
+            times = pd.DatetimeIndex(self.times[-1])
+        else:
+            last = {name: np.full(len(self.symbols), np.nan) for name in self.arrays}
+            times = pd.DatetimeIndex(np.full(len(self.symbols), np.datetime64("NaT"), dtype="datetime64[ns]"))
+        table = pd.DataFrame(last, index=self.symbols)
+        table.insert(0, "time", times)
+        table.index.name = "symbol"
+        return table
+
+def compute_panel(frames, spec=None, length=None):
+    """
+    Indicators and confirmation scores for several symbols in one pass
+
+    Args:
+        frames: dict of symbol -> OHLC(V) DataFrame
+        spec: Indicator spec (default pipeline.DEFAULT_SPEC)
+        length: Bars per symbol to keep
+
+    Returns:
+        (SymbolPanel with indicator and "confidence" arrays, dict of stage -> seconds);
+        with no bars at all the arrays are empty
+    """
+    panel = SymbolPanel.from_frames(frames, length)
+    outputs, timings = compute_panel_indicators(panel.arrays, spec)
+    panel.arrays.update(outputs)
+
+    start = time.perf_counter()
+    arrays = panel.arrays
+    has_ma = "EMA" in arrays and "SMA" in arrays
+    arrays["confidence"] = confirmation_scores(
+        arrays["close"], arrays["high"], arrays["low"],
+        rsi=arrays.get("RSI"),
+        ema=arrays["EMA"] if has_ma else None,
+        sma=arrays["SMA"] if has_ma else None,
+        atr=arrays.get("ATR"),
+        atr_mean=arrays.get("ATR_Mean"),
+    )
+    timings["confidence"] = time.perf_counter() - start
+    return panel, timings
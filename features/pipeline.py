@@ -0,0 +1,210 @@
+import time
+
+import pandas as pd
+import numpy as np
+
+from profiling import timed
+
+# Indicator -> parameters; the defaults app.py has always used
+DEFAULT_SPEC = {
+    "SMA": {"period": 14},
+    "EMA": {"period": 14},
+    "RSI": {"period": 14},
+    "ATR": {"period": 14},
+    "ATR_MEAN": {"period": 14, "window": 20},
+    "MACD": {"fast": 12, "slow": 26, "signal": 9},
+    "BOLLINGER_BANDS": {"period": 20, "std_dev": 2},
+    "STOCHASTIC_RSI": {"period": 14, "smooth_k": 3, "smooth_d": 3},
+    "VWAP": {"period": 20},
+}
+
+# ========== NUMPY KERNELS ==========
+# Rolling and EWM windows run on pandas' compiled O(n) kernels over bare
+# arrays (no index alignment), which keeps outputs bit-identical to
+# features/indicators.py; everything else is plain numpy. Arrays are
+# either one series (n,) or a panel of series side by side (n, k), which
+# pandas windows column by column.
+
+def _frame(values):
+    if values.ndim == 1:
+        return pd.Series(values, copy=False)
+    return pd.DataFrame(values, copy=False)
+
+def _rolling(values, window, how):
+    return getattr(_frame(values).rolling(window), how)().to_numpy()
+
+def _rolling_mean(values, window):
+    return _rolling(values, window, "mean")
+
+def _ewm_mean(values, span):
+    return _frame(values).ewm(span=span).mean().to_numpy()
+
+def _divide(a, b):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return a / b
+
+# ========== SHARED INTERMEDIATES ==========
+
+class _Intermediates:
+    """
+    Memoised intermediates for one frame (or a dict of panel arrays).
+
+    Every node is keyed by its name and parameters, so an intermediate
+    needed by several indicators (EMAs, RSI, true range, ATR) is computed
+    once, however many indicators depend on it.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        self.cache = {}
+
+    def get(self, key, build):
+        if key not in self.cache:
+            self.cache[key] = build()
+        return self.cache[key]
+
+    def column(self, name):
+        return self.get(("column", name), lambda: np.asarray(self.df[name], dtype=float))
+
+    def ema(self, source, span):
+        return self.get(("ema", source, span), lambda: _ewm_mean(self.column(source), span))
+
+    def rsi(self, period):
+        def build():
+            close = self.column("close")
+            delta = np.full(close.shape, np.nan)
+            delta[1:] = close[1:] - close[:-1]
+            gain = np.where(np.isnan(delta), np.nan, np.maximum(delta, 0))
+            loss = np.where(np.isnan(delta), np.nan, -np.minimum(delta, 0))
+            rs = _divide(_rolling_mean(gain, period), _rolling_mean(loss, period))
+            return 100 - _divide(100, 1 + rs)
+        return self.get(("rsi", period), build)
+
+    def true_range(self):
+        def build():
+            high, low, close = self.column("high"), self.column("low"), self.column("close")
+            prev_close = np.full(close.shape, np.nan)
+            prev_close[1:] = close[:-1]
+            ranges = np.stack([high - low, np.abs(high - prev_close), np.abs(low - prev_close)])
+            # fmax skips the missing previous close like ranges.max(axis=1)
+            return np.fmax.reduce(ranges, axis=0)
+        return self.get(("true_range",), build)
+
+    def atr(self, period):
+        return self.get(("atr", period), lambda: _rolling_mean(self.true_range(), period))
+
+# ========== INDICATORS ==========
+
+def _sma(nodes, period=14):
+    return {"SMA": nodes.get(("sma", period), lambda: _rolling_mean(nodes.column("close"), period))}
+
+def _ema(nodes, period=14):
+    return {"EMA": nodes.ema("close", period)}
+
+def _rsi(nodes, period=14):
+    return {"RSI": nodes.rsi(period)}
+
+def _atr(nodes, period=14):
+    return {"ATR": nodes.atr(period)}
+
+def _atr_mean(nodes, period=14, window=20):
+    return {"ATR_Mean": _rolling_mean(nodes.atr(period), window)}
+
+def _macd(nodes, fast=12, slow=26, signal=9):
+    macd_line = nodes.ema("close", fast) - nodes.ema("close", slow)
+    signal_line = _ewm_mean(macd_line, signal)
+    return {"MACD": macd_line, "MACD_Signal": signal_line, "MACD_Hist": macd_line - signal_line}
+
+def _bollinger(nodes, period=20, std_dev=2):
+    close = nodes.column("close")
+    sma = _rolling_mean(close, period)
+    std = _rolling(close, period, "std")
+    return {"BB_Upper": sma + std * std_dev, "BB_Middle": sma, "BB_Lower": sma - std * std_dev}
+
+def _stochastic_rsi(nodes, period=14, smooth_k=3, smooth_d=3):
+    rsi = nodes.rsi(period)
+    min_rsi = _rolling(rsi, period, "min")
+    max_rsi = _rolling(rsi, period, "max")
+    stoch_rsi = _divide(rsi - min_rsi, max_rsi - min_rsi)
+    k_line = _rolling_mean(stoch_rsi, smooth_k)
+    return {"Stoch_K": k_line, "Stoch_D": _rolling_mean(k_line, smooth_d)}
+
+def _vwap(nodes, period=20):
+    if "volume" not in nodes.df:
+        return {}
+    high, low, close = nodes.column("high"), nodes.column("low"), nodes.column("close")
+    volume = nodes.column("volume")
+    hlc3 = (high + low + close) / 3
+    return {"VWAP": _divide(_rolling(hlc3 * volume, period, "sum"), _rolling(volume, period, "sum"))}
+
+INDICATORS = {
+    "SMA": _sma,
+    "EMA": _ema,
+    "RSI": _rsi,
+    "ATR": _atr,
+    "ATR_MEAN": _atr_mean,
+    "MACD": _macd,
+    "BOLLINGER_BANDS": _bollinger,
+    "STOCHASTIC_RSI": _stochastic_rsi,
+    "VWAP": _vwap,
+}
+
+def _run(nodes, spec):
+    """Evaluate every indicator of spec; returns (outputs, timings)"""
+    spec = DEFAULT_SPEC if spec is None else spec
+    unknown = set(spec) - set(INDICATORS)
+    if unknown:
+        raise ValueError(f"Unknown indicators in spec: {sorted(unknown)}")
+
+    outputs = {}
+    timings = {}
+    for name, params in spec.items():
+        start = time.perf_counter()
+        outputs.update(INDICATORS[name](nodes, **(params or {})))
+        timings[name] = time.perf_counter() - start
+    return outputs, timings
+
+@timed("indicators")
+def compute_all_indicators(df, spec=None):
+    """
+    Compute every indicator in one fused pass
+
+    Shared intermediates (EMAs, RSI, true range, ATR) are computed once on
+    raw numpy arrays and reused by every indicator that needs them, and
+    all output columns are attached in a single block. Outputs match the
+    functions in features/indicators.py.
+
+    Args:
+        df: DataFrame with OHLC (and optional volume) columns
+        spec: dict of indicator name -> parameters (default DEFAULT_SPEC)
+
+    Returns:
+        (DataFrame with indicator columns added, dict of indicator -> seconds)
+    """
+    outputs, timings = _run(_Intermediates(df), spec)
+
+    start = time.perf_counter()
+    block = pd.DataFrame(outputs, index=df.index)
+    result = pd.concat([df.drop(columns=block.columns, errors="ignore"), block], axis=1)
+    timings["assign"] = time.perf_counter() - start
+
+    return result, timings
+
+@timed("indicators.panel")
+def compute_panel_indicators(arrays, spec=None):
+    """
+    Compute every indicator for many series at once
+
+    Each kernel runs once over the whole (bars, symbols) panel. Columns
+    must be aligned on their last bar with NaN padding in front (see
+    features.panel), so every column matches compute_all_indicators on
+    that symbol's own frame.
+
+    Args:
+        arrays: dict of OHLC(V) column -> (bars, symbols) float array
+        spec: dict of indicator name -> parameters (default DEFAULT_SPEC)
+
+    Returns:
+        (dict of indicator column -> (bars, symbols) array, dict of indicator -> seconds)
+    """
+    return _run(_Intermediates(arrays), spec)
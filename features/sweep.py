@@ -0,0 +1,202 @@
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import pandas as pd
+import numpy as np
+
+from features.backtest import simulate_trades, summarize_trades
+from features.pipeline import compute_all_indicators
+from inference.trade_logic import get_confirmation_scores
+from models.registry import data_fingerprint
+
+# Percentage exits, as hard-coded in the original backtest
+DEFAULT_GRID = {
+    "min_confidence": [40, 50, 60, 70],
+    "take_profit": [0.005, 0.01, 0.02, 0.03],
+    "stop_loss": [0.005, 0.01, 0.02],
+}
+
+# ATR exits, as used by trade_setup (1.2 ATR stop, 2.5 ATR target)
+ATR_GRID = {
+    "min_confidence": [40, 50, 60, 70],
+    "tp_atr": [1.5, 2.0, 2.5, 3.0, 4.0],
+    "sl_atr": [0.8, 1.2, 1.6, 2.0],
+}
+
+SWEEP_PARAMS = ("min_confidence", "take_profit", "stop_loss", "tp_atr", "sl_atr")
+
+def grid_search(grid):
+    """Every combination of a dict of parameter -> list of values"""
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*grid.values())]
+
+def random_search(space, n_samples, seed=42):
+    """
+    Random parameter sets
+
+    Args:
+        space: dict of parameter -> list of choices, or (low, high) tuple
+            sampled uniformly
+        n_samples: Number of parameter sets
+        seed: RNG seed
+
+    Returns:
+        list of parameter dicts
+    """
+    rng = np.random.default_rng(seed)
+    samples = []
+    for _ in range(n_samples):
+        params = {}
+        for name, values in space.items():
+            if isinstance(values, tuple):
+                params[name] = float(rng.uniform(*values))
+            else:
+                params[name] = values[rng.integers(len(values))]
+        samples.append(params)
+    return samples
+
+# ========== SHARED MEMORY ==========
+
+# Timeframe -> read-only (3, n) array of close, confidence and ATR
+_arrays = {}
+_segments = []
+
+def _attach(layout):
+    """Pool initializer: map the parent's shared arrays without copying them"""
+    for timeframe, (name, n) in layout.items():
+        segment = shared_memory.SharedMemory(name=name)
+        array = np.ndarray((3, n), dtype=np.float64, buffer=segment.buf)
+        array.setflags(write=False)
+        _arrays[timeframe] = array
+        _segments.append(segment)
+
+def _run_task(timeframe, params, initial_balance, data):
+    start = time.perf_counter()
+    close, scores, atr = _arrays[timeframe]
+    trades = simulate_trades(close, scores, atr, **params)
+    result = summarize_trades(trades, initial_balance)
+    del result["trades"]
+    result.update(params)
+    result["timeframe"] = timeframe
+    result["data"] = data
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+def _task_key(timeframe, params, data, initial_balance):
+    """A run's identity: timeframe, parameters, the bars' fingerprint and starting capital"""
+    return json.dumps(
+        {"timeframe": timeframe, "data": data, "initial_balance": initial_balance, **params}, sort_keys=True
+    )
+
+def _load_results(path):
+    """Rows already saved by an earlier (possibly interrupted) sweep"""
+    done = {}
+    if path and os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    continue  # partially written last line
+                params = {k: row[k] for k in SWEEP_PARAMS if k in row}
+                # Rows saved before fingerprints were recorded match nothing and rerun
+                done[_task_key(row["timeframe"], params, row.get("data"), row.get("initial_balance"))] = row
+    return done
+
+def prepare_frame(df):
+    """(3, n) array of close, confidence and ATR, computing indicators if missing"""
+    if "ATR" not in df.columns:
+        df, _ = compute_all_indicators(df)
+    return np.vstack([
+        df["close"].to_numpy(dtype=float),
+        get_confirmation_scores(df).to_numpy(dtype=float),
+        df["ATR"].to_numpy(dtype=float),
+    ])
+
+def run_sweep(frames, params_list, results_path=None, max_workers=None,
+              rank_by="return_pct", initial_balance=1000):
+    """
+    Backtest every parameter set on every timeframe in parallel
+
+    Indicators and confirmation scores are computed once per timeframe and
+    placed in shared memory, which worker processes map read-only. Each
+    finished run is appended to results_path as a JSON line, so running
+    the same sweep again skips the work already done. Saved runs are
+    keyed by a fingerprint of the timeframe's bars as well as the
+    parameters, so new data is backtested again, and only the runs this
+    call asks for are returned.
+
+    Args:
+        frames: dict of timeframe -> OHLC DataFrame (indicators optional)
+        params_list: list of backtest parameter dicts (see SWEEP_PARAMS),
+            e.g. from grid_search or random_search
+        results_path: JSON lines file to save to and resume from
+        max_workers: Worker processes (1 runs in-process)
+        rank_by: Result column to rank by, highest first
+        initial_balance: Starting capital of every run
+
+    Returns:
+        DataFrame of results ranked by rank_by
+    """
+    done = _load_results(results_path)
+    fingerprints = {timeframe: data_fingerprint(df, list(df.columns)) for timeframe, df in frames.items()}
+    tasks, rows = [], []
+    for timeframe in frames:
+        for params in params_list:
+            row = done.get(_task_key(timeframe, params, fingerprints[timeframe], initial_balance))
+            if row is None:
+                tasks.append((timeframe, params))
+            else:
+                rows.append(row)
+
+    if tasks:
+        needed = {timeframe for timeframe, _ in tasks}
+        prepared = {timeframe: prepare_frame(frames[timeframe]) for timeframe in needed}
+        out = open(results_path, "a") if results_path else None
+        segments = []
+        try:
+            def record(row):
+                rows.append(row)
+                if out:
+                    out.write(json.dumps(row) + "\n")
+                    out.flush()
+
+            max_workers = min(max_workers or os.cpu_count() or 1, len(tasks))
+            if max_workers <= 1:
+                _arrays.update(prepared)
+                try:
+                    for timeframe, params in tasks:
+                        record(_run_task(timeframe, params, initial_balance, fingerprints[timeframe]))
+                finally:
+                    _arrays.clear()
+            else:
+                layout = {}
+                for timeframe, array in prepared.items():
+                    segment = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+                    segments.append(segment)
+                    np.ndarray(array.shape, dtype=np.float64, buffer=segment.buf)[:] = array
+                    layout[timeframe] = (segment.name, array.shape[1])
+
+                with ProcessPoolExecutor(max_workers, initializer=_attach, initargs=(layout,)) as pool:
+                    futures = [
+                        pool.submit(_run_task, timeframe, params, initial_balance, fingerprints[timeframe])
+                        for timeframe, params in tasks
+                    ]
+                    for future in as_completed(futures):
+                        record(future.result())
+        finally:
+            if out:
+                out.close()
+            for segment in segments:
+                segment.close()
+                segment.unlink()
+
+    table = pd.DataFrame(rows)
+    if len(table):
+        table = table.sort_values(rank_by, ascending=False, ignore_index=True)
+        table.index.name = "rank"
+    return table
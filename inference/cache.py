@@ -0,0 +1,180 @@
+import threading
+import time
+from collections import OrderedDict
+from types import MappingProxyType
+
+import pandas as pd
+import numpy as np
+
+from features.pipeline import compute_all_indicators
+from inference.trade_logic import analyze
+from profiling import span
+
+class AnalysisCache:
+    """
+    Process-wide cache of indicator frames and trade analyses.
+
+    Entries are keyed by (symbol, interval, last bar timestamp) and also
+    remember the last bar's values, so a still-forming candle that has
+    changed is recomputed. Every caller gets the same read-only entry
+    (no per-session copy): the analysis is a mappingproxy, and the frame
+    must be treated as immutable (copy-on-write, always on from pandas 3,
+    keeps derived frames from writing into it). Concurrent requests for
+    the same key compute it once; the least recently used entries beyond
+    max_entries are evicted, and a new bar replaces the previous bar's
+    entry.
+    """
+
+    def __init__(self, max_entries=64, spec=None, **analysis_params):
+        self.max_entries = max_entries
+        self.spec = spec
+        self.analysis_params = analysis_params
+        self.entries = OrderedDict()
+        # (symbol, interval) -> entry of the streamed forming bar, see get_live
+        self.live = {}
+        self.lock = threading.Lock()
+        self._key_locks = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _lookup(self, key, tail):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry["tail"] != tail:
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def _key_lock(self, key):
+        with self.lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def get(self, symbol, interval, df):
+        """
+        Indicator frame and trade analysis of df, computed once per bar
+
+        Args:
+            symbol: Instrument of df
+            interval: Timeframe of df
+            df: OHLC(V) DataFrame as fetched
+
+        Returns:
+            read-only mapping with frame, analysis, timings, key and
+            computed_at
+        """
+        key = (symbol, interval, df.index[-1])
+        tail = tuple(df.iloc[-1])
+        entry = self._lookup(key, tail)
+        if entry is not None:
+            return entry
+
+        with self._key_lock(key):
+            # Another session may have computed it while we waited
+            entry = self._lookup(key, tail)
+            if entry is not None:
+                return entry
+
+            start = time.perf_counter()
+            with span("analysis_cache.compute", symbol=symbol, interval=interval):
+                frame, timings = compute_all_indicators(df, self.spec)
+                analysis = analyze(frame, **self.analysis_params)
+            entry = MappingProxyType({
+                "frame": frame,
+                "analysis": MappingProxyType(analysis),
+                "timings": MappingProxyType(timings),
+                "key": key,
+                "tail": tail,
+                "computed_at": time.time(),
+                "compute_seconds": time.perf_counter() - start,
+            })
+            self._insert(key, entry)
+        return entry
+
+    def get_live(self, symbol, interval, df, forming):
+        """
+        get() of df with the tick stream's forming bar on top
+
+        The closed bars go through get(), so the indicator pipeline runs
+        once per bar. The forming bar comes with the stream's incremental
+        indicators and confidence: its row is appended to the cached
+        frame and only the trade analysis is recomputed, once per change
+        of the bar.
+
+        Args:
+            symbol: Instrument of df
+            interval: Timeframe of df
+            df: OHLC(V) DataFrame as fetched; bars at or after the forming
+                one are left out
+            forming: dict from StreamIngest.forming()
+
+        Returns:
+            read-only mapping like get(), whose frame ends with the
+            forming bar
+        """
+        closed = df[df.index < forming["time"]]
+        if len(closed) == 0:
+            return self.get(symbol, interval, df)
+        base = self.get(symbol, interval, closed)
+
+        # The stream keeps one forming dict per change, so identity is enough
+        with self.lock:
+            entry = self.live.get((symbol, interval))
+            if entry is not None and entry["forming"] is forming and entry["base"] is base:
+                self.hits += 1
+                return entry
+
+        start = time.perf_counter()
+        with span("analysis_cache.live", symbol=symbol, interval=interval):
+            frame = base["frame"]
+            row = pd.DataFrame(
+                [[forming.get(col, np.nan) for col in frame.columns]],
+                index=pd.DatetimeIndex([forming["time"]], name=frame.index.name),
+                columns=frame.columns,
+            )
+            frame = pd.concat([frame, row])
+            analysis = analyze(frame, confidence=forming["confidence"], **self.analysis_params)
+        entry = MappingProxyType({
+            "frame": frame,
+            "analysis": MappingProxyType(analysis),
+            "timings": base["timings"],
+            "key": (symbol, interval, forming["time"]),
+            "base": base,
+            "forming": forming,
+            "computed_at": time.time(),
+            "compute_seconds": time.perf_counter() - start,
+        })
+        with self.lock:
+            self.live[(symbol, interval)] = entry
+        return entry
+
+    def _insert(self, key, entry):
+        with self.lock:
+            self.misses += 1
+            # A newer bar supersedes older entries of the same symbol and interval
+            for stale in [k for k in self.entries if k[:2] == key[:2] and k != key]:
+                del self.entries[stale]
+                self._key_locks.pop(stale, None)
+                self.evictions += 1
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                evicted, _ = self.entries.popitem(last=False)
+                self._key_locks.pop(evicted, None)
+                self.evictions += 1
+
+    def stats(self):
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.live.clear()
+            self._key_locks.clear()
@@ -0,0 +1,204 @@
+"""
+Multi-timeframe confluence
+
+Runs the dashboard's bias rule, confirmation score and indicator states
+for every timeframe at once and sums them into one aggregate score, so a
+trade_setup signal on one timeframe can be checked against the others.
+The timeframes are fetched in parallel and scored as columns of one
+panel (features.panel), so each indicator kernel runs once for all of
+them. Run from the repo root:
+
+    python -m inference.confluence [--symbol XAU/USD] [--timeframes 5m 15m 1H 4H]
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import numpy as np
+
+from config import TIMEFRAMES, SYMBOL
+from data.fetch_data import fetch_timeframe
+from features.panel import compute_panel
+
+# Per-timeframe votes: +1 bullish, -1 bearish, 0 neutral or unknown
+VOTES = ["bias", "trend", "macd"]
+
+def _label(conditions, labels, default="n/a"):
+    """Label of the first true condition per element (NaN compares false, so unknown)"""
+    return np.select(conditions, labels, default=default)
+
+def _bias(close, lookback, threshold):
+    """market_bias of every panel column from its last lookback + 1 closes"""
+    n, k = close.shape
+    bars = (~np.isnan(close)).sum(axis=0)
+    if n <= lookback:
+        return np.full(k, "Neutral", dtype=object)
+    recent = close[-lookback - 1:]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_return = (recent[1:] / recent[:-1] - 1).mean(axis=0)
+    bias = _label(
+        [mean_return > threshold, mean_return < -threshold],
+        ["Bullish", "Bearish"],
+        default="Neutral",
+    ).astype(object)
+    bias[bars <= lookback] = "Neutral"
+    return bias
+
+def confluence_matrix(frames, min_confidence=50, lookback=50, threshold=0.0001, weights=None,
+                      min_score=25, spec=None, length=None):
+    """
+    Signal, confidence and indicator states of several timeframes, side by side
+
+    Each row matches what the dashboard shows for that timeframe: bias is
+    market_bias, confidence is get_confirmation_score and status is the
+    trade_setup status of the last bar. The direction of a timeframe is
+    the mean of its bias, trend (EMA vs SMA) and MACD votes; the
+    aggregate score is the weighted mean direction of all timeframes.
+
+    Args:
+        frames: dict of timeframe name -> OHLC(V) DataFrame
+        min_confidence: Confidence trade_setup needs for a signal
+        lookback: Bars market_bias averages returns over
+        threshold: Mean return market_bias calls a bias
+        weights: dict of timeframe name -> weight (default equal)
+        min_score: Aggregate score (in points) needed to call a bias
+        spec: Indicator spec (default pipeline.DEFAULT_SPEC)
+        length: Bars per timeframe to compute indicators over (default all)
+
+    Returns:
+        (DataFrame indexed by timeframe, dict with score (-100 to 100),
+        bias, agreement, signal and timings)
+    """
+    start = time.perf_counter()
+    frames = {name: df for name, df in frames.items() if df is not None and len(df)}
+    if not frames:
+        empty = pd.DataFrame(index=pd.Index([], name="timeframe"))
+        return empty, {"score": 0.0, "bias": "Neutral", "agreement": 0.0, "signal": "NONE", "timings": {}}
+    panel, timings = compute_panel(frames, spec, length)
+    arrays = panel.arrays
+    last = {name: values[-1] for name, values in arrays.items()}
+
+    def column(name):
+        return last.get(name, np.full(len(panel.symbols), np.nan))
+
+    close = last["close"]
+    confidence = last["confidence"]
+    bias = _bias(arrays["close"], lookback, threshold)
+    rsi, ema, sma = column("RSI"), column("EMA"), column("SMA")
+    macd, macd_signal = column("MACD"), column("MACD_Signal")
+    atr, atr_mean = column("ATR"), column("ATR_Mean")
+    bb_upper, bb_lower = column("BB_Upper"), column("BB_Lower")
+
+    # trade_setup: low confidence waits, otherwise the bias decides
+    status = np.where(
+        confidence < min_confidence, "WAIT",
+        _label([bias == "Bullish", bias == "Bearish"], ["BUY", "SELL"], default="NEUTRAL"),
+    )
+
+    matrix = pd.DataFrame({
+        "time": pd.DatetimeIndex(panel.times[-1]),
+        "close": close,
+        "bias": bias,
+        "status": status,
+        "confidence": confidence,
+        "RSI": rsi,
+        "rsi_state": _label([rsi > 70, rsi < 30, rsi >= 30], ["Overbought", "Oversold", "Neutral"]),
+        "trend": _label([ema > sma, ema <= sma], ["Bullish", "Bearish"]),
+        "macd": _label([macd > macd_signal, macd <= macd_signal], ["Bullish", "Bearish"]),
+        "bollinger": _label(
+            [close > bb_upper, close < bb_lower, bb_upper >= close], ["Above upper", "Below lower", "Within"]
+        ),
+        "Stoch_K": column("Stoch_K"),
+        "atr": _label([atr > atr_mean, atr <= atr_mean], ["Expanding", "Contracting"]),
+    }, index=pd.Index(panel.symbols, name="timeframe"))
+
+    votes = np.stack([
+        matrix[name].map({"Bullish": 1, "Bearish": -1}).fillna(0).to_numpy(dtype=float) for name in VOTES
+    ])
+    matrix["direction"] = votes.mean(axis=0)
+
+    w = np.array([(weights or {}).get(name, 1.0) for name in panel.symbols], dtype=float)
+    score = float(100 * (w * matrix["direction"]).sum() / w.sum()) if w.sum() else 0.0
+    overall = "Bullish" if score >= min_score else "Bearish" if score <= -min_score else "Neutral"
+    sign = {"Bullish": 1, "Bearish": -1, "Neutral": 0}[overall]
+    agreement = float((np.sign(matrix["direction"]) == sign).mean()) if len(matrix) else 0.0
+
+    # A signal only when every timeframe with one points the same way
+    signals = set(matrix["status"]) & {"BUY", "SELL"}
+    signal = signals.pop() if len(signals) == 1 else "MIXED" if signals else "NONE"
+
+    timings["confluence"] = time.perf_counter() - start
+    summary = {
+        "score": round(score, 2),
+        "bias": overall,
+        "agreement": round(agreement * 100, 2),
+        "signal": signal,
+        "timings": timings,
+    }
+    return matrix, summary
+
+def fetch_frames(timeframes=None, symbol=SYMBOL, outputsize=300, fetch=fetch_timeframe, max_workers=4):
+    """
+    Bars of several timeframes, fetched concurrently
+
+    Args:
+        timeframes: dict of name -> TwelveData interval (default config.TIMEFRAMES)
+        symbol: Instrument
+        outputsize: Bars per timeframe
+        fetch: fetch_timeframe or a function with its signature
+        max_workers: Number of fetches in flight at once
+
+    Returns:
+        (dict of name -> DataFrame, dict of name -> error for failed timeframes)
+    """
+    timeframes = dict(TIMEFRAMES if timeframes is None else timeframes)
+    if not timeframes:
+        return {}, {}
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(timeframes))) as pool:
+        futures = {
+            name: pool.submit(fetch, interval, outputsize, symbol=symbol)
+            for name, interval in timeframes.items()
+        }
+        frames, errors = {}, {}
+        for name, future in futures.items():
+            try:
+                df, error = future.result()
+            except Exception as e:
+                df, error = None, str(e)
+            if error or df is None or len(df) == 0:
+                errors[name] = error or "No data available"
+            else:
+                frames[name] = df
+    return frames, errors
+
+def confluence(timeframes=None, symbol=SYMBOL, outputsize=300, fetch=fetch_timeframe, max_workers=4, **kwargs):
+    """
+    fetch_frames, then confluence_matrix (extra keyword arguments go to it)
+
+    Returns:
+        (matrix, summary, dict of name -> error for timeframes left out)
+    """
+    frames, errors = fetch_frames(timeframes, symbol, outputsize, fetch, max_workers)
+    matrix, summary = confluence_matrix(frames, **kwargs)
+    return matrix, summary, errors
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--symbol", default=SYMBOL)
+    parser.add_argument("--timeframes", nargs="+", default=list(TIMEFRAMES), choices=list(TIMEFRAMES))
+    parser.add_argument("--min-confidence", type=float, default=50)
+    parser.add_argument("--outputsize", type=int, default=300)
+    args = parser.parse_args()
+
+    matrix, summary, errors = confluence(
+        {name: TIMEFRAMES[name] for name in args.timeframes}, args.symbol, args.outputsize,
+        min_confidence=args.min_confidence,
+    )
+    with pd.option_context("display.width", 200, "display.max_columns", None):
+        print(matrix.round(dict.fromkeys(matrix.select_dtypes("number").columns, 2)))
+    print(f"\nScore {summary['score']:+.1f} ({summary['bias']}), {summary['agreement']:.0f}% agreement, "
+          f"signal {summary['signal']}")
+    for name, error in errors.items():
+        print(f"{name}: {error}")
@@ -0,0 +1,139 @@
+"""
+Headless signal scanner
+
+Runs the dashboard pipeline (fetch, indicators, bias, trade_setup,
+RiskManager) for every configured timeframe when its bar closes and
+writes one JSON line per closed bar. Run from the repo root:
+
+    python -m inference.scanner [--once] [--intervals 5min 1h] [--output signals.jsonl]
+"""
+import argparse
+import json
+import sys
+import time
+
+import pandas as pd
+
+from config import TIMEFRAMES, SYMBOL, SESSION_OFFSETS
+from data.fetch_data import fetch_timeframe
+from data.resample import bar_duration, next_bar_close
+from inference.cache import AnalysisCache
+
+class SignalScanner:
+    """
+    Scans timeframes on bar close and emits trade analyses as JSON lines.
+
+    Data comes from fetch_timeframe, so one 1-minute delta request per
+    cycle feeds every interval through the local store and resample
+    cache. Indicators and analyses are kept in an AnalysisCache and only
+    recomputed when a new bar has closed; a bar is emitted once.
+    """
+
+    def __init__(self, intervals=None, outputsize=300, min_confidence=50, grace=5.0,
+                 account_balance=1000, out=None, fetch=fetch_timeframe, offsets=None):
+        self.intervals = list(intervals or TIMEFRAMES.values())
+        self.outputsize = outputsize
+        self.min_confidence = min_confidence
+        self.grace = grace
+        self.account_balance = account_balance
+        self.out = out or sys.stdout
+        self.fetch = fetch
+        self.offsets = SESSION_OFFSETS if offsets is None else offsets
+        self.cache = AnalysisCache(
+            max_entries=len(self.intervals),
+            min_confidence=min_confidence,
+            account_balance=account_balance,
+        )
+        self.emitted = {}
+
+    def _now(self):
+        return pd.Timestamp.now(tz="UTC").tz_localize(None)
+
+    def _closed_bars(self, interval, now):
+        """Bars up to the last closed one, or (None, error)"""
+        # The base refresh is reused by the other intervals of the same cycle
+        df, error = self.fetch(interval, self.outputsize, max_age=self.grace)
+        if error:
+            return None, error
+
+        df = df[df.index + bar_duration(interval) <= now]
+        if len(df) == 0:
+            return None, "No closed bars"
+        return df, None
+
+    def scan(self, intervals=None, now=None):
+        """
+        Analyze the last closed bar of each interval and emit the new ones
+
+        Returns:
+            list of emitted records
+        """
+        now = now or self._now()
+        records = []
+        for interval in intervals or self.intervals:
+            start = time.perf_counter()
+            try:
+                df, error = self._closed_bars(interval, now)
+            except Exception as e:
+                df, error = None, str(e)
+
+            if error:
+                record = {"interval": interval, "error": error}
+            else:
+                bar_time = df.index[-1]
+                previous = self.emitted.get(interval)
+                if previous is not None and bar_time <= previous:
+                    continue
+                record = {"interval": interval, "bar_time": bar_time.isoformat()}
+                record.update(self.cache.get(SYMBOL, interval, df)["analysis"])
+                self.emitted[interval] = bar_time
+
+            record["scanned_at"] = now.isoformat()
+            record["seconds"] = round(time.perf_counter() - start, 4)
+            self.out.write(json.dumps(record) + "\n")
+            self.out.flush()
+            records.append(record)
+        return records
+
+    def next_close(self, now):
+        """(close time, intervals closing then) of the earliest upcoming bar close"""
+        closes = {interval: next_bar_close(interval, now, self.offsets) for interval in self.intervals}
+        first = min(closes.values())
+        return first, [interval for interval, close in closes.items() if close == first]
+
+    def run(self, max_cycles=None):
+        """Scan everything once, then each interval again shortly after its bar closes"""
+        self.scan()
+        cycles = 0
+        while max_cycles is None or cycles < max_cycles:
+            close, due = self.next_close(self._now())
+            # Wait past the close so the provider has published the bar
+            wait = (close - self._now()).total_seconds() + self.grace
+            if wait > 0:
+                time.sleep(wait)
+            self.scan(due, now=self._now())
+            cycles += 1
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--intervals", nargs="+", default=list(TIMEFRAMES.values()))
+    parser.add_argument("--once", action="store_true", help="scan once and exit")
+    parser.add_argument("--output", help="append JSON lines to this file instead of stdout")
+    parser.add_argument("--min-confidence", type=float, default=50)
+    parser.add_argument("--outputsize", type=int, default=300)
+    parser.add_argument("--grace", type=float, default=5.0,
+                        help="seconds to wait after a bar closes before scanning it")
+    args = parser.parse_args()
+
+    out = open(args.output, "a") if args.output else sys.stdout
+    scanner = SignalScanner(args.intervals, args.outputsize, args.min_confidence, args.grace, out=out)
+    try:
+        if args.once:
+            scanner.scan()
+        else:
+            scanner.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if out is not sys.stdout:
+            out.close()
@@ -1,6 +1,12 @@
 import pandas as pd
 import numpy as np
 
+from profiling import timed
+
+# Confidence for every possible confirmation total (0, 0.5, ..., 6),
+# rounded exactly like get_confirmation_score does it
+_CONFIDENCE_TABLE = np.array([round((k * 0.5 / 6) * 100, 2) for k in range(13)])
+
 class RiskManager:
     def __init__(self, account_balance=1000, max_risk_per_trade=0.02):
         self.account_balance = account_balance
@@ -26,6 +32,7 @@ class RiskManager:
         risk = abs(entry - stop_loss)
         return entry + (risk * 2)
 
+@timed("confirmation_score")
 def get_confirmation_score(df):
     """Score trade setup based on indicator confluence"""
     if len(df) < 2:
@@ -56,7 +63,10 @@ def get_confirmation_score(df):
         # 4. ATR expansion
         if 'ATR' in df.columns:
             atr_current = df['ATR'].iloc[-1]
-            atr_mean = df['ATR'].rolling(20).mean().iloc[-1]
+            if 'ATR_Mean' in df.columns:
+                atr_mean = df['ATR_Mean'].iloc[-1]
+            else:
+                atr_mean = df['ATR'].rolling(20).mean().iloc[-1]
             if pd.notna(atr_current) and pd.notna(atr_mean):
                 if atr_current > atr_mean:
                     confirmations += 0.5
@@ -84,7 +94,116 @@ def get_confirmation_score(df):
     confidence = (confirmations / max_confirmations) * 100
     return round(confidence, 2)
 
-def trade_setup(price, atr, bias, df=None, min_confidence=50):
+def _rolling_mean(values, window):
+    frame = pd.Series(values, copy=False) if values.ndim == 1 else pd.DataFrame(values, copy=False)
+    return frame.rolling(window).mean().to_numpy()
+
+def confirmation_scores(close, high, low, rsi=None, ema=None, sma=None, atr=None, atr_mean=None,
+                        avg_range=None):
+    """
+    Confirmation scores from bare arrays, one series (n,) or a panel (n, k)
+
+    Panel columns are independent series aligned on their last bar, with
+    NaN in front of shorter histories; those padding bars score NaN and
+    each column's first bar scores 0, as in get_confirmation_scores.
+    atr_mean and avg_range (20-bar means of ATR and high - low) are
+    computed here unless given.
+
+    Returns:
+        float array of confidence values (0-100) shaped like close
+    """
+    # Counted in half points so the total stays an exact table index
+    halves = np.zeros(close.shape, dtype=np.int64)
+
+    # 1. RSI extreme
+    if rsi is not None:
+        halves += 2 * ((rsi > 70) | (rsi < 30))
+
+    # 2. EMA/SMA alignment
+    if ema is not None and sma is not None:
+        halves += 2 * (ema > sma)
+
+    # 3. Close above previous close
+    rising = np.zeros(close.shape, dtype=bool)
+    rising[1:] = close[1:] > close[:-1]
+    halves += rising
+
+    # 4. ATR expansion
+    if atr is not None:
+        if atr_mean is None:
+            atr_mean = _rolling_mean(atr, 20)
+        halves += atr > atr_mean
+
+    # 5. Range above 90% of its 20-bar average
+    bar_range = high - low
+    if avg_range is None:
+        avg_range = _rolling_mean(bar_range, 20)
+    halves += 2 * (bar_range > avg_range * 0.9)
+
+    # 6. Close near the high or the low of the bar
+    with np.errstate(divide='ignore', invalid='ignore'):
+        position = np.where(bar_range > 0, (close - low) / bar_range, 0.5)
+    halves += 2 * ((position > 0.6) | (position < 0.4))
+
+    scores = _CONFIDENCE_TABLE[halves]
+    if close.ndim == 1:
+        if len(scores):
+            scores[0] = 0
+        return scores
+
+    padding = np.isnan(close)
+    scores[padding] = np.nan
+    if len(scores) == 0:
+        return scores
+    first = (~padding).argmax(axis=0)
+    has_bars = ~padding.all(axis=0)
+    scores[first[has_bars], np.flatnonzero(has_bars)] = 0
+    return scores
+
+def get_confirmation_scores(df):
+    """
+    Score every bar at once with the same rules as get_confirmation_score
+
+    Bar i gets the score get_confirmation_score would give df.iloc[:i+1],
+    so the last value matches get_confirmation_score(df) exactly.
+
+    Args:
+        df: DataFrame with OHLC data and optional RSI/EMA/SMA/ATR columns
+
+    Returns:
+        Series of confidence values (0-100) aligned with df.index
+    """
+    def column(name):
+        return df[name].to_numpy(dtype=float) if name in df.columns else None
+
+    has_ma = 'EMA' in df.columns and 'SMA' in df.columns
+    scores = confirmation_scores(
+        column('close'), column('high'), column('low'),
+        rsi=column('RSI'),
+        ema=column('EMA') if has_ma else None,
+        sma=column('SMA') if has_ma else None,
+        atr=column('ATR'),
+        atr_mean=column('ATR_Mean') if 'ATR' in df.columns else None,
+    )
+    return pd.Series(scores, index=df.index, name="confidence")
+
+def market_bias(df, lookback=50, threshold=0.0001):
+    """
+    Bias from the mean close-to-close return of the last `lookback` bars
+
+    Returns:
+        "Bullish", "Bearish" or "Neutral" (also when df has too few bars)
+    """
+    if len(df) <= lookback:
+        return "Neutral"
+    recent_returns = df["close"].pct_change().tail(lookback).mean()
+    if recent_returns > threshold:
+        return "Bullish"
+    if recent_returns < -threshold:
+        return "Bearish"
+    return "Neutral"
+
+def trade_setup(price, atr, bias, df=None, min_confidence=50, sl_atr=1.2, tp_atr=2.5, confidence=None):
     """
     Generate trade setup with confirmation scoring
     
@@ -94,18 +213,22 @@ def trade_setup(price, atr, bias, df=None, min_confidence=50):
         bias: "Bullish", "Bearish", or "Neutral"
         df: DataFrame for confirmation scoring (optional)
         min_confidence: Minimum confidence threshold (default 50%)
+        sl_atr: Stop loss distance in ATRs
+        tp_atr: Take profit distance in ATRs
+        confidence: Confidence already computed for the last bar (e.g. by
+            the tick stream); df is then not scored
     
     Returns:
         dict with entry, sl, tp, confidence, and status
     """
     
     # Calculate confidence if dataframe provided
-    confidence = 0
-    if df is not None:
-        confidence = get_confirmation_score(df)
+    scored = confidence is not None or df is not None
+    if confidence is None:
+        confidence = get_confirmation_score(df) if df is not None else 0
     
     # Check if confidence threshold met
-    if confidence < min_confidence and df is not None:
+    if confidence < min_confidence and scored:
         return {
             "entry": None,
             "sl": None,
@@ -118,13 +241,13 @@ def trade_setup(price, atr, bias, df=None, min_confidence=50):
     # Generate trade setup
     if bias == "Bullish":
         entry = price
-        sl = price - 1.2 * atr
-        tp = price + 2.5 * atr
+        sl = price - sl_atr * atr
+        tp = price + tp_atr * atr
         status = "BUY"
     elif bias == "Bearish":
         entry = price
-        sl = price + 1.2 * atr
-        tp = price - 2.5 * atr
+        sl = price + sl_atr * atr
+        tp = price - tp_atr * atr
         status = "SELL"
     else:
         entry = sl = tp = None
@@ -135,7 +258,40 @@ def trade_setup(price, atr, bias, df=None, min_confidence=50):
         "entry": entry,
         "sl": sl,
         "tp": tp,
-        "confidence": confidence if df is not None else 0,
+        "confidence": confidence if scored else 0,
         "status": status,
         "reason": f"{status} signal with {confidence}% confidence"
     }
+
+@timed("trade_setup")
+def analyze(df, min_confidence=50, account_balance=1000, max_risk_per_trade=0.02, confidence=None):
+    """
+    Trade analysis of the last bar of an indicator frame, as shown on the dashboard
+
+    Args:
+        df: DataFrame with OHLC data and indicator columns
+        min_confidence: Minimum confidence for a signal
+        account_balance: Balance RiskManager sizes positions for
+        max_risk_per_trade: Fraction of the balance risked per trade
+        confidence: Confidence of the last bar if already known (see trade_setup)
+
+    Returns:
+        dict with price, atr, bias, the trade_setup fields and position_size
+    """
+    price = float(df["close"].iloc[-1])
+    atr = df["ATR"].iloc[-1] if "ATR" in df.columns else None
+    atr = float(atr) if pd.notna(atr) else 0.01
+    bias = market_bias(df)
+
+    result = trade_setup(
+        price=price, atr=atr, bias=bias, df=df, min_confidence=min_confidence, confidence=confidence
+    )
+    position_size = None
+    if result.get("entry") is not None:
+        risk = RiskManager(account_balance, max_risk_per_trade)
+        position_size = float(risk.calculate_position_size(result["entry"], result["sl"]))
+
+    analysis = {"price": price, "atr": atr, "bias": bias}
+    analysis.update(result)
+    analysis["position_size"] = position_size
+    return analysis
@@ -1,11 +1,16 @@
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier, HistGradientBoostingClassifier
+from sklearn.linear_model import SGDClassifier
 from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import TimeSeriesSplit
+from sklearn.metrics import precision_score, roc_auc_score
+from concurrent.futures import ProcessPoolExecutor
+import os
+import time
 import pandas as pd
 import numpy as np
 
-def prepare_features(df):
-    """Prepare and scale features"""
+def feature_columns(df):
+    """Feature columns training_data will use for this frame"""
     # Use available features
     feature_cols = ['open', 'high', 'low', 'close']
     if 'volume' in df.columns:
@@ -18,78 +23,266 @@ def prepare_features(df):
         feature_cols.append('RSI')
     if 'ATR' in df.columns:
         feature_cols.append('ATR')
-    
-    X = df[feature_cols].dropna().copy()
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
-    
-    return X_scaled, scaler, feature_cols
-
-def train_model(df):
-    """Train improved ML model with proper scaling"""
-    df = df.copy()
-
-    # Create target variable
-    df["return"] = df["close"].pct_change()
-    df["direction"] = (df["return"] > 0).astype(int)
-
-    # Prepare features
-    try:
-        X_scaled, scaler, feature_cols = prepare_features(df)
-    except:
-        # Fallback to original method if features missing
-        base_features = ["open", "high", "low", "close"]
-        if "volume" in df.columns:
-            base_features.append("volume")
-        df = df.dropna()
-        X = df[base_features]
-        y = df["direction"]
-        
-        model = RandomForestClassifier(
-            n_estimators=300,
-            max_depth=7,
-            min_samples_leaf=5,
-            random_state=42
-        )
-        model.fit(X, y)
-        return model, base_features
-
-    # Remove NaN from target
-    valid_idx = ~np.isnan(X_scaled).any(axis=1)
-    X_scaled = X_scaled[valid_idx]
-    y = df["direction"].iloc[:len(X_scaled)].values
-    
-    if len(y) == 0:
-        raise ValueError("No valid data for training")
+    return feature_cols
+
+# Hyperparameters; part of the model registry key
+GBM_PARAMS = {
+    "n_estimators": 100,
+    "max_depth": 5,
+    "learning_rate": 0.1,
+    "subsample": 0.8,
+    "random_state": 42
+}
+
+RF_PARAMS = {
+    "n_estimators": 300,
+    "max_depth": 7,
+    "min_samples_leaf": 5,
+    "random_state": 42
+}
+
+# Histogram booster for long histories: binned features, all cores (OpenMP)
+HIST_PARAMS = {
+    "max_iter": 100,
+    "max_depth": 5,
+    "learning_rate": 0.1,
+    "max_bins": 255,
+    "early_stopping": False,
+    "random_state": 42
+}
+
+# Online logistic regression updated with partial_fit
+ONLINE_PARAMS = {
+    "loss": "log_loss",
+    "alpha": 1e-4,
+    "random_state": 42
+}
+
+TRAINING_MODES = ("exact", "hist", "online")
+
+def model_params(mode="exact"):
+    """Hyperparameters of a training mode"""
+    if mode == "exact":
+        return {"gbm": GBM_PARAMS, "rf": RF_PARAMS}
+    if mode == "hist":
+        return {"mode": mode, "hist": HIST_PARAMS}
+    if mode == "online":
+        return {"mode": mode, "online": ONLINE_PARAMS}
+    raise ValueError(f"Unknown training mode: {mode} (expected one of {TRAINING_MODES})")
+
+def training_data(df):
+    """Complete feature rows and the direction label of the same bars"""
+    feature_cols = feature_columns(df)
+    direction = (df["close"].pct_change() > 0).astype(int)
+    X = df[feature_cols].dropna()
+    return X, direction.loc[X.index].to_numpy(), feature_cols
+
+class OnlineModel:
+    """
+    Scaler + SGD logistic regression trained incrementally.
+
+    partial_fit consumes only bars newer than the last one it has seen,
+    in fixed-size chunks, so memory stays bounded however long the
+    history is. Predicts like a fitted sklearn classifier on raw feature
+    rows.
+    """
+
+    def __init__(self, params=None, chunk_size=50_000):
+        self.scaler = StandardScaler()
+        self.model = SGDClassifier(**(params or ONLINE_PARAMS))
+        self.chunk_size = chunk_size
+        self.last_timestamp = None
+        self.rows_seen = 0
+
+    @property
+    def classes_(self):
+        return self.model.classes_
+
+    def partial_fit(self, df):
+        X, y, _ = training_data(df)
+        if self.last_timestamp is not None:
+            new = X.index > self.last_timestamp
+            X, y = X[new], y[new]
+
+        for start in range(0, len(X), self.chunk_size):
+            X_chunk = X.iloc[start:start + self.chunk_size]
+            y_chunk = y[start:start + self.chunk_size]
+            self.scaler.partial_fit(X_chunk)
+            self.model.partial_fit(self.scaler.transform(X_chunk), y_chunk, classes=[0, 1])
+
+        if len(X):
+            self.last_timestamp = X.index[-1]
+            self.rows_seen += len(X)
+        return self
+
+    def predict_proba(self, X):
+        return self.model.predict_proba(self.scaler.transform(X))
+
+    def predict(self, X):
+        return self.model.predict(self.scaler.transform(X))
+
+    def score(self, X, y):
+        return self.model.score(self.scaler.transform(X), y)
+
+def fit_model(df, mode="exact"):
+    """
+    Fit the model and keep the fitted scaler
+
+    Args:
+        df: DataFrame with OHLC data and optional indicator columns
+        mode: "exact" (GradientBoosting), "hist" (HistGradientBoosting,
+            for long histories) or "online" (OnlineModel, can be updated
+            with partial_fit later)
+
+    Returns:
+        (model, scaler, feature_cols); scaler is None when the model takes
+        raw feature rows (RandomForest fallback, hist and online modes)
+    """
+    model_params(mode)  # rejects unknown modes early
+    if mode == "hist":
+        X, y, feature_cols = training_data(df)
+        if len(y) == 0:
+            raise ValueError("No valid data for training")
+        model, _ = _fit_fold(X, y, mode)
+        return model, None, feature_cols
 
-    # Train with time-series aware model
-    model = GradientBoostingClassifier(
-        n_estimators=100,
-        max_depth=5,
-        learning_rate=0.1,
-        subsample=0.8,
-        random_state=42
-    )
+    if mode == "online":
+        model = OnlineModel().partial_fit(df)
+        if model.rows_seen == 0:
+            raise ValueError("No valid data for training")
+        return model, None, feature_columns(df)
 
-    model.fit(X_scaled, y)
+    X, y, feature_cols = training_data(df)
+    if len(y) == 0:
+        # Indicators still warming up: a forest on the raw bars instead
+        base_features = [col for col in ["open", "high", "low", "close", "volume"] if col in df.columns]
+        X, y, feature_cols = training_data(df[base_features])
+        if len(y) == 0:
+            raise ValueError("No valid data for training")
+        return RandomForestClassifier(**RF_PARAMS).fit(X, y), None, feature_cols
+
+    # Same features, labels and scaling as the walk-forward folds
+    model, scaler = _fit_fold(X, y, "exact")
+    return model, scaler, feature_cols
 
+def train_model(df, mode="exact"):
+    """Train improved ML model with proper scaling"""
+    model, _, feature_cols = fit_model(df, mode)
     return model, feature_cols
 
-def evaluate_model(df, model, feature_cols, test_size=0.2):
-    """Evaluate model with time series split"""
-    try:
-        X_scaled, scaler, _ = prepare_features(df)
-    except:
+# ========== WALK-FORWARD EVALUATION ==========
+
+# Feature matrix shared with pool workers once, instead of per fold
+_fold_data = {}
+
+def _init_fold_worker(X, y):
+    _fold_data["X"] = X
+    _fold_data["y"] = y
+
+def _fit_fold(X_train, y_train, mode):
+    """Fit one fold's model on rows from training_data; returns (model, scaler or None)"""
+    if mode == "hist":
+        return HistGradientBoostingClassifier(**HIST_PARAMS).fit(X_train, y_train), None
+
+    if mode == "online":
+        scaler = StandardScaler()
+        model = SGDClassifier(**ONLINE_PARAMS)
+        chunk_size = 50_000
+        for start in range(0, len(X_train), chunk_size):
+            X_chunk = X_train[start:start + chunk_size]
+            scaler.partial_fit(X_chunk)
+            model.partial_fit(scaler.transform(X_chunk), y_train[start:start + chunk_size], classes=[0, 1])
+        return model, scaler
+
+    scaler = StandardScaler().fit(X_train)
+    return GradientBoostingClassifier(**GBM_PARAMS).fit(scaler.transform(X_train), y_train), scaler
+
+def _evaluate_fold(fold, train_end, test_start, test_end, mode):
+    """Train on rows [0, train_end) and score rows [test_start, test_end)"""
+    X, y = _fold_data["X"], _fold_data["y"]
+    X_train, y_train = X[:train_end], y[:train_end]
+    X_test, y_test = X[test_start:test_end], y[test_start:test_end]
+
+    start = time.perf_counter()
+    model, scaler = _fit_fold(X_train, y_train, mode)
+    fit_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if scaler is not None:
+        X_train, X_test = scaler.transform(X_train), scaler.transform(X_test)
+    proba_up = model.predict_proba(X_test)[:, list(model.classes_).index(1)]
+    predicted = (proba_up > 0.5).astype(int)
+    score_seconds = time.perf_counter() - start
+
+    return {
+        "fold": fold,
+        "train_rows": train_end,
+        "test_rows": test_end - test_start,
+        "train_score": float(model.score(X_train, y_train)),
+        "test_score": float((predicted == y_test).mean()),
+        "precision": float(precision_score(y_test, predicted, zero_division=0)),
+        "auc": float(roc_auc_score(y_test, proba_up)) if len(np.unique(y_test)) == 2 else np.nan,
+        "up_rate": float(y_test.mean()),
+        "fit_seconds": fit_seconds,
+        "score_seconds": score_seconds,
+    }
+
+def walk_forward(df, n_splits=5, mode="exact", max_workers=None, folds=None):
+    """
+    Walk-forward evaluation: each fold trains on the past and scores the
+    block that follows it
+
+    Features and labels are built once and aligned row by row, then
+    shared with a process pool that trains and scores the folds in
+    parallel.
+
+    Args:
+        df: DataFrame with OHLC data and optional indicator columns
+        n_splits: Number of TimeSeriesSplit folds
+        mode: Training mode, see fit_model
+        max_workers: Worker processes (1 runs in-process)
+        folds: Explicit list of (train_end, test_start, test_end) row
+            bounds to use instead of TimeSeriesSplit
+
+    Returns:
+        DataFrame with one row of metrics and timings per fold
+    """
+    model_params(mode)  # rejects unknown modes early
+    X_frame, y, _ = training_data(df)
+    X = X_frame.to_numpy(dtype=float)
+
+    if folds is None:
+        folds = [
+            (train_idx[-1] + 1, test_idx[0], test_idx[-1] + 1)
+            for train_idx, test_idx in TimeSeriesSplit(n_splits=n_splits).split(X)
+        ]
+    tasks = [(i, *bounds, mode) for i, bounds in enumerate(folds)]
+
+    max_workers = min(max_workers or os.cpu_count() or 1, len(tasks))
+    if max_workers <= 1:
+        _init_fold_worker(X, y)
+        try:
+            results = [_evaluate_fold(*task) for task in tasks]
+        finally:
+            _fold_data.clear()
+    else:
+        with ProcessPoolExecutor(max_workers, initializer=_init_fold_worker, initargs=(X, y)) as pool:
+            results = list(pool.map(_evaluate_fold, *zip(*tasks)))
+
+    return pd.DataFrame(results).set_index("fold")
+
+def evaluate_model(df, model=None, feature_cols=None, test_size=0.2, mode="exact"):
+    """
+    Evaluate with a single chronological split
+
+    The model is refit on the training rows only: scoring a model that
+    was trained on all of df would include the test rows. `model` and
+    `feature_cols` are accepted for compatibility and not used.
+    """
+    n = len(training_data(df)[1])
+    split_idx = int(n * (1 - test_size))
+    if split_idx == 0 or split_idx == n:
         return None
-    
-    split_idx = int(len(X_scaled) * (1 - test_size))
-    X_train, X_test = X_scaled[:split_idx], X_scaled[split_idx:]
-    
-    df_clean = df.dropna()
-    y = (df_clean["close"].pct_change() > 0).astype(int).values
-    y_train, y_test = y[:split_idx], y[split_idx:len(X_test)]
-    
-    train_score = model.score(X_train, y_train)
-    test_score = model.score(X_test, y_test)
-    
-    return {"train_score": train_score, "test_score": test_score}
+
+    fold = walk_forward(df, mode=mode, max_workers=1, folds=[(split_idx, split_idx, n)]).iloc[0]
+    return {"train_score": float(fold["train_score"]), "test_score": float(fold["test_score"])}
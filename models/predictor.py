@@ -0,0 +1,166 @@
+import threading
+import time
+from collections import deque
+from contextlib import ExitStack
+
+import pandas as pd
+import numpy as np
+
+from profiling import timed
+
+class Predictor:
+    """
+    Fitted scaler + model with a cache of already-scored bars.
+
+    Feature rows are transformed and passed to predict_proba only for bars
+    newer than the last cached one; the last cached bar is always scored
+    again because it may have been the still-forming candle. The cache
+    keeps the newest `max_rows` bars (make it longer than the windows
+    callers pass); older bars are scored again if a caller asks for them.
+    Each call records its latency. One instance can be shared between
+    threads (e.g. dashboard sessions): calls are serialized by `lock`.
+    """
+
+    def __init__(self, model, scaler, feature_cols, history=200, max_rows=100_000):
+        self.model = model
+        self.scaler = scaler
+        self.feature_cols = list(feature_cols)
+        self.max_rows = max_rows
+        self.proba = pd.Series(dtype=float, name="proba_up")
+        self.latencies = deque(maxlen=history)
+        self.rows_scored = 0
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_entry(cls, entry):
+        """Build from a ModelRegistry entry"""
+        return cls(entry["model"], entry["scaler"], entry["feature_cols"])
+
+    def _pending(self, df):
+        """Feature rows of df that still need scoring"""
+        X = df[self.feature_cols].dropna()
+        if len(self.proba):
+            # Bars older than the cache (dropped by max_rows) or from its last bar on
+            X = X[(X.index < self.proba.index[0]) | (X.index >= self.proba.index[-1])]
+        return X
+
+    def _transform(self, X):
+        # The unscaled fallback model was fitted on a DataFrame, so keep X as one
+        return self.scaler.transform(X) if self.scaler is not None else X
+
+    def _up_column(self, proba):
+        classes = list(getattr(self.model, "classes_", [0, 1]))
+        return proba[:, classes.index(1)] if 1 in classes else np.zeros(len(proba))
+
+    def _store(self, index, proba_up):
+        if len(index) == 0:
+            return
+        fresh = pd.Series(proba_up, index=index, name="proba_up")
+        if len(self.proba):
+            kept = self.proba[~self.proba.index.isin(index)]
+            fresh = pd.concat([kept, fresh])
+            if not fresh.index.is_monotonic_increasing:
+                fresh = fresh.sort_index()
+        self.proba = fresh
+        self.rows_scored += len(index)
+
+    def _trim(self):
+        """Drop the oldest cached bars beyond max_rows"""
+        if len(self.proba) > self.max_rows:
+            self.proba = self.proba.iloc[-self.max_rows:]
+
+    @timed("model.predict")
+    def predict(self, df):
+        """
+        Probability that each bar closes up, scoring only new bars
+
+        Args:
+            df: DataFrame with the model's feature columns
+
+        Returns:
+            Series of P(up) for every bar with complete features
+        """
+        with self.lock:
+            start = time.perf_counter()
+            X = self._pending(df)
+            if len(X):
+                proba = self.model.predict_proba(self._transform(X))
+                self._store(X.index, self._up_column(proba))
+            self.latencies.append(time.perf_counter() - start)
+
+            result = self.proba.reindex(df.index).dropna()
+            self._trim()
+            return result
+
+    def predict_latest(self, df):
+        """P(up) for the last bar of df, or None if it has no complete features"""
+        proba = self.predict(df)
+        if len(proba) == 0 or proba.index[-1] != df.index[-1]:
+            return None
+        return float(proba.iloc[-1])
+
+    def latency_stats(self):
+        """Latency of recent calls in milliseconds"""
+        with self.lock:
+            latencies = list(self.latencies)
+        if not latencies:
+            return {"calls": 0, "last_ms": None, "mean_ms": None, "p95_ms": None, "rows_scored": 0}
+        ms = np.array(latencies) * 1000
+        return {
+            "calls": len(ms),
+            "last_ms": float(ms[-1]),
+            "mean_ms": float(ms.mean()),
+            "p95_ms": float(np.percentile(ms, 95)),
+            "rows_scored": self.rows_scored,
+        }
+
+def predict_batch(requests):
+    """
+    Score new bars of several timeframes with as few model calls as possible
+
+    Requests whose predictors share the same fitted model and scaler are
+    stacked into a single transform + predict_proba call. Every predictor
+    involved is locked for the whole batch (in a fixed order, so
+    concurrent batches cannot deadlock).
+
+    Args:
+        requests: dict of name (e.g. interval) -> (Predictor, DataFrame)
+
+    Returns:
+        dict of name -> Series of P(up), as from Predictor.predict
+    """
+    predictors = {id(predictor): predictor for predictor, _ in requests.values()}
+    with ExitStack() as locks:
+        for key in sorted(predictors):
+            locks.enter_context(predictors[key].lock)
+        return _predict_batch(requests)
+
+def _predict_batch(requests):
+    start = time.perf_counter()
+    groups = {}
+    for name, (predictor, df) in requests.items():
+        key = (id(predictor.model), id(predictor.scaler), tuple(predictor.feature_cols))
+        groups.setdefault(key, []).append((name, predictor, predictor._pending(df)))
+
+    for members in groups.values():
+        pending = [(name, predictor, X) for name, predictor, X in members if len(X)]
+        if not pending:
+            continue
+        first = pending[0][1]
+        parts = [first._transform(X) for _, _, X in pending]
+        stacked = np.vstack(parts) if first.scaler is not None else pd.concat(parts)
+        proba_up = first._up_column(first.model.predict_proba(stacked))
+
+        offset = 0
+        for _, predictor, X in pending:
+            predictor._store(X.index, proba_up[offset:offset + len(X)])
+            offset += len(X)
+
+    elapsed = time.perf_counter() - start
+    results = {}
+    for name, (predictor, df) in requests.items():
+        predictor.latencies.append(elapsed)
+        results[name] = predictor.proba.reindex(df.index).dropna()
+    for predictor, _ in requests.values():
+        predictor._trim()
+    return results
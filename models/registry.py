@@ -0,0 +1,175 @@
+import copy
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+import joblib
+import numpy as np
+
+from models.ml_model import fit_model, feature_columns, model_params
+from profiling import timed, record_error
+
+# Bump when training changes in a way the params do not show, so models
+# already on disk are retrained (2: exact labels aligned with features)
+MODEL_FORMAT = 2
+
+def data_fingerprint(df, columns):
+    """Stable hash of the index and the given columns of df"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.ascontiguousarray(df.index.values.astype("datetime64[ns]").view(np.int64)).tobytes())
+    for col in columns:
+        digest.update(col.encode())
+        digest.update(np.ascontiguousarray(df[col].to_numpy(dtype=np.float64)).tobytes())
+    return digest.hexdigest()
+
+def _hash(payload):
+    return hashlib.blake2b(json.dumps(payload, sort_keys=True).encode(), digest_size=16).hexdigest()
+
+def config_key(interval, feature_cols, params=None):
+    """Key of everything but the data: interval, features and hyperparameters"""
+    params = params or model_params()
+    return _hash({
+        "format": MODEL_FORMAT, "interval": interval, "features": list(feature_cols), "params": params,
+    })
+
+def registry_key(df, interval, feature_cols=None, params=None):
+    """Key of the model trained on df: data, interval, features and hyperparameters"""
+    feature_cols = feature_cols or feature_columns(df)
+    return _hash({
+        "data": data_fingerprint(df, ["close"] + feature_cols),
+        "config": config_key(interval, feature_cols, params),
+    })
+
+class ModelRegistry:
+    """
+    On-disk store of fitted (scaler, model) pairs.
+
+    Entries are keyed by registry_key, so a model is only refit when the
+    data, interval, feature set, hyperparameters or MODEL_FORMAT change.
+    Loaded entries are also kept in memory for the life of the process.
+    """
+
+    def __init__(self, root, max_per_interval=5):
+        self.root = root
+        self.max_per_interval = max_per_interval
+        self.memory = {}
+        self.lock = threading.Lock()
+
+    def path(self, interval, key):
+        return os.path.join(self.root, interval, f"{key}.joblib")
+
+    def load(self, interval, key):
+        """Stored entry dict, or None"""
+        with self.lock:
+            if key in self.memory:
+                return self.memory[key]
+
+        path = self.path(interval, key)
+        if not os.path.exists(path):
+            return None
+        try:
+            entry = joblib.load(path)
+        except Exception as e:
+            # Unreadable entries are retrained; the error shows in diagnostics
+            record_error("model.load", e)
+            return None
+
+        with self.lock:
+            self.memory[key] = entry
+        return entry
+
+    def save(self, interval, key, entry):
+        path = self.path(interval, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        os.close(fd)
+        try:
+            joblib.dump(entry, tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        with self.lock:
+            self.memory[key] = entry
+        self._prune(interval)
+
+    def _prune(self, interval):
+        """Keep only the newest max_per_interval models of an interval on disk"""
+        folder = os.path.join(self.root, interval)
+        files = [os.path.join(folder, f) for f in os.listdir(folder) if f.endswith(".joblib")]
+        files.sort(key=os.path.getmtime, reverse=True)
+        for stale in files[self.max_per_interval:]:
+            os.remove(stale)
+            with self.lock:
+                self.memory.pop(os.path.basename(stale)[:-len(".joblib")], None)
+
+    def latest(self, interval):
+        """Most recently saved entry of an interval, or None"""
+        folder = os.path.join(self.root, interval)
+        if not os.path.isdir(folder):
+            return None
+        files = [f for f in os.listdir(folder) if f.endswith(".joblib")]
+        if not files:
+            return None
+        newest = max(files, key=lambda f: os.path.getmtime(os.path.join(folder, f)))
+        return self.load(interval, newest[:-len(".joblib")])
+
+    @timed("model.get_or_train")
+    def get_or_train(self, df, interval, max_new_bars=0, mode="exact"):
+        """
+        Fitted model for df, trained only if no matching entry exists
+
+        Args:
+            df: DataFrame with OHLC data and optional indicator columns
+            interval: Timeframe the data belongs to
+            max_new_bars: Also reuse the latest model of this interval (same
+                features and hyperparameters) if df only has up to this many
+                bars after the data it was trained on
+            mode: Training mode, see ml_model.fit_model. An "online" model
+                is updated with the new bars instead of being refit
+
+        Returns:
+            dict with model, scaler, feature_cols, key, trained_at and
+            train_seconds
+        """
+        feature_cols = feature_columns(df)
+        params = model_params(mode)
+        config = config_key(interval, feature_cols, params)
+        key = registry_key(df, interval, feature_cols, params)
+        entry = self.load(interval, key)
+        if entry is not None:
+            return entry
+
+        latest = self.latest(interval)
+        if latest is not None and latest.get("config") != config:
+            latest = None
+        if latest is not None and max_new_bars and (df.index > latest["data_end"]).sum() <= max_new_bars:
+            return latest
+
+        start = time.perf_counter()
+        if mode == "online" and latest is not None:
+            # Copy so predictors holding the previous entry are unaffected
+            model = copy.deepcopy(latest["model"]).partial_fit(df)
+            scaler, model_cols = None, latest["feature_cols"]
+        else:
+            model, scaler, model_cols = fit_model(df, mode)
+        entry = {
+            "model": model,
+            "scaler": scaler,
+            "feature_cols": model_cols,
+            "key": key,
+            "config": config,
+            "mode": mode,
+            "interval": interval,
+            "data_end": df.index[-1],
+            "trained_at": time.time(),
+            "train_seconds": time.perf_counter() - start,
+        }
+        self.save(interval, key, entry)
+        return entry
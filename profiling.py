@@ -0,0 +1,202 @@
+"""
+Lightweight timing spans shared by the dashboard and the library modules
+
+    with span("indicators"):
+        ...
+
+Every span is added to a process-wide latency history per stage name and,
+when a Trace is active in the current thread, to that trace as well (one
+trace per dashboard rerun). Exceptions raised inside a span are recorded
+with their traceback before propagating.
+"""
+import contextvars
+import cProfile
+import functools
+import io
+import json
+import pstats
+import threading
+import time
+import traceback
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+_current_trace = contextvars.ContextVar("trace", default=None)
+_depth = contextvars.ContextVar("span_depth", default=0)
+
+class StageHistory:
+    """Recent durations and errors of every stage in this process"""
+
+    def __init__(self, history=200, max_errors=50):
+        self.history = history
+        self.stages = {}
+        self.errors = deque(maxlen=max_errors)
+        self.lock = threading.Lock()
+
+    def record(self, name, seconds, error=None):
+        with self.lock:
+            if name not in self.stages:
+                self.stages[name] = deque(maxlen=self.history)
+            self.stages[name].append((time.time(), seconds))
+            if error is not None:
+                self.errors.append(error)
+
+    def record_error(self, error):
+        with self.lock:
+            self.errors.append(error)
+
+    def summary(self):
+        """dict of stage -> calls, last, mean and p95 latency in milliseconds"""
+        with self.lock:
+            stages = {name: [s for _, s in samples] for name, samples in self.stages.items()}
+        table = {}
+        for name, seconds in stages.items():
+            ms = np.array(seconds) * 1000
+            table[name] = {
+                "calls": len(ms),
+                "last_ms": float(ms[-1]),
+                "mean_ms": float(ms.mean()),
+                "p95_ms": float(np.percentile(ms, 95)),
+            }
+        return table
+
+    def series(self, name):
+        """[(unix time, seconds)] of one stage"""
+        with self.lock:
+            return list(self.stages.get(name, ()))
+
+    def recent_errors(self):
+        with self.lock:
+            return list(self.errors)
+
+    def clear(self):
+        with self.lock:
+            self.stages.clear()
+            self.errors.clear()
+
+history = StageHistory()
+
+class Trace:
+    """Spans of one unit of work (e.g. a dashboard rerun), in start order"""
+
+    def __init__(self, name="trace"):
+        self.name = name
+        self.started_at = time.time()
+        self.spans = []
+        self._token = None
+
+    def __enter__(self):
+        self._token = _current_trace.set(self)
+        return self
+
+    def __exit__(self, *exc):
+        _current_trace.reset(self._token)
+        return False
+
+    def total(self):
+        """Seconds spent in top-level spans"""
+        return sum(s.get("seconds", 0) for s in self.spans if s["depth"] == 0)
+
+    def to_dict(self):
+        return {"name": self.name, "started_at": self.started_at, "spans": list(self.spans)}
+
+def start_trace(name="trace"):
+    """Make a new Trace current for the rest of this context (e.g. a script rerun)"""
+    trace = Trace(name)
+    _current_trace.set(trace)
+    return trace
+
+def _error_record(stage, exc):
+    return {
+        "stage": stage,
+        "time": time.time(),
+        "error": f"{type(exc).__name__}: {exc}",
+        "traceback": "".join(traceback.format_exception(exc)),
+    }
+
+def record_error(stage, exc):
+    """Log an exception that was handled outside a span"""
+    history.record_error(_error_record(stage, exc))
+
+@contextmanager
+def span(name, **tags):
+    """Time a block as stage `name`; extra tags are kept on the trace"""
+    trace = _current_trace.get()
+    depth = _depth.get()
+    token = _depth.set(depth + 1)
+    record = {"name": name, "depth": depth, "error": None, **tags}
+    if trace is not None:
+        trace.spans.append(record)
+    start = time.perf_counter()
+    try:
+        yield record
+    except BaseException as e:
+        error = _error_record(name, e)
+        record["error"] = error["error"]
+        raise
+    else:
+        error = None
+    finally:
+        record["seconds"] = time.perf_counter() - start
+        _depth.reset(token)
+        history.record(name, record["seconds"], error)
+
+def timed(name):
+    """Decorator form of span"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def profile_report(profiler, sort="cumulative", limit=40):
+    """pstats text of a finished cProfile.Profile"""
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats(sort).print_stats(limit)
+    return out.getvalue()
+
+@contextmanager
+def profile(enabled=True, sort="cumulative", limit=40):
+    """
+    cProfile the block when enabled
+
+    Yields a dict whose "stats" key holds the pstats report after the block.
+    """
+    result = {"stats": None}
+    if not enabled:
+        yield result
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield result
+    finally:
+        profiler.disable()
+        result["stats"] = profile_report(profiler, sort, limit)
+
+def export_json(trace=None, path=None):
+    """
+    Stage summary, recent errors and (optionally) one trace as JSON
+
+    Args:
+        trace: Trace to include
+        path: Also write the JSON to this file
+
+    Returns:
+        JSON string
+    """
+    payload = {
+        "exported_at": time.time(),
+        "stages": history.summary(),
+        "errors": history.recent_errors(),
+        "trace": trace.to_dict() if trace is not None else None,
+    }
+    text = json.dumps(payload, indent=2, default=str)
+    if path:
+        with open(path, "w") as f:
+            f.write(text)
+    return text
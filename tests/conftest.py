@@ -0,0 +1,6 @@
+import os
+import sys
+
+# config.py refuses to import without an API key; tests never reach the API
+os.environ.setdefault("TD_API_KEY", "test")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,62 @@
+import pandas as pd
+import pytest
+
+import inference.cache as cache_module
+from benchmarks.synthetic import make_ohlcv
+from data.store import OHLCV_COLUMNS
+from data.stream import StreamIngest
+from features.pipeline import compute_all_indicators
+from inference.cache import AnalysisCache
+from inference.trade_logic import analyze
+
+@pytest.fixture
+def pipeline_calls(monkeypatch):
+    calls = []
+
+    def counted(df, spec=None):
+        calls.append(len(df))
+        return compute_all_indicators(df, spec)
+
+    monkeypatch.setattr(cache_module, "compute_all_indicators", counted)
+    return calls
+
+def _stream(bars):
+    stream = StreamIngest(["5min"], "XAU/USD", offsets={})
+    stream.seed("5min", bars, now=bars.index[-1] + pd.Timedelta("5min"))
+    return stream
+
+def test_forming_bar_reuses_the_closed_bar_frame(pipeline_calls):
+    bars = make_ohlcv(300, freq="5min")
+    stream = _stream(bars)
+    cache = AnalysisCache()
+    start = (bars.index[-1] + pd.Timedelta("5min")).value
+
+    entries = []
+    for i, price in enumerate([2001.0, 2003.0, 1999.5]):
+        stream.process(start + i * 10**9, price)
+        entries.append(cache.get_live("XAU/USD", "5min", bars, stream.forming("5min")))
+
+    # One pipeline run for the closed bars, none per tick
+    assert pipeline_calls == [300]
+    forming = stream.forming("5min")
+    entry = entries[-1]
+    assert entry["frame"].index[-1] == forming["time"]
+    assert entry["frame"]["close"].iloc[-1] == 1999.5
+    assert entry["frame"]["RSI"].iloc[-1] == pytest.approx(forming["RSI"])
+    # Same analysis as the full pipeline over the bars including the forming one
+    full, _ = compute_all_indicators(entry["frame"][OHLCV_COLUMNS])
+    expected = analyze(full)
+    assert dict(entry["analysis"]) == pytest.approx(expected)
+
+    # Unchanged forming bar: the same entry
+    assert cache.get_live("XAU/USD", "5min", bars, forming) is entry
+
+def test_polled_forming_bar_is_replaced_by_the_streamed_one(pipeline_calls):
+    bars = make_ohlcv(300, freq="5min")
+    stream = _stream(bars.iloc[:-1])
+    stream.process(bars.index[-1].value, 2010.0)
+
+    entry = AnalysisCache().get_live("XAU/USD", "5min", bars, stream.forming("5min"))
+    assert pipeline_calls == [299]
+    assert len(entry["frame"]) == 300
+    assert entry["frame"]["close"].iloc[-1] == 2010.0
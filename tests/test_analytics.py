@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from features.analytics import _block_drawdowns, bootstrap_trades
+
+def _reference(sequence, initial_balance):
+    """Final balance and drawdowns of one sequence with a running max over every step"""
+    equity = initial_balance + np.cumsum(sequence)
+    peak = np.maximum(np.maximum.accumulate(equity), initial_balance)
+    return equity[-1], (equity - peak).min(), ((equity / peak).min() - 1) * 100
+
+@pytest.mark.parametrize("drift", [-50, -5, 0, 1, 20])
+@pytest.mark.parametrize("block", [1, 4, 64])
+def test_block_drawdowns_match_running_max(drift, block):
+    # drift -50 ruins the account (negative balance) early in most sequences
+    rng = np.random.default_rng(block)
+    steps = rng.normal(drift, 10.0, (block, 30, 7))
+    sequences = steps.transpose(1, 2, 0).reshape(30, -1)
+    expected = np.array([_reference(sequence, 100.0) for sequence in sequences])
+
+    pnl, max_dd, max_dd_pct = _block_drawdowns(steps.copy(), 100.0)
+    np.testing.assert_allclose(pnl + 100.0, expected[:, 0])
+    np.testing.assert_allclose(max_dd, expected[:, 1], atol=1e-9)
+    np.testing.assert_allclose(max_dd_pct, expected[:, 2], atol=1e-9)
+
+def test_shuffle_keeps_the_trades():
+    profits = np.random.default_rng(0).normal(1, 10, 1000)
+    table = bootstrap_trades(profits, 200, method="shuffle", initial_balance=1000)
+    final = 1000 + profits.sum()
+    assert table.loc["final_balance"].tolist() == pytest.approx([final] * 3)
+    assert table.loc["win_rate"].tolist() == pytest.approx([(profits > 0).mean() * 100] * 3)
+    assert (table.loc["max_drawdown"] <= 0).all()
+
+@pytest.mark.parametrize("method", ["bootstrap", "shuffle"])
+def test_winners_only_never_draw_down(method):
+    table = bootstrap_trades(np.arange(1.0, 101.0), 50, method=method)
+    assert (table.loc[["max_drawdown", "max_drawdown_pct"]] == 0).all().all()
+    assert (table.loc["win_rate"] == 100).all()
+
+@pytest.mark.parametrize("method", ["bootstrap", "shuffle"])
+def test_results_do_not_depend_on_workers(method):
+    profits = np.random.default_rng(1).normal(0, 10, 5000)
+    single = bootstrap_trades(profits, 300, method=method, max_workers=1)
+    assert bootstrap_trades(profits, 300, method=method, max_workers=4).equals(single)
+
+def test_bootstrap_matches_running_max_in_distribution():
+    profits = np.random.default_rng(2).normal(0.5, 10, 300)
+    table = bootstrap_trades(profits, 4000, initial_balance=500, seed=3)
+
+    rng = np.random.default_rng(4)
+    expected = np.array([_reference(rng.choice(profits, len(profits)), 500) for _ in range(4000)])
+    medians = np.median(expected, axis=0)
+    assert table.loc["final_balance", "median"] == pytest.approx(medians[0], rel=0.02)
+    assert table.loc["max_drawdown", "median"] == pytest.approx(medians[1], rel=0.1)
+    assert table.loc["max_drawdown_pct", "median"] == pytest.approx(medians[2], rel=0.1)
@@ -0,0 +1,32 @@
+import pytest
+
+from benchmarks.synthetic import make_ohlcv
+from features.backtest import backtest_strategy, backtest_strategy_loop
+from features.pipeline import compute_all_indicators
+
+def _frame(seed, n=1500):
+    # Volatile enough to reach the 2% take profit a few times per run
+    return compute_all_indicators(make_ohlcv(n, seed=seed, volatility=0.003))[0]
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_matches_loop(seed):
+    df = _frame(seed)
+    expected = backtest_strategy_loop(df)
+    result = backtest_strategy(df)
+
+    assert expected["total_trades"] > 0
+    assert result["trades"] == expected["trades"]
+    assert result == expected
+
+@pytest.mark.parametrize("min_confidence", [40, 60])
+def test_matches_loop_at_other_thresholds(min_confidence):
+    df = _frame(3)
+    assert backtest_strategy(df, min_confidence=min_confidence) == \
+        backtest_strategy_loop(df, min_confidence=min_confidence)
+
+def test_too_short_for_a_trade():
+    df = _frame(4, n=40)
+    result = backtest_strategy(df)
+    assert result == backtest_strategy_loop(df)
+    assert result["total_trades"] == 0
+    assert result["final_balance"] == result["initial_balance"]
@@ -0,0 +1,110 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from data.client import TokenBucket, TwelveDataClient
+
+class _StandIn(BaseHTTPRequestHandler):
+    """Answers with the server's scripted (status, body) pairs, then 200 ok"""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append((self.client_address, self.path))
+            status, body = server.script.pop(0) if server.script else (200, {"status": "ok"})
+        raw = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StandIn)
+    server.lock = threading.Lock()
+    server.requests = []
+    server.script = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def _client(server, **kwargs):
+    host, port = server.server_address
+    kwargs.setdefault("credits_per_minute", 100)
+    return TwelveDataClient("key", base_url=f"http://{host}:{port}", **kwargs)
+
+def test_reuses_one_connection(server):
+    client = _client(server)
+    for _ in range(5):
+        assert client.get("time_series", {"symbol": "XAU/USD"}) == {"status": "ok"}
+    client.close()
+
+    assert len(server.requests) == 5
+    assert len({address for address, _ in server.requests}) == 1
+    assert all("apikey=key" in path and "symbol=XAU%2FUSD" in path for _, path in server.requests)
+
+def test_bucket_allows_a_burst_then_paces():
+    bucket = TokenBucket(2, period=0.2)
+    start = time.monotonic()
+    assert bucket.acquire() and bucket.acquire()
+    assert time.monotonic() - start < 0.05
+
+    assert bucket.acquire()
+    assert time.monotonic() - start >= 0.09
+
+def test_bucket_acquire_times_out():
+    bucket = TokenBucket(1, period=10.0)
+    assert bucket.acquire()
+    assert bucket.acquire(timeout=0.05) is False
+
+def test_client_calls_are_paced_by_the_bucket(server):
+    client = _client(server)
+    client.bucket = TokenBucket(2, period=0.4)
+    start = time.monotonic()
+    for _ in range(4):
+        client.get("time_series", {})
+    # Two calls from the burst, then one every 0.2s
+    assert time.monotonic() - start >= 0.35
+    assert len(server.requests) == 4
+
+@pytest.mark.parametrize("status, body", [
+    (429, {"status": "error", "code": 429, "message": "limit"}),
+    (200, {"status": "error", "code": 429, "message": "limit"}),
+])
+def test_backs_off_and_retries_after_rate_limit(server, status, body):
+    server.script = [(status, body)]
+    client = _client(server, backoff=0.1)
+    drained = []
+    drain = client.bucket.drain
+    client.bucket.drain = lambda: (drained.append(True), drain())
+
+    start = time.monotonic()
+    assert client.get("time_series", {}) == {"status": "ok"}
+    assert time.monotonic() - start >= 0.1
+    assert drained == [True]
+    assert len(server.requests) == 2
+
+def test_gives_up_after_max_retries(server):
+    limited = (429, {"status": "error", "code": 429, "message": "limit"})
+    server.script = [limited] * 3
+    client = _client(server, max_retries=2, backoff=0.01)
+    assert client.get("time_series", {})["code"] == 429
+    assert len(server.requests) == 3
+
+def test_transport_failure_is_an_error_payload():
+    # Nothing listens on the discard port
+    client = TwelveDataClient("key", base_url="http://127.0.0.1:9", max_retries=0, timeout=1)
+    payload = client.get("time_series", {})
+    assert payload["status"] == "error"
+    assert payload["message"].startswith("Request failed")
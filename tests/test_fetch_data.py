@@ -0,0 +1,150 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.client import TokenBucket
+from data.fetch_data import fetch_xauusd, fetch_symbols
+from data.resample import resample_ohlcv
+from data.store import OHLCVStore
+
+class _FakeAPI:
+    """time_series over fixed 1-minute bars: start_date/end_date inclusive, newest outputsize bars"""
+
+    def __init__(self, start, n):
+        self.index = pd.date_range(start, periods=n, freq="1min")
+        self.requests = []
+        self.bucket = TokenBucket(8)
+
+    def get(self, endpoint, params, credits=1):
+        self.requests.append(dict(params))
+        times = self.index
+        if "start_date" in params:
+            times = times[times >= pd.Timestamp(params["start_date"])]
+        if "end_date" in params:
+            times = times[times <= pd.Timestamp(params["end_date"])]
+        times = times[-int(params["outputsize"]):]
+        values = [
+            {"datetime": t.strftime("%Y-%m-%d %H:%M:%S"), "open": "1", "high": "2", "low": "0.5",
+             "close": str(float(i)), "volume": "1"}
+            for i, t in zip(self.index.get_indexer(times), times)
+        ]
+        if not values:
+            return {"status": "error", "code": 400, "message": "No data is available on the specified dates"}
+        return {"status": "ok", "values": values[::-1]}
+
+@pytest.fixture
+def store(tmp_path):
+    return OHLCVStore(str(tmp_path))
+
+def test_delta_after_an_outage_pages_back_to_the_stored_bars(store):
+    api = _FakeAPI("2024-01-01", 1000)
+    api.index, full = api.index[:100], api.index
+    fetch_xauusd("1min", outputsize=100, store=store, client=api)
+
+    # 900 new bars arrive while offline; a delta of 100 does not reach back
+    api.index = full
+    api.requests.clear()
+    df, error = fetch_xauusd("1min", outputsize=100, store=store, client=api)
+
+    assert error is None and len(df) == 100
+    stored = store.read("XAU/USD", "1min")
+    assert len(stored) == 1000
+    assert (stored.index == full.as_unit("ns")).all()
+    assert len(api.requests) == 10
+    assert all("end_date" in params for params in api.requests[1:])
+
+def test_short_delta_needs_no_paging(store):
+    api = _FakeAPI("2024-01-01", 150)
+    api.index, full = api.index[:100], api.index
+    fetch_xauusd("1min", outputsize=100, store=store, client=api)
+
+    api.index = full
+    api.requests.clear()
+    fetch_xauusd("1min", outputsize=100, store=store, client=api)
+    assert len(api.requests) == 1
+    assert len(store.read("XAU/USD", "1min")) == 150
+
+def test_failed_page_leaves_the_store_for_the_next_attempt(store):
+    api = _FakeAPI("2024-01-01", 400)
+    api.index, full = api.index[:100], api.index
+    fetch_xauusd("1min", outputsize=100, store=store, client=api)
+
+    api.index = full
+    get = api.get
+    api.get = lambda endpoint, params, credits=1: (
+        {"status": "error", "message": "limit"} if "end_date" in params else get(endpoint, params, credits)
+    )
+    df, error = fetch_xauusd("1min", outputsize=100, store=store, client=api)
+    assert error is None
+    assert store.last_timestamp("XAU/USD", "1min") == full[99]
+
+    api.get = get
+    fetch_xauusd("1min", outputsize=100, store=store, client=api)
+    assert len(store.read("XAU/USD", "1min")) == 400
+
+def test_batched_delta_pages_each_symbol(store):
+    api = _FakeAPI("2024-01-01", 300)
+    api.index, full = api.index[:100], api.index
+    fetch_xauusd("1min", outputsize=100, store=store, client=api, symbol="XAU/USD")
+
+    api.index = full
+    results = fetch_symbols(["XAU/USD"], "1min", outputsize=100, store=store, client=api)
+    assert results["XAU/USD"][1] is None
+    assert len(store.read("XAU/USD", "1min")) == 300
+    np.testing.assert_array_equal(store.read("XAU/USD", "1min")["close"], np.arange(300.0))
+
+class _Router:
+    """One _FakeAPI per interval"""
+
+    def __init__(self, apis):
+        self.apis = apis
+        self.bucket = TokenBucket(8)
+
+    def get(self, endpoint, params, credits=1):
+        return self.apis[params["interval"]].get(endpoint, params, credits)
+
+@pytest.fixture
+def module_state(store, monkeypatch):
+    import data.fetch_data as fetch_data
+    from data.resample import ResampleCache
+    monkeypatch.setattr(fetch_data, "_store", store)
+    monkeypatch.setattr(fetch_data, "_resampled", ResampleCache())
+    monkeypatch.setattr(fetch_data, "_base_fetched_at", {})
+    return fetch_data
+
+def test_short_base_is_filled_in_by_one_direct_fetch(module_state, monkeypatch):
+    base = _FakeAPI("2024-01-02", 300)
+    hourly = _FakeAPI("2024-01-01", 29)
+    hourly.index = pd.date_range("2024-01-01", periods=29, freq="1h")
+    monkeypatch.setattr(module_state, "_client", _Router({"1min": base, "1h": hourly}))
+
+    df, error = module_state.fetch_timeframe("1h", outputsize=24)
+    assert error is None and len(df) == 24
+    assert len(hourly.requests) == 1
+
+    # The stored hourly bars cover what the base does not: no second direct call
+    df, error = module_state.fetch_timeframe("1h", outputsize=24, max_age=0)
+    assert error is None and len(df) == 24
+    assert len(hourly.requests) == 1
+    assert df.index[-1] == pd.Timestamp("2024-01-02 04:00")
+    assert df.index.is_unique and df.index.is_monotonic_increasing
+
+def test_resample_reads_only_new_base_bars(module_state, store, monkeypatch):
+    base = _FakeAPI("2024-01-02", 600)
+    base.index, full = base.index[:300], base.index
+    monkeypatch.setattr(module_state, "_client", _Router({"1min": base}))
+    module_state.fetch_timeframe("5min", outputsize=50)
+
+    base.index = full
+    reads = []
+    read = store.read
+    monkeypatch.setattr(store, "read", lambda *args, **kwargs: reads.append(kwargs) or read(*args, **kwargs))
+    df, error = module_state.fetch_timeframe("5min", outputsize=100, max_age=0)
+
+    assert error is None and len(df) == 100
+    assert df.index[-1] == full[-1].floor("5min")
+    starts = [kwargs.get("start") for kwargs in reads if kwargs.get("start") is not None]
+    assert starts == [pd.Timestamp("2024-01-02 04:55")]
+    monkeypatch.setattr(store, "read", read)
+    expected = resample_ohlcv(store.read("XAU/USD", "1min"), "5min").tail(100)
+    pd.testing.assert_frame_equal(df, expected, check_freq=False)
@@ -0,0 +1,36 @@
+import numpy as np
+
+from benchmarks.synthetic import make_ohlcv
+from features.pipeline import compute_all_indicators
+from models.ml_model import fit_model, training_data, _fit_fold
+
+def _frame(n=600):
+    return compute_all_indicators(make_ohlcv(n, seed=5))[0]
+
+def test_labels_belong_to_the_feature_rows():
+    df = _frame()
+    X, y, _ = training_data(df)
+    # Indicator warm-up rows are dropped, so labels must come from the same bars
+    assert X.index[0] > df.index[0]
+    expected = (df["close"].pct_change() > 0).astype(int).loc[X.index].to_numpy()
+    np.testing.assert_array_equal(y, expected)
+
+def test_exact_model_is_the_walk_forward_model():
+    df = _frame()
+    model, scaler, feature_cols = fit_model(df, "exact")
+    X, y, _ = training_data(df)
+    fold_model, fold_scaler = _fit_fold(X.to_numpy(dtype=float), y, "exact")
+
+    assert feature_cols == list(X.columns)
+    np.testing.assert_allclose(
+        model.predict_proba(scaler.transform(X)),
+        fold_model.predict_proba(fold_scaler.transform(X.to_numpy(dtype=float))),
+    )
+
+def test_falls_back_to_raw_bars_while_indicators_warm_up():
+    df = make_ohlcv(30, seed=1)
+    df["SMA"] = np.nan
+    model, scaler, feature_cols = fit_model(df, "exact")
+    assert scaler is None
+    assert "SMA" not in feature_cols
+    assert len(model.predict(df[feature_cols])) == len(df)
@@ -0,0 +1,22 @@
+import numpy as np
+
+from benchmarks.synthetic import make_ohlcv
+from features.panel import compute_panel
+
+def test_no_bars_gives_an_empty_panel():
+    panel, _ = compute_panel({"XAU/USD": None, "XAG/USD": make_ohlcv(10).iloc[:0]})
+    assert len(panel) == 0 and panel.symbols == []
+    assert panel.arrays["confidence"].shape == (0, 0)
+
+    latest = panel.latest()
+    assert latest.empty
+    assert {"time", "close", "RSI", "ATR", "MACD_Hist", "confidence"} <= set(latest.columns)
+
+def test_latest_is_the_last_bar_of_each_symbol():
+    frames = {"XAU/USD": make_ohlcv(300, seed=0), "XAG/USD": make_ohlcv(200, seed=1)}
+    latest = compute_panel(frames)[0].latest()
+    assert list(latest.index) == ["XAU/USD", "XAG/USD"]
+    for symbol, df in frames.items():
+        assert latest.loc[symbol, "time"] == df.index[-1]
+        assert latest.loc[symbol, "close"] == df["close"].iloc[-1]
+    assert np.isfinite(latest["confidence"]).all()
@@ -0,0 +1,62 @@
+import threading
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+
+from benchmarks.synthetic import make_ohlcv
+from models.predictor import Predictor, predict_batch
+
+FEATURES = ["open", "high", "low", "close"]
+
+def _predictor(df, **kwargs):
+    X = df[FEATURES]
+    y = (df["close"].pct_change() > 0).astype(int).to_numpy()
+    scaler = StandardScaler().fit(X)
+    return Predictor(LogisticRegression().fit(scaler.transform(X), y), scaler, FEATURES, **kwargs)
+
+def test_cache_is_capped_and_older_bars_are_scored_again():
+    df = make_ohlcv(300, seed=0)
+    expected = _predictor(df).predict(df)
+    predictor = _predictor(df, max_rows=50)
+
+    pd.testing.assert_series_equal(predictor.predict(df.iloc[:200]), expected.iloc[:200])
+    assert len(predictor.proba) == 50
+
+    pd.testing.assert_series_equal(predictor.predict(df), expected)
+    assert len(predictor.proba) == 50 and predictor.proba.index[-1] == df.index[-1]
+
+    # Only the last cached bar is scored again for the newest window
+    scored = predictor.rows_scored
+    predictor.predict(df.iloc[-30:])
+    assert predictor.rows_scored == scored + 1
+
+def test_shared_between_threads():
+    df = make_ohlcv(400, seed=1)
+    expected = _predictor(df).predict(df)
+    predictor = _predictor(df, max_rows=100)
+    failures = []
+
+    def session(offset):
+        try:
+            for end in range(100 + offset, len(df) + 1, 7):
+                window = df.iloc[max(0, end - 150):end]
+                if end % 2:
+                    result = predictor.predict(window)
+                else:
+                    result = predict_batch({"5min": (predictor, window)})["5min"]
+                pd.testing.assert_series_equal(result, expected.loc[window.index])
+                predictor.latency_stats()
+        except Exception as e:
+            failures.append(e)
+
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert failures == []
+    assert len(predictor.proba) <= 100
+    assert np.isfinite(predictor.proba).all()
@@ -0,0 +1,90 @@
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from data.client import TokenBucket
+from data.refresher import BackgroundRefresher
+
+def _bars():
+    index = pd.date_range("2024-01-01", periods=3, freq="5min")
+    return pd.DataFrame({"open": 1.0, "high": 1.0, "low": 1.0, "close": 1.0}, index=index)
+
+class _Fetch:
+    """fetch_panel stand-in that spends `credits` per call from the bucket"""
+
+    def __init__(self, bucket, credits, delay=0.0):
+        self.bucket = bucket
+        self.credits = credits
+        self.delay = delay
+        self.max_ages = []
+
+    def __call__(self, interval, symbols, outputsize, max_age):
+        self.max_ages.append(max_age)
+        self.bucket.acquire(self.credits[interval])
+        time.sleep(self.delay)
+        return {symbol: (_bars(), None) for symbol in symbols}
+
+def test_pause_follows_the_credits_actually_spent():
+    bucket = TokenBucket(100)
+    # e.g. a 1-minute base request plus direct requests while history is short
+    fetch = _Fetch(bucket, {"5min": 2, "1h": 3, "4h": 3})
+    refresher = BackgroundRefresher(["5min", "1h", "4h"], ["XAU/USD", "XAG/USD"],
+                                    credits_per_minute=8, budget_share=0.5, fetch=fetch, bucket=bucket)
+    refresher.refresh()
+
+    assert refresher.last_credits == 8
+    # 8 credits at 4 per minute: two minutes before the next cycle
+    assert refresher.budget_wait() == pytest.approx(120, abs=1)
+
+    # Debt adds up rather than being replaced by a cheaper refresh
+    refresher.refresh(["5min"])
+    assert refresher.budget_wait() == pytest.approx(150, abs=1)
+    assert refresher._next_cycle()[0] >= 149
+
+def test_refresh_without_credits_needs_no_pause():
+    bucket = TokenBucket(100)
+    refresher = BackgroundRefresher(["5min"], ["XAU/USD"], fetch=_Fetch(bucket, {"5min": 0}), bucket=bucket)
+    refresher.refresh()
+    assert refresher.last_credits == 0
+    assert refresher.budget_wait() < 0
+
+def test_max_age_spans_the_whole_cycle():
+    bucket = TokenBucket(100)
+    fetch = _Fetch(bucket, {"5min": 1, "15min": 0, "1h": 0}, delay=0.1)
+    refresher = BackgroundRefresher(["5min", "15min", "1h"], ["XAU/USD"], grace=0.05, fetch=fetch, bucket=bucket)
+    refresher.refresh()
+
+    first, second, third = fetch.max_ages
+    assert first == pytest.approx(0.05, abs=0.02)
+    # A base fetched by the first interval is still fresh for the last one
+    assert second >= 0.15 and third >= 0.25
+
+def test_tracks_new_feeds_from_many_threads():
+    bucket = TokenBucket(1000)
+    intervals = ["5min", "15min", "1h", "4h"]
+    fetch = _Fetch(bucket, dict.fromkeys(intervals, 0), delay=0.001)
+    refresher = BackgroundRefresher(["5min"], ["XAU/USD"], fetch=fetch, bucket=bucket)
+    symbols = [f"SYM{i}/USD" for i in range(8)]
+    failures = []
+
+    def reader(symbol):
+        try:
+            for interval in intervals:
+                df, error, _ = refresher.get(interval, symbol)
+                assert df is not None and error is None
+                refresher.metrics()
+        except Exception as e:
+            failures.append(e)
+
+    threads = [threading.Thread(target=reader, args=(symbol,)) for symbol in symbols]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert failures == []
+    assert sorted(refresher.intervals) == sorted(intervals)
+    assert sorted(refresher.symbols) == sorted(["XAU/USD"] + symbols)
+    assert list(refresher.metrics().index) == refresher.intervals
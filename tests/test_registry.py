@@ -0,0 +1,39 @@
+import os
+
+from benchmarks.synthetic import make_ohlcv
+from features.pipeline import compute_all_indicators
+from models import registry
+from models.registry import ModelRegistry
+from profiling import history
+
+def _frame():
+    return compute_all_indicators(make_ohlcv(300, seed=2))[0]
+
+def test_reuses_an_entry_of_the_same_format(tmp_path):
+    df = _frame()
+    first = ModelRegistry(str(tmp_path)).get_or_train(df, "5min")
+    again = ModelRegistry(str(tmp_path)).get_or_train(df, "5min")
+    assert again["key"] == first["key"]
+    assert again["trained_at"] == first["trained_at"]
+
+def test_retrains_entries_of_an_older_format(tmp_path, monkeypatch):
+    df = _frame()
+    monkeypatch.setattr(registry, "MODEL_FORMAT", registry.MODEL_FORMAT - 1)
+    old = ModelRegistry(str(tmp_path)).get_or_train(df, "5min")
+    monkeypatch.undo()
+
+    new = ModelRegistry(str(tmp_path)).get_or_train(df, "5min", max_new_bars=20)
+    assert new["key"] != old["key"]
+    assert new["config"] != old["config"]
+
+def test_unreadable_entry_is_reported_and_retrained(tmp_path):
+    df = _frame()
+    entry = ModelRegistry(str(tmp_path)).get_or_train(df, "5min")
+    with open(os.path.join(tmp_path, "5min", f"{entry['key']}.joblib"), "wb") as f:
+        f.write(b"not a model")
+
+    errors = len(history.recent_errors())
+    retrained = ModelRegistry(str(tmp_path)).get_or_train(df, "5min")
+    assert retrained["key"] == entry["key"]
+    assert retrained["trained_at"] > entry["trained_at"]
+    assert history.recent_errors()[errors:][0]["stage"] == "model.load"
@@ -0,0 +1,95 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.store import OHLCVStore, OHLCV_COLUMNS
+
+def _bars(start, n, close=None):
+    index = pd.date_range(start, periods=n, freq="1min", name="datetime").as_unit("ns")
+    close = np.arange(n, dtype=float) + 100 if close is None else close
+    return pd.DataFrame({
+        "open": close - 0.5, "high": close + 1, "low": close - 1, "close": close, "volume": np.ones(n),
+    }, index=index)
+
+def _segments(store):
+    return [s["name"] for s in store._manifest("XAU/USD", "1min")["segments"]]
+
+@pytest.fixture
+def store(tmp_path):
+    return OHLCVStore(str(tmp_path), segment_rows=100, keep_seconds=0)
+
+def test_append_merges_and_refreshes_the_last_bar(store):
+    store.append("XAU/USD", "1min", _bars("2024-01-01", 250))
+    update = _bars("2024-01-01 04:09", 3, close=np.array([1.0, 2.0, 3.0]))
+    merged = store.append("XAU/USD", "1min", update)
+
+    expected = pd.concat([_bars("2024-01-01", 250).iloc[:-1], update])
+    pd.testing.assert_frame_equal(merged, expected, check_freq=False)
+    assert store.last_timestamp("XAU/USD", "1min") == update.index[-1]
+
+def test_append_rewrites_only_the_overlapped_segment(store):
+    store.append("XAU/USD", "1min", _bars("2024-01-01", 250))
+    before = _segments(store)
+    assert len(before) == 3
+
+    store.append("XAU/USD", "1min", _bars("2024-01-01 04:09", 2))
+    after = _segments(store)
+    assert after[:2] == before[:2] and after[2] != before[2]
+    # The replaced segment is gone once keep_seconds have passed
+    assert not os.path.exists(os.path.join(store.path("XAU/USD", "1min"), before[2]))
+
+def test_empty_or_identical_delta_writes_nothing(store):
+    bars = _bars("2024-01-01", 50)
+    store.append("XAU/USD", "1min", bars)
+    before = _segments(store)
+
+    store.append("XAU/USD", "1min", bars.iloc[:0])
+    store.append("XAU/USD", "1min", bars.iloc[-5:])
+    assert _segments(store) == before
+
+def test_backfill_keeps_later_segments(store):
+    store.append("XAU/USD", "1min", _bars("2024-01-02", 150))
+    before = _segments(store)
+    store.append("XAU/USD", "1min", _bars("2024-01-01", 30))
+
+    after = _segments(store)
+    assert after[-2:] == before
+    assert len(store.read("XAU/USD", "1min")) == 180
+
+def test_read_last_and_range_across_segments(store):
+    bars = _bars("2024-01-01", 250)
+    store.append("XAU/USD", "1min", bars)
+
+    pd.testing.assert_frame_equal(store.read("XAU/USD", "1min", last=120), bars.tail(120), check_freq=False)
+    window = store.read("XAU/USD", "1min", start=bars.index[90], end=bars.index[110], columns=["close"])
+    pd.testing.assert_frame_equal(window, bars.loc[bars.index[90]:bars.index[110], ["close"]], check_freq=False)
+    assert len(store.read("XAU/USD", "1min", last=1000)) == 250
+
+def test_retired_segments_outlive_the_manifest_swap(tmp_path):
+    store = OHLCVStore(str(tmp_path), segment_rows=100, keep_seconds=60)
+    store.append("XAU/USD", "1min", _bars("2024-01-01", 50))
+    old = _segments(store)
+    store.append("XAU/USD", "1min", _bars("2024-01-01 00:49", 5))
+
+    # A reader that resolved the old manifest can still open its segment
+    directory = store.path("XAU/USD", "1min")
+    assert os.path.isdir(os.path.join(directory, old[0]))
+    assert len(store._load(directory, old[0], OHLCV_COLUMNS)) == 50
+
+def test_reads_and_converts_the_versioned_format(tmp_path):
+    store = OHLCVStore(str(tmp_path), segment_rows=100, keep_seconds=0)
+    bars = _bars("2024-01-01", 20)
+    directory = store.path("XAU/USD", "1min")
+    os.makedirs(os.path.join(directory, "v3"))
+    np.save(os.path.join(directory, "v3", "time.npy"), bars.index.values.astype(np.int64))
+    for col in OHLCV_COLUMNS:
+        np.save(os.path.join(directory, "v3", f"{col}.npy"), bars[col].to_numpy())
+    with open(os.path.join(directory, "CURRENT"), "w") as f:
+        f.write("3")
+
+    pd.testing.assert_frame_equal(store.read("XAU/USD", "1min"), bars, check_freq=False)
+    store.append("XAU/USD", "1min", _bars("2024-01-01 00:20", 5))
+    assert len(store.read("XAU/USD", "1min")) == 25
+    assert not os.path.exists(os.path.join(directory, "CURRENT"))
@@ -0,0 +1,50 @@
+from benchmarks.synthetic import make_ohlcv
+from features import sweep
+from features.sweep import run_sweep
+
+PARAMS = [
+    {"min_confidence": 40, "take_profit": 0.01, "stop_loss": 0.01},
+    {"min_confidence": 60, "take_profit": 0.02, "stop_loss": 0.01},
+]
+
+def _counting(monkeypatch):
+    """Count the backtests actually run"""
+    calls = []
+    run_task = sweep._run_task
+
+    def counted(*args):
+        calls.append(args[:2])
+        return run_task(*args)
+
+    monkeypatch.setattr(sweep, "_run_task", counted)
+    return calls
+
+def test_resumes_only_the_requested_runs(tmp_path, monkeypatch):
+    path = str(tmp_path / "sweep.jsonl")
+    frames = {"5min": make_ohlcv(600, seed=0, volatility=0.003)}
+    calls = _counting(monkeypatch)
+
+    first = run_sweep(frames, PARAMS, path, max_workers=1)
+    assert len(first) == 2 and len(calls) == 2
+
+    again = run_sweep(frames, PARAMS, path, max_workers=1)
+    assert len(calls) == 2
+    assert again.drop(columns="seconds").equals(first.drop(columns="seconds"))
+
+    subset = run_sweep(frames, PARAMS[:1], path, max_workers=1)
+    assert len(calls) == 2
+    assert len(subset) == 1 and subset.loc[0, "min_confidence"] == 40
+
+def test_new_bars_are_backtested_again(tmp_path, monkeypatch):
+    path = str(tmp_path / "sweep.jsonl")
+    calls = _counting(monkeypatch)
+    run_sweep({"5min": make_ohlcv(600, seed=0, volatility=0.003)}, PARAMS, path, max_workers=1)
+
+    table = run_sweep({"5min": make_ohlcv(650, seed=0, volatility=0.003)}, PARAMS, path, max_workers=1)
+    assert len(calls) == 4
+    assert len(table) == 2 and table["data"].nunique() == 1
+
+    # A different starting balance is a different run too
+    run_sweep({"5min": make_ohlcv(650, seed=0, volatility=0.003)}, PARAMS, path, max_workers=1,
+              initial_balance=5000)
+    assert len(calls) == 6
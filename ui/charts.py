@@ -0,0 +1,84 @@
+import plotly.graph_objects as go
+
+from ui.downsample import downsample_series, ohlc_buckets
+
+# About one point per pixel column of a wide chart
+CHART_POINTS = 1500
+
+# Traces with more points than this are drawn with WebGL (Scattergl)
+WEBGL_THRESHOLD = 1000
+
+def line_trace(series, name, line, max_points=CHART_POINTS, method="lttb", **kwargs):
+    """
+    Scatter line of a downsampled series, WebGL above WEBGL_THRESHOLD points
+
+    Args:
+        series: Series indexed by datetime
+        name: Legend name
+        line: Plotly line dict
+        max_points: Points to keep (see ui.downsample)
+        method: "lttb" or "minmax"
+    """
+    points = downsample_series(series, max_points, method)
+    trace = go.Scattergl if len(points) > WEBGL_THRESHOLD else go.Scatter
+    return trace(x=points.index, y=points.to_numpy(), mode="lines", name=name, line=line, **kwargs)
+
+def _layout(fig, title, height):
+    fig.update_layout(
+        title=title,
+        hovermode="x unified",
+        template="plotly_dark",
+        height=height,
+        margin=dict(l=0, r=0, t=30, b=0)
+    )
+    return fig
+
+def price_figure(df, title, max_points=CHART_POINTS):
+    """Close with SMA and EMA, as in the hero chart"""
+    fig = go.Figure()
+    fig.add_trace(line_trace(df["close"], "Close Price", dict(color="#00FFD1", width=2), max_points))
+    if "SMA" in df.columns:
+        fig.add_trace(line_trace(df["SMA"], "SMA (14)", dict(color="#FFA500", width=1, dash="dash"), max_points))
+    if "EMA" in df.columns:
+        fig.add_trace(line_trace(df["EMA"], "EMA (14)", dict(color="#FF6B6B", width=1, dash="dash"), max_points))
+    return _layout(fig, title, 400)
+
+def candlestick_figure(df, title, max_points=CHART_POINTS):
+    """Candles merged into at most max_points buckets (wicks preserved)"""
+    candles = ohlc_buckets(df, max_points)
+    fig = go.Figure(go.Candlestick(
+        x=candles.index,
+        open=candles["open"],
+        high=candles["high"],
+        low=candles["low"],
+        close=candles["close"],
+        name="OHLC"
+    ))
+    fig.update_layout(xaxis_rangeslider_visible=False)
+    return _layout(fig, title, 400)
+
+def bollinger_figure(df, title, max_points=CHART_POINTS):
+    """Close inside its Bollinger Bands (band area filled)"""
+    fig = go.Figure()
+    band = dict(color="#6366F1", width=1)
+    fig.add_trace(line_trace(df["BB_Upper"], "Upper", band, max_points))
+    fig.add_trace(line_trace(
+        df["BB_Lower"], "Lower", band, max_points,
+        fill="tonexty", fillcolor="rgba(99, 102, 241, 0.12)"
+    ))
+    fig.add_trace(line_trace(df["BB_Middle"], "Middle (20)", dict(color="#9CA3AF", width=1, dash="dot"), max_points))
+    fig.add_trace(line_trace(df["close"], "Close", dict(color="#00FFD1", width=1.5), max_points))
+    return _layout(fig, title, 350)
+
+def macd_figure(df, title, max_points=CHART_POINTS):
+    """MACD and signal lines over the histogram (min/max so no spike is dropped)"""
+    hist = downsample_series(df["MACD_Hist"], max_points, "minmax")
+    fig = go.Figure(go.Bar(
+        x=hist.index,
+        y=hist.to_numpy(),
+        name="Histogram",
+        marker_color=["#22c55e" if v >= 0 else "#ef4444" for v in hist.to_numpy()]
+    ))
+    fig.add_trace(line_trace(df["MACD"], "MACD", dict(color="#00FFD1", width=1.5), max_points))
+    fig.add_trace(line_trace(df["MACD_Signal"], "Signal", dict(color="#FFA500", width=1), max_points))
+    return _layout(fig, title, 300)
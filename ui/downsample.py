@@ -0,0 +1,129 @@
+"""
+Shape-preserving downsampling of chart series
+
+A browser only needs about one point per pixel column. These functions
+pick which points to send so the drawn line keeps its peaks, troughs and
+overall shape; indices are returned so several columns can share them.
+"""
+import pandas as pd
+import numpy as np
+
+def lttb_indices(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets: n_out representative points
+
+    The first and last points are kept; every bucket in between keeps the
+    point forming the largest triangle with the previously kept point and
+    the average of the next bucket.
+
+    Args:
+        x: Increasing x values (numbers, e.g. epoch nanoseconds)
+        y: Finite y values
+        n_out: Number of points to keep
+
+    Returns:
+        sorted int array of indices into x and y
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    # n_out - 2 buckets over the interior points
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / counts
+    avg_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / counts
+    # The last bucket looks ahead at the final point
+    avg_x = np.append(avg_x[1:], x[-1])
+    avg_y = np.append(avg_y[1:], y[-1])
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        xa, ya = x[a], y[a]
+        area = np.abs((xa - avg_x[i]) * (y[lo:hi] - ya) - (xa - x[lo:hi]) * (avg_y[i] - ya))
+        a = lo + int(area.argmax())
+        selected[i + 1] = a
+    return selected
+
+def minmax_indices(y, n_out):
+    """
+    Min/max buckets: the lowest and highest point of n_out // 2 buckets
+
+    Cheaper than LTTB and keeps every extreme, so spikes never vanish.
+
+    Returns:
+        sorted int array of at most n_out indices (plus the first and last)
+    """
+    n = len(y)
+    buckets = max(n_out // 2, 1)
+    if n_out >= n:
+        return np.arange(n)
+
+    y = np.asarray(y, dtype=float)
+    size = -(-n // buckets)
+    # Pad the last bucket with its own last value so it cannot win
+    padded = np.concatenate([y, np.full(size * buckets - n, y[-1])]).reshape(buckets, size)
+    offsets = np.arange(buckets) * size
+    picks = np.concatenate([offsets + padded.argmin(axis=1), offsets + padded.argmax(axis=1), [0, n - 1]])
+    return np.unique(np.minimum(picks, n - 1))
+
+def downsample_indices(x, y, n_out, method="lttb"):
+    """Indices of the finite points of y to draw, by "lttb" or "minmax" """
+    finite = np.flatnonzero(np.isfinite(y))
+    if len(finite) <= n_out:
+        return finite
+    if method == "minmax":
+        keep = minmax_indices(y[finite], n_out)
+    elif method == "lttb":
+        keep = lttb_indices(x[finite], y[finite], n_out)
+    else:
+        raise ValueError(f"Unknown downsampling method: {method}")
+    return finite[keep]
+
+def downsample_series(series, n_out, method="lttb"):
+    """A datetime-indexed Series reduced to about n_out points (NaNs dropped)"""
+    y = series.to_numpy(dtype=float)
+    x = series.index.values.astype("datetime64[ns]").astype(np.int64)
+    return series.iloc[downsample_indices(x, y, n_out, method)]
+
+def ohlc_buckets(df, n_out):
+    """
+    Merge consecutive bars so at most n_out candles remain
+
+    Each candle keeps the first open, highest high, lowest low and last
+    close of its bars and the time of its first bar, so no wick is lost.
+    """
+    n = len(df)
+    if n <= n_out:
+        return df[["open", "high", "low", "close"]]
+    size = -(-n // n_out)
+    starts = np.arange(0, n, size)
+    ends = np.minimum(starts + size, n) - 1
+    high = np.maximum.reduceat(df["high"].to_numpy(dtype=float), starts)
+    low = np.minimum.reduceat(df["low"].to_numpy(dtype=float), starts)
+    return pd.DataFrame({
+        "open": df["open"].to_numpy(dtype=float)[starts],
+        "high": high,
+        "low": low,
+        "close": df["close"].to_numpy(dtype=float)[ends],
+    }, index=df.index[starts])
+
+def _timestamp(value):
+    # Plotly reports dates as strings, or as epoch milliseconds
+    if isinstance(value, (int, float, np.number)):
+        return pd.Timestamp(value, unit="ms")
+    return pd.Timestamp(value)
+
+def visible_window(df, x_range=None):
+    """Rows of df inside an (start, end) x range from a chart zoom, or all rows"""
+    if not x_range:
+        return df
+    start, end = (_timestamp(v) for v in x_range)
+    if start > end:
+        start, end = end, start
+    return df.loc[start:end]